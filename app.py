@@ -37,7 +37,7 @@ CORS(app, resources={
     r"/api/*": {
         "origins": "*",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "X-API-Key"],
         "supports_credentials": True
     }
 })
@@ -49,6 +49,13 @@ try:
 except Exception as e:
     logger.error(f"Error initializing database: {e}")
 
+# Fail background jobs that died with a previous worker
+try:
+    from services.job_manager import JobManager
+    JobManager.recover_orphaned_jobs()
+except Exception as e:
+    logger.error(f"Error recovering pipeline jobs: {e}")
+
 # Initialize Scheduler
 try:
     SchedulerService.init_scheduler(app)
@@ -0,0 +1,111 @@
+"""
+Benchmark concurrent SQLite access with default vs tuned engine settings
+
+Starts writer and reader processes (like gunicorn workers plus the
+scheduler) against a scratch database. Writers insert PipelineLog rows
+one transaction each. Readers run the dashboard stats query. The script
+reports throughput and "database is locked" errors, first with a plain
+create_engine() and then with storage.database.create_storage_engine().
+
+Usage:
+    python -m benchmarks.bench_db_concurrency --writers 4 --readers 4 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_engine(mode, url):
+    from sqlalchemy import create_engine
+    from storage.database import create_storage_engine
+
+    if mode == "default":
+        return create_engine(url, echo=False)
+    return create_storage_engine(url)
+
+
+def worker(mode, url, role, seconds, results):
+    from datetime import datetime, timedelta
+    from sqlalchemy import func
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from storage.models import PipelineLog
+
+    Session = sessionmaker(bind=make_engine(mode, url))
+    ops = errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        db = Session()
+        try:
+            if role == "writer":
+                db.add(PipelineLog(
+                    user_id=1, input_text="Texto de entrada " * 20, output_json={"stages": {}},
+                    status="success", execution_time=1.0, model_used="gpt-4"
+                ))
+                db.commit()
+            else:
+                db.query(PipelineLog.status, func.count(PipelineLog.id)).filter(
+                    PipelineLog.created_at >= datetime.now() - timedelta(days=30)
+                ).group_by(PipelineLog.status).all()
+            ops += 1
+        except OperationalError:
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    results.put((role, ops, errors))
+
+
+def run(mode, args):
+    workdir = tempfile.mkdtemp(prefix="sia_r_bench_")
+    url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    try:
+        from storage.database import Base
+        import storage.models  # noqa: F401  (register tables)
+        engine = make_engine(mode, url)
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+
+        results = multiprocessing.Queue()
+        roles = ["writer"] * args.writers + ["reader"] * args.readers
+        procs = [
+            multiprocessing.Process(target=worker, args=(mode, url, role, args.seconds, results))
+            for role in roles
+        ]
+        for proc in procs:
+            proc.start()
+        totals = {"writer": [0, 0], "reader": [0, 0]}
+        for _ in procs:
+            role, ops, errors = results.get()
+            totals[role][0] += ops
+            totals[role][1] += errors
+        for proc in procs:
+            proc.join()
+        return totals
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'engine':>8} {'writes/s':>9} {'write errs':>10} {'reads/s':>9} {'read errs':>9}")
+    for mode in ("default", "tuned"):
+        totals = run(mode, args)
+        print(f"{mode:>8} {totals['writer'][0] / args.seconds:>9.1f} {totals['writer'][1]:>10} "
+              f"{totals['reader'][0] / args.seconds:>9.1f} {totals['reader'][1]:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark MetricsCollector.get_pipeline_stats over a large pipeline_logs table
+
+Fills a throwaway SQLite database with synthetic PipelineLog rows (with a
+realistic output_json payload) and reports wall time and peak Python
+memory of get_pipeline_stats at each size. Peak memory should stay flat
+as the row count grows because aggregation happens in SQL.
+
+Usage:
+    python -m benchmarks.bench_pipeline_stats --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before config is imported
+_workdir = tempfile.mkdtemp(prefix="sia_r_bench_")
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_workdir, 'bench.db')}"
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.database import engine, init_db  # noqa: E402
+from storage.models import PipelineLog  # noqa: E402
+from services.metrics_collector import MetricsCollector  # noqa: E402
+
+CHUNK = 10000
+
+
+def fill(start, stop, payload_bytes):
+    """Insert rows [start, stop) spread over the last 60 days"""
+    now = datetime.now()
+    payload = json.dumps({"stages": {"humanizer": "x" * payload_bytes}})
+    statuses = ["success"] * 8 + ["failed", "processing"]
+    table = PipelineLog.__table__
+
+    with engine.begin() as conn:
+        for offset in range(start, stop, CHUNK):
+            rows = [
+                {
+                    "user_id": 1,
+                    "input_text": "Texto de entrada " * 20,
+                    "output_json": payload,
+                    "status": random.choice(statuses),
+                    "execution_time": random.uniform(1, 60),
+                    "model_used": "gpt-4",
+                    "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 60))
+                }
+                for _ in range(offset, min(offset + CHUNK, stop))
+            ]
+            conn.execute(table.insert(), rows)
+
+
+def measure(days):
+    tracemalloc.start()
+    started = time.perf_counter()
+    stats = MetricsCollector.get_pipeline_stats(days=days)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return stats, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="Final row count")
+    parser.add_argument("--steps", type=int, default=3, help="Measure at rows/10^n for n < steps")
+    parser.add_argument("--payload-bytes", type=int, default=1000, help="Size of output_json per row")
+    parser.add_argument("--days", type=int, default=30, help="Stats window")
+    args = parser.parse_args()
+
+    init_db()
+    measure(args.days)  # Warm up imports and statement caches
+    sizes = sorted({max(1, args.rows // 10 ** n) for n in range(args.steps)})
+
+    print(f"{'rows':>10} {'in window':>10} {'seconds':>9} {'peak KiB':>9}")
+    filled = 0
+    try:
+        for size in sizes:
+            fill(filled, size, args.payload_bytes)
+            filled = size
+            stats, elapsed, peak = measure(args.days)
+            print(f"{size:>10} {stats['total_runs']:>10} {elapsed:>9.3f} {peak / 1024:>9.1f}")
+    finally:
+        engine.dispose()
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
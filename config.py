@@ -9,6 +9,24 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")  # Changed from gpt-4
 OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))  # Lowered from 0.7 to 0.3 for more factual, consistent news generation
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "2000"))
 
+# Shared HTTP pool used by every LLM client in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "8"))  # In-flight completions per process
+
+# LLM response cache (memory LRU + optional SQLite file shared by workers)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True") == "True"
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.3"))  # Only cache near-deterministic calls
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", "./llm_cache.db")  # Empty to keep the cache in memory only
+LLM_CACHE_DB_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DB_MAX_ENTRIES", "5000"))
+LLM_RATE_LIMIT_RPM = int(os.getenv("LLM_RATE_LIMIT_RPM", "500"))  # 0 disables the request bucket
+LLM_RATE_LIMIT_TPM = int(os.getenv("LLM_RATE_LIMIT_TPM", "200000"))  # 0 disables the token bucket
+LLM_RATE_LIMIT_DB_PATH = os.getenv("LLM_RATE_LIMIT_DB_PATH", "./llm_ratelimit.db")  # Empty for a per-process bucket
+LLM_BATCH_RESERVE = float(os.getenv("LLM_BATCH_RESERVE", "0.2"))  # Bucket fraction batch work leaves for interactive calls
+
 # === JWT CONFIGURATION ===
 JWT_SECRET = os.getenv("JWT_SECRET", "your-super-secret-jwt-key-change-me")
 JWT_ALGORITHM = "HS256"
@@ -16,6 +34,10 @@ JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "3600"))
 
 # === API KEY CONFIGURATION ===
 API_KEY_MASTER = os.getenv("API_KEY_MASTER", "master-api-key-change-me")
+API_KEY_MAX_ACTIVE_PER_USER = int(os.getenv("API_KEY_MAX_ACTIVE_PER_USER", "3"))  # Oldest keys are deactivated beyond this
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))  # Seconds a verified key is trusted without a DB read
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "1024"))
+API_KEY_LAST_USED_FLUSH_INTERVAL = float(os.getenv("API_KEY_LAST_USED_FLUSH_INTERVAL", "60"))  # Seconds between last_used writes
 
 # === WORDPRESS CONFIGURATION ===
 WP_BASE_URL = os.getenv("WP_BASE_URL", "https://eldiademichoacan.com")
@@ -25,6 +47,12 @@ WP_API_ENDPOINT = f"{WP_BASE_URL}/wp-json/wp/v2"
 
 # === DATABASE CONFIGURATION ===
 DB_URL = os.getenv("DB_URL", "sqlite:///./sia_r.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds; server databases only
+DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "True") == "True"  # WAL + synchronous=NORMAL
+DB_SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DB_SQLITE_MMAP_SIZE = int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 0 disables
 SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "False") == "True"
 
 # === PIPELINE CONFIGURATION ===
@@ -38,8 +66,42 @@ PIPELINE_CONFIG = {
     "seo_optimization_enabled": True,
     "planning_enabled": True,
     "taxonomy_normalization_enabled": True,
+    "parallel_stages": os.getenv("PIPELINE_PARALLEL_STAGES", "True") == "True",
+    "max_stage_workers": int(os.getenv("PIPELINE_MAX_STAGE_WORKERS", "5")),
+    "seo_single_request": os.getenv("SEO_SINGLE_REQUEST", "True") == "True",  # One LLM call for H1/H2/meta/schema
+    "merged_analysis": os.getenv("PIPELINE_MERGED_ANALYSIS", "False") == "True",  # One LLM call for tagger + auditor
+    "batch_concurrency": int(os.getenv("PIPELINE_BATCH_CONCURRENCY", "4")),
+    "batch_max_items": int(os.getenv("PIPELINE_BATCH_MAX_ITEMS", "1000")),
+    "checkpoints": os.getenv("PIPELINE_CHECKPOINTS", "True") == "True",  # Persist stage outputs for resume/re-run
 }
 
+# Write-behind queue for PipelineLog inserts
+PIPELINE_LOG_ASYNC = os.getenv("PIPELINE_LOG_ASYNC", "True") == "True"
+PIPELINE_LOG_BATCH_SIZE = int(os.getenv("PIPELINE_LOG_BATCH_SIZE", "50"))
+PIPELINE_LOG_FLUSH_INTERVAL = float(os.getenv("PIPELINE_LOG_FLUSH_INTERVAL", "2.0"))  # Seconds
+PIPELINE_LOG_QUEUE_SIZE = int(os.getenv("PIPELINE_LOG_QUEUE_SIZE", "1000"))
+PIPELINE_LOG_PUT_TIMEOUT = float(os.getenv("PIPELINE_LOG_PUT_TIMEOUT", "5.0"))  # Block this long when full, then write inline
+
+# Compressed pipeline output blobs (pipeline_log_outputs)
+PIPELINE_OUTPUT_COMPRESSION_LEVEL = int(os.getenv("PIPELINE_OUTPUT_COMPRESSION_LEVEL", "6"))  # zlib 1-9
+PIPELINE_OUTPUT_MAX_BYTES = int(os.getenv("PIPELINE_OUTPUT_MAX_BYTES", str(512 * 1024)))  # Uncompressed cap per run
+PIPELINE_OUTPUT_RETENTION_DAYS = int(os.getenv("PIPELINE_OUTPUT_RETENTION_DAYS", "90"))  # 0 keeps blobs forever
+
+# Daily maintenance (retention and compaction)
+PIPELINE_LOG_RETENTION_DAYS = int(os.getenv("PIPELINE_LOG_RETENTION_DAYS", "365"))  # 0 keeps logs forever
+PIPELINE_LOG_ARCHIVE_DIR = os.getenv("PIPELINE_LOG_ARCHIVE_DIR", "")  # Write expired logs here as .jsonl.gz before deleting
+PIPELINE_CHECKPOINT_RETENTION_DAYS = int(os.getenv("PIPELINE_CHECKPOINT_RETENTION_DAYS", "7"))
+MAINTENANCE_BATCH_SIZE = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))  # Rows per delete transaction
+MAINTENANCE_BATCH_PAUSE = float(os.getenv("MAINTENANCE_BATCH_PAUSE", "0.05"))  # Seconds between batches for other writers
+MAINTENANCE_VACUUM_PAGES = int(os.getenv("MAINTENANCE_VACUUM_PAGES", "2000"))  # SQLite free pages released per run, 0 = all
+MAINTENANCE_LEASE_HOURS = float(os.getenv("MAINTENANCE_LEASE_HOURS", "20"))  # One worker runs the daily job per lease
+
+# Background pipeline jobs (/api/pipeline/jobs)
+PIPELINE_JOB_WORKERS = int(os.getenv("PIPELINE_JOB_WORKERS", "2"))
+PIPELINE_JOB_MAX_PENDING = int(os.getenv("PIPELINE_JOB_MAX_PENDING", "50"))
+PIPELINE_JOB_STALE_AFTER = int(os.getenv("PIPELINE_JOB_STALE_AFTER", "21600"))  # Seconds before an unfinished job is given up on
+PIPELINE_JOB_RETENTION_DAYS = int(os.getenv("PIPELINE_JOB_RETENTION_DAYS", "30"))  # Finished jobs (with full results) kept this long
+
 # === TAXONOMY AUTO-LEARN CONFIGURATION ===
 TAXONOMY_AUTOLEARN_CONFIG = {
     "enabled": True,
@@ -91,6 +153,9 @@ RSS_FEED_URLS = os.getenv("RSS_FEED_URLS", "").split(",") if os.getenv("RSS_FEED
     "https://www.bbc.com/mundo/feed.xml",
     "https://feeds.bloomberg.com/markets/news.rss",
 ]
+RSS_FETCH_WORKERS = int(os.getenv("RSS_FETCH_WORKERS", "8"))  # Feeds downloaded in parallel (and pooled connections)
+RSS_FETCH_TIMEOUT = float(os.getenv("RSS_FETCH_TIMEOUT", "10"))  # Seconds per feed request
+RSS_SEEN_GUIDS_MAX = int(os.getenv("RSS_SEEN_GUIDS_MAX", "500"))  # Entry GUIDs remembered per feed
 
 # SerpAPI (alternative search results - requires API key)
 SERPAPI_ENABLED = os.getenv("SERPAPI_ENABLED", "False") == "True"
@@ -99,3 +164,15 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY", "")
 # Cache configuration for trends
 TRENDS_CACHE_TTL = int(os.getenv("TRENDS_CACHE_TTL", "3600"))  # 1 hour default
 TRENDS_MAX_RESULTS = int(os.getenv("TRENDS_MAX_RESULTS", "20"))
+TRENDS_CACHE_DB_PATH = os.getenv("TRENDS_CACHE_DB_PATH", "./trends_cache.db")  # Shared by all workers; empty for per-process
+TRENDS_CACHE_MAX_STALE = int(os.getenv("TRENDS_CACHE_MAX_STALE", "86400"))  # Stale entries are served (and revalidated) up to this age
+TRENDS_REFRESH_LEASE = int(os.getenv("TRENDS_REFRESH_LEASE", "120"))  # Seconds one worker holds the refresh lock
+
+# Concurrent source fetching
+TRENDS_FETCH_WORKERS = int(os.getenv("TRENDS_FETCH_WORKERS", "8"))
+TRENDS_SOURCE_TIMEOUT = float(os.getenv("TRENDS_SOURCE_TIMEOUT", "8"))  # Seconds one source may take
+TRENDS_FETCH_BUDGET = float(os.getenv("TRENDS_FETCH_BUDGET", "10"))  # Seconds fetch_all_trends waits in total
+
+# Cross-source trend fusion
+TRENDS_FUSION_THRESHOLD = float(os.getenv("TRENDS_FUSION_THRESHOLD", "0.6"))  # Title token similarity to merge trends
+TRENDS_FUSION_HALF_LIFE = float(os.getenv("TRENDS_FUSION_HALF_LIFE", "12"))  # Hours for a trend's score to halve; 0 disables
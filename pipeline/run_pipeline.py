@@ -1,12 +1,15 @@
 import logging
 import time
 import json
+import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional
 
 from services.cleaner import TextCleaner
 from services.tagger_llm import TaggerLLM
 from services.auditor_llm import AuditorLLM
+from services.content_analyzer import ContentAnalyzer
 from services.fact_checker import FactChecker
 from services.verifier import Verifier
 from services.humanizer import Humanizer
@@ -17,6 +20,11 @@ from services.taxonomy_autolearn import TaxonomyAutolearn
 from services.wp_client import WordPressClient
 from services.wp_taxonomy_manager import WordPressTaxonomyManager
 from services.metrics_collector import MetricsCollector
+from services.checkpoint_store import CheckpointStore
+from services.rate_limiter import llm_priority, PRIORITY_BATCH
+from config import PIPELINE_CONFIG
+
+from pipeline.stage_executor import StageExecutor
 
 from pipeline.schema import PipelineOutput, CleanerOutput, TaggerOutput, AuditorOutput
 from pipeline.schema import FactCheckerOutput, VerifierOutput, HumanizerOutput, SEOOutput, PlannerOutput
@@ -30,6 +38,7 @@ class Pipeline:
         self.cleaner = TextCleaner()
         self.tagger = TaggerLLM()
         self.auditor = AuditorLLM()
+        self.analyzer = ContentAnalyzer()
         self.fact_checker = FactChecker()
         self.verifier = Verifier()
         self.humanizer = Humanizer()
@@ -41,21 +50,37 @@ class Pipeline:
         self.wp_taxonomy_mgr = WordPressTaxonomyManager()
     
     def run(self, title: str, content: str, user_id: Optional[int] = None, 
-            auto_publish: bool = False) -> Dict[str, Any]:
+            auto_publish: bool = False,
+            on_stage: Optional[Callable[[str, Dict[str, Any], float], None]] = None,
+            on_token: Optional[Callable[[str], None]] = None,
+            run_id: Optional[str] = None, resume: Optional[bool] = None) -> Dict[str, Any]:
         """
         Execute complete pipeline
         
+        Stage outputs are checkpointed under the run ID (in one transaction
+        when the run ends or fails), so calling run again with the same
+        run_id and input resumes from the first stage that did not complete.
+        
         Args:
             title: Article title
             content: Article content
             user_id: User ID for logging
             auto_publish: Automatically publish to WordPress
+            on_stage: Optional callback(stage_name, stage_result, elapsed_seconds)
+                invoked as each stage completes
+            on_token: Optional callback receiving humanizer output as it streams
+            run_id: Run to resume, or key for a new run's checkpoints
+                (default: a new random ID)
+            resume: Load run_id's checkpoints first (default: when run_id is given)
         
         Returns:
             Pipeline output dict
         """
         start_time = time.time()
-        logger.info("=== STARTING SIA-R PIPELINE ===")
+        if resume is None:
+            resume = run_id is not None
+        run_id = run_id or uuid.uuid4().hex
+        logger.info(f"=== STARTING SIA-R PIPELINE (run {run_id}) ===")
         
         results = {
             "status": "success",
@@ -63,110 +88,70 @@ class Pipeline:
             "warnings": []
         }
         
+        use_checkpoints = PIPELINE_CONFIG.get("checkpoints", True)
+        input_hash = CheckpointStore.input_hash(title, content)
+        # Outputs computed by this call; written together at the end
+        computed = {}
+        
         try:
+            checkpoints = {}
+            if use_checkpoints and resume:
+                # Only checkpoints recorded for this same input are reused
+                checkpoints = CheckpointStore.load(run_id, input_hash)
+                if checkpoints:
+                    logger.info(f"Resuming run {run_id}; completed stages: {sorted(checkpoints)}")
+            
             # Stage 1: Cleaning
             logger.info("Stage 1: Text Cleaning")
-            cleaned_text = self.cleaner.clean(content)
+            stage_start = time.time()
+            if "cleaner" in checkpoints:
+                cleaned_text = checkpoints.pop("cleaner")
+            else:
+                cleaned_text = self.cleaner.clean(content)
+                computed["cleaner"] = cleaned_text
             results["stages"]["cleaner"] = {
                 "status": "completed",
                 "original_length": len(content),
                 "cleaned_length": len(cleaned_text)
             }
+            if on_stage:
+                on_stage("cleaner", results["stages"]["cleaner"], time.time() - stage_start)
             
-            # Stage 2: Tagging
-            logger.info("Stage 2: LLM Tagging")
-            tagger_result = self.tagger.extract_tags(cleaned_text)
-            results["stages"]["tagger"] = {
-                "status": "completed",
-                "categories": tagger_result["suggested_categories"],
-                "tags": tagger_result["suggested_tags"]
-            }
+            # Stages 2-10 run as a dependency graph: tagging, auditing,
+            # fact checking, verification and humanization only read the
+            # cleaned text, so they are dispatched together.
+            executor = self._build_executor(on_token)
+            resumed = {name: output for name, output in checkpoints.items() if name in executor.stages}
+            for name, output in resumed.items():
+                results["stages"][name] = dict(self._summarize_stage(name, output), resumed=True)
+                if on_stage:
+                    on_stage(name, results["stages"][name], 0.0)
             
-            # Stage 3: Auditing
-            logger.info("Stage 3: LLM Auditing")
-            auditor_result = self.auditor.audit(cleaned_text)
-            results["stages"]["auditor"] = {
-                "status": "completed",
-                "quality_metrics": auditor_result
-            }
+            def record_stage(name, output, elapsed):
+                computed[name] = output
+                results["stages"][name] = self._summarize_stage(name, output)
+                if on_stage:
+                    on_stage(name, results["stages"][name], elapsed)
             
-            # Stage 4: Fact Checking
-            logger.info("Stage 4: Fact Checking")
-            fact_check_result = self.fact_checker.check(cleaned_text)
-            results["stages"]["fact_checker"] = {
-                "status": "completed",
-                "risk_score": fact_check_result["risk_score"],
-                "flags": fact_check_result["red_flags"]
-            }
+            outputs = executor.run(
+                initial=dict(resumed, cleaned_text=cleaned_text),
+                on_stage_complete=record_stage
+            )
+            
+            tagger_result = outputs["tagger"]
+            auditor_result = outputs["auditor"]
+            fact_check_result = outputs["fact_checker"]
+            verifier_result = outputs["verifier"]
+            humanized_text = outputs["humanizer"]
+            seo_result = outputs["seo"]
+            normalized_tax = outputs["taxonomy"]
             
             if fact_check_result["risk_score"] > 0.7:
                 results["warnings"].append(f"High fact-check risk: {fact_check_result['risk_score']}")
             
-            # Stage 5: Verification
-            logger.info("Stage 5: Verification")
-            verifier_result = self.verifier.verify(cleaned_text)
-            results["stages"]["verifier"] = {
-                "status": "completed",
-                "coherence": verifier_result["coherence_score"],
-                "valid": verifier_result["overall_valid"]
-            }
-            
             if not verifier_result["overall_valid"]:
                 results["warnings"].append("Content failed verification checks")
             
-            # Stage 6: Humanization
-            logger.info("Stage 6: Humanization")
-            humanized_text = self.humanizer.humanize(cleaned_text)
-            results["stages"]["humanizer"] = {"status": "completed"}
-            
-            # Stage 7: SEO Optimization
-            logger.info("Stage 7: SEO Optimization")
-            seo_result = self.seo_optimizer.optimize(
-                humanized_text,
-                primary_entity=tagger_result["suggested_categories"][0] if tagger_result["suggested_categories"] else None
-            )
-            results["stages"]["seo"] = {
-                "status": "completed",
-                "h1": seo_result["h1"],
-                "meta": seo_result["meta_description"],
-                "schema_markup": seo_result.get("schema_markup", {})
-            }
-            
-            # Stage 8: Taxonomy Normalization
-            logger.info("Stage 8: Taxonomy Normalization")
-            normalized_tax = self.taxonomy_normalizer.normalize(
-                tagger_result["suggested_categories"],
-                tagger_result["suggested_tags"]
-            )
-            results["stages"]["taxonomy"] = {
-                "status": "completed",
-                "categories": normalized_tax["categories"],
-                "tags": normalized_tax["tags"]
-            }
-            
-            # Stage 9: Planning
-            logger.info("Stage 9: Planning & Publication Strategy")
-            planner_result = self.planner.plan(
-                humanized_text,
-                normalized_tax["categories"],
-                normalized_tax["tags"]
-            )
-            results["stages"]["planner"] = {
-                "status": "completed",
-                "pub_date": planner_result["publication_date"],
-                "auto_publish": planner_result["auto_publish"]
-            }
-            
-            # Stage 10: Taxonomy Auto-Learning
-            logger.info("Stage 10: Taxonomy Auto-Learning")
-            traffic_score = fact_check_result["risk_score"]  # Inverse: low risk = good content
-            self.taxonomy_autolearn.learn_from_article(
-                normalized_tax["categories"],
-                normalized_tax["tags"],
-                traffic_score=1.0 - traffic_score
-            )
-            results["stages"]["autolearn"] = {"status": "completed"}
-            
             # Calculate overall quality score
             quality_score = self._calculate_quality_score(
                 verifier_result, fact_check_result, auditor_result
@@ -189,12 +174,16 @@ class Pipeline:
                     output_json=json.dumps(results),
                     status="success",
                     execution_time=execution_time,
-                    model_used="gpt-4"
+                    model_used="gpt-4",
+                    quality_score=quality_score,
+                    category=normalized_tax["categories"][0] if normalized_tax["categories"] else None,
+                    tags=normalized_tax["tags"]
                 )
             
             # Final output
             pipeline_output = {
                 "status": "success",
+                "run_id": run_id,
                 "execution_time_ms": round(execution_time * 1000, 2),
                 "final_text": humanized_text,
                 "final_h1": seo_result["h1"],
@@ -230,10 +219,255 @@ class Pipeline:
             
             return {
                 "status": "error",
+                "run_id": run_id,
                 "execution_time_ms": round(execution_time * 1000, 2),
                 "error": str(e),
                 "message": "Pipeline execution failed"
             }
+        
+        finally:
+            if use_checkpoints and computed:
+                CheckpointStore.save_many(run_id, input_hash, computed)
+    
+    def rerun_stage(self, run_id: str, stage: str, overrides: Optional[Dict[str, Any]] = None,
+                    on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Re-run a single stage of a checkpointed run
+        
+        The stage reads its inputs from the run's checkpoints. Overrides
+        replace upstream outputs first, e.g. {"humanizer": edited_text} to
+        regenerate SEO after an editor changes the text. Checkpoints of
+        stages downstream of what changed are dropped so the next resume
+        recomputes them.
+        
+        Args:
+            run_id: Checkpointed pipeline run
+            stage: Stage to re-run (e.g. "seo")
+            overrides: Stage outputs to replace before running
+            on_token: Optional callback receiving humanizer output as it streams
+        
+        Returns:
+            {"status", "run_id", "stage", "output", "summary", "invalidated"}
+        
+        Raises:
+            ValueError: unknown stage or override names
+            LookupError: the run has no checkpoints
+        """
+        overrides = overrides or {}
+        executor = self._build_executor(on_token)
+        unknown = sorted(({stage} | set(overrides)) - set(executor.stages))
+        if unknown:
+            raise ValueError(f"Unknown stages: {unknown}")
+        
+        input_hash = CheckpointStore.run_hash(run_id)
+        if input_hash is None:
+            raise LookupError(f"No checkpoints for run {run_id}")
+        checkpoints = CheckpointStore.load(run_id, input_hash)
+        
+        stale = executor.dependents({stage} | set(overrides)) - {stage}
+        outputs = dict(checkpoints, **overrides)
+        outputs["cleaned_text"] = outputs.pop("cleaner")
+        for name in stale | {stage}:
+            outputs.pop(name, None)
+        
+        logger.info(f"Re-running stage {stage} of run {run_id}")
+        outputs = executor.run(initial=outputs, only=[stage])
+        
+        CheckpointStore.save_many(run_id, input_hash, dict(overrides, **{stage: outputs[stage]}), drop=stale)
+        
+        return {
+            "status": "success",
+            "run_id": run_id,
+            "stage": stage,
+            "output": outputs[stage],
+            "summary": self._summarize_stage(stage, outputs[stage]),
+            "invalidated": sorted(stale)
+        }
+    
+    def run_many(self, articles: Iterable[Dict[str, Any]], user_id: Optional[int] = None,
+                 max_concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run the pipeline over many articles with bounded concurrency
+        
+        Articles are pulled from the iterable lazily, so a streamed NDJSON
+        body is never fully buffered; at most max_concurrency runs are in
+        flight. LLM traffic from all runs still shares the process-wide
+        transport and its request limits, and runs in the batch priority
+        lane so interactive requests are served first.
+        
+        Args:
+            articles: Iterable of dicts with title, content and optional
+                auto_publish and id
+            user_id: User ID for logging
+            max_concurrency: Parallel runs (default PIPELINE_CONFIG batch_concurrency)
+        
+        Yields:
+            {"index", "id", "title", "result"} dicts in completion order
+        """
+        max_concurrency = max_concurrency or PIPELINE_CONFIG.get("batch_concurrency", 4)
+        articles = enumerate(articles)
+        
+        def run_batch_item(article):
+            with llm_priority(PRIORITY_BATCH):
+                return self.run(
+                    title=article["title"],
+                    content=article["content"],
+                    user_id=user_id,
+                    auto_publish=article.get("auto_publish", False)
+                )
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency,
+                                thread_name_prefix="pipeline-batch") as pool:
+            running = {}
+            exhausted = False
+            while running or not exhausted:
+                while not exhausted and len(running) < max_concurrency:
+                    try:
+                        index, article = next(articles)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = pool.submit(run_batch_item, article)
+                    running[future] = (index, article.get("id"), article["title"])
+                
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, article_id, title = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"status": "error", "error": str(e)}
+                    yield {"index": index, "id": article_id, "title": title, "result": result}
+    
+    def _build_executor(self, on_token=None) -> StageExecutor:
+        """Declare stages 2-10 and the outputs each one depends on"""
+        executor = StageExecutor(
+            max_workers=PIPELINE_CONFIG.get("max_stage_workers", 5),
+            parallel=PIPELINE_CONFIG.get("parallel_stages", True)
+        )
+        if PIPELINE_CONFIG.get("merged_analysis", False):
+            # One request returns both; tagger/auditor only unpack it
+            executor.add_stage("analysis", self._run_analysis, ["cleaned_text"])
+            executor.add_stage("tagger", self._run_tagger, ["analysis"])
+            executor.add_stage("auditor", self._run_auditor, ["analysis"])
+        else:
+            executor.add_stage("tagger", self._run_tagger, ["cleaned_text"])
+            executor.add_stage("auditor", self._run_auditor, ["cleaned_text"])
+        executor.add_stage("fact_checker", self._run_fact_checker, ["cleaned_text"])
+        executor.add_stage("verifier", self._run_verifier, ["cleaned_text"])
+        executor.add_stage("humanizer", lambda out: self._run_humanizer(out, on_token), ["cleaned_text"])
+        executor.add_stage("seo", self._run_seo, ["humanizer", "tagger"])
+        executor.add_stage("taxonomy", self._run_taxonomy, ["tagger"])
+        executor.add_stage("planner", self._run_planner, ["humanizer", "taxonomy"])
+        executor.add_stage("autolearn", self._run_autolearn, ["taxonomy", "fact_checker"])
+        return executor
+    
+    def _run_analysis(self, outputs):
+        logger.info("Stage 2-3: LLM Tagging & Auditing (merged)")
+        return self.analyzer.analyze(outputs["cleaned_text"])
+    
+    def _run_tagger(self, outputs):
+        if (outputs.get("analysis") or {}).get("tagger"):
+            return outputs["analysis"]["tagger"]
+        logger.info("Stage 2: LLM Tagging")
+        return self.tagger.extract_tags(outputs["cleaned_text"])
+    
+    def _run_auditor(self, outputs):
+        if (outputs.get("analysis") or {}).get("auditor"):
+            return outputs["analysis"]["auditor"]
+        logger.info("Stage 3: LLM Auditing")
+        return self.auditor.audit(outputs["cleaned_text"])
+    
+    def _run_fact_checker(self, outputs):
+        logger.info("Stage 4: Fact Checking")
+        return self.fact_checker.check(outputs["cleaned_text"])
+    
+    def _run_verifier(self, outputs):
+        logger.info("Stage 5: Verification")
+        return self.verifier.verify(outputs["cleaned_text"])
+    
+    def _run_humanizer(self, outputs, on_token=None):
+        logger.info("Stage 6: Humanization")
+        return self.humanizer.humanize(outputs["cleaned_text"], on_token=on_token)
+    
+    def _run_seo(self, outputs):
+        logger.info("Stage 7: SEO Optimization")
+        categories = outputs["tagger"]["suggested_categories"]
+        return self.seo_optimizer.optimize(
+            outputs["humanizer"],
+            primary_entity=categories[0] if categories else None
+        )
+    
+    def _run_taxonomy(self, outputs):
+        logger.info("Stage 8: Taxonomy Normalization")
+        return self.taxonomy_normalizer.normalize(
+            outputs["tagger"]["suggested_categories"],
+            outputs["tagger"]["suggested_tags"]
+        )
+    
+    def _run_planner(self, outputs):
+        logger.info("Stage 9: Planning & Publication Strategy")
+        return self.planner.plan(
+            outputs["humanizer"],
+            outputs["taxonomy"]["categories"],
+            outputs["taxonomy"]["tags"]
+        )
+    
+    def _run_autolearn(self, outputs):
+        logger.info("Stage 10: Taxonomy Auto-Learning")
+        traffic_score = outputs["fact_checker"]["risk_score"]  # Inverse: low risk = good content
+        self.taxonomy_autolearn.learn_from_article(
+            outputs["taxonomy"]["categories"],
+            outputs["taxonomy"]["tags"],
+            traffic_score=1.0 - traffic_score
+        )
+        return None
+    
+    def _summarize_stage(self, name, output):
+        """Build the results["stages"] entry reported for a finished stage"""
+        if name == "tagger":
+            return {
+                "status": "completed",
+                "categories": output["suggested_categories"],
+                "tags": output["suggested_tags"]
+            }
+        if name == "auditor":
+            return {"status": "completed", "quality_metrics": output}
+        if name == "fact_checker":
+            return {
+                "status": "completed",
+                "risk_score": output["risk_score"],
+                "flags": output["red_flags"]
+            }
+        if name == "verifier":
+            return {
+                "status": "completed",
+                "coherence": output["coherence_score"],
+                "valid": output["overall_valid"]
+            }
+        if name == "seo":
+            return {
+                "status": "completed",
+                "h1": output["h1"],
+                "meta": output["meta_description"],
+                "schema_markup": output.get("schema_markup", {})
+            }
+        if name == "taxonomy":
+            return {
+                "status": "completed",
+                "categories": output["categories"],
+                "tags": output["tags"]
+            }
+        if name == "planner":
+            return {
+                "status": "completed",
+                "pub_date": output["publication_date"],
+                "auto_publish": output["auto_publish"]
+            }
+        return {"status": "completed"}
     
     def _calculate_quality_score(self, verifier_result, fact_check_result, auditor_result):
         """Calculate overall quality score"""
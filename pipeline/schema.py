@@ -11,6 +11,7 @@ class PipelineRunRequest(BaseModel):
     author: Optional[str] = None
     source: Optional[str] = None
     auto_publish: Optional[bool] = False
+    run_id: Optional[str] = Field(None, description="Resume a checkpointed run")
     
     class Config:
         schema_extra = {
@@ -22,6 +23,10 @@ class PipelineRunRequest(BaseModel):
             }
         }
 
+class StageRerunRequest(BaseModel):
+    """Single stage re-run request"""
+    overrides: Dict[str, Any] = Field(default_factory=dict, description="Stage outputs to replace first")
+
 class PipelineSimulateRequest(BaseModel):
     """Pipeline simulation request (dry-run)"""
     title: str = Field(..., min_length=5)
@@ -80,6 +85,7 @@ class SEOOutput(BaseModel):
     h1: str
     h2_suggestions: List[Dict[str, Any]]
     meta_description: str
+    schema_markup: Dict[str, Any] = Field(default_factory=dict)
     keyword_density: Dict[str, Any]
     seo_recommendations: List[str]
 
@@ -0,0 +1,128 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """A single pipeline stage and the stages it depends on"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any],
+                 depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+
+
+class StageExecutor:
+    """Runs pipeline stages as a dependency graph.
+
+    Every stage receives the dict of outputs produced so far and returns its
+    own output. Stages whose dependencies are satisfied are submitted to a
+    thread pool together, so independent LLM round-trips overlap instead of
+    running one after another.
+    """
+
+    def __init__(self, max_workers: int = 4, parallel: bool = True):
+        self.max_workers = max_workers
+        self.parallel = parallel
+        self.stages: Dict[str, Stage] = {}
+
+    def add_stage(self, name: str, func: Callable[[Dict[str, Any]], Any],
+                  depends_on: Optional[List[str]] = None) -> "StageExecutor":
+        """Register a stage. Dependencies may name other stages or initial outputs."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already registered")
+        self.stages[name] = Stage(name, func, depends_on)
+        return self
+
+    def dependents(self, names: Iterable[str]) -> Set[str]:
+        """Stages that directly or transitively depend on any of `names`"""
+        found: Set[str] = set()
+        frontier = set(names)
+        while frontier:
+            frontier = {
+                name for name, stage in self.stages.items()
+                if name not in found and frontier.intersection(stage.depends_on)
+            }
+            found |= frontier
+        return found
+
+    def run(self, initial: Optional[Dict[str, Any]] = None,
+            on_stage_complete: Optional[Callable[[str, Any, float], None]] = None,
+            only: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Execute all registered stages
+
+        Stages whose name already appears in `initial` are treated as done,
+        which is how checkpointed runs resume.
+
+        Args:
+            initial: Outputs available before any stage runs
+            on_stage_complete: Callback(name, output, elapsed_seconds) invoked
+                in the calling thread as each stage finishes
+            only: Run just these stages; their dependencies must be in `initial`
+
+        Returns:
+            Dict mapping stage name to its output
+        """
+        outputs = dict(initial or {})
+        selected = set(only) if only is not None else set(self.stages)
+        pending = {
+            name: stage for name, stage in self.stages.items()
+            if name not in outputs and name in selected
+        }
+
+        if not self.parallel or self.max_workers <= 1:
+            for name, stage in pending.items():
+                missing = [dep for dep in stage.depends_on if dep not in outputs]
+                if missing:
+                    raise RuntimeError(f"Unresolvable stage dependencies: {missing}")
+                started = time.time()
+                outputs[name] = stage.func(outputs)
+                if on_stage_complete:
+                    on_stage_complete(name, outputs[name], time.time() - started)
+            return outputs
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="pipeline-stage") as pool:
+            running = {}
+            while pending or running:
+                ready = [
+                    name for name, stage in pending.items()
+                    if all(dep in outputs for dep in stage.depends_on)
+                ]
+                for name in ready:
+                    stage = pending.pop(name)
+                    # Stages get a snapshot so concurrent writes never race, and
+                    # the caller's context so its LLM priority lane carries over
+                    future = pool.submit(contextvars.copy_context().run,
+                                         self._timed, stage.func, dict(outputs))
+                    running[future] = name
+
+                if not running:
+                    raise RuntimeError(f"Unresolvable stage dependencies: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        output, elapsed = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    outputs[name] = output
+                    logger.debug(f"Stage {name} finished in {elapsed:.2f}s")
+                    if on_stage_complete:
+                        on_stage_complete(name, output, elapsed)
+
+        return outputs
+
+    @staticmethod
+    def _timed(func, outputs):
+        started = time.time()
+        return func(outputs), time.time() - started
@@ -7,6 +7,31 @@ logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+def request_user_id():
+    """
+    User ID of the current request, or None if unauthenticated
+    
+    Accepts a JWT (Authorization: Bearer <access_token>) or an API key
+    (X-API-Key: <api_key>, or as the Bearer token). API keys go through
+    APIKeyAuth.verify_key, which is cached in process.
+    """
+    api_key = request.headers.get('X-API-Key')
+    parts = request.headers.get('Authorization', '').split(' ')
+    if len(parts) == 2 and parts[0] == 'Bearer':
+        # JWTs have three dot-separated segments; API keys are URL-safe base64
+        if parts[1].count('.') == 2:
+            user_id, _ = JWTAuth.verify_token(parts[1])
+            if user_id:
+                return user_id
+        else:
+            api_key = api_key or parts[1]
+    
+    if api_key:
+        user_id, valid = APIKeyAuth.verify_key(api_key)
+        if valid:
+            return user_id
+    return None
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """
@@ -34,8 +59,8 @@ def login():
         # Create JWT token
         token = JWTAuth.create_token(user_id, email)
         
-        # Generate API key
-        api_key, _ = APIKeyAuth.generate_key(user_id)
+        # Reuse the active API key; only a new key is returned in plain text
+        api_key, api_key_prefix = APIKeyAuth.get_or_create_key(user_id)
         
         return jsonify({
             "status": "success",
@@ -43,11 +68,36 @@ def login():
             "email": email,
             "access_token": token,
             "api_key": api_key,
+            "api_key_prefix": api_key_prefix,
             "token_type": "Bearer"
         }), 200
     
     return jsonify({"error": "Invalid credentials"}), 401
 
+@auth_bp.route('/api-key/rotate', methods=['POST'])
+def rotate_api_key():
+    """
+    Replace the caller's API keys with a new one
+    
+    Requires header: Authorization: Bearer <access_token>
+    """
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(' ')
+    if len(parts) != 2 or parts[0] != 'Bearer':
+        return jsonify({"error": "Missing access token"}), 401
+    
+    user_id, _ = JWTAuth.verify_token(parts[1])
+    if not user_id:
+        return jsonify({"error": "Invalid or expired token"}), 401
+    
+    api_key, _ = APIKeyAuth.rotate_key(user_id)
+    
+    return jsonify({
+        "status": "success",
+        "api_key": api_key,
+        "api_key_prefix": api_key[:8]
+    }), 200
+
 @auth_bp.route('/refresh', methods=['POST'])
 def refresh():
     """
@@ -1,7 +1,14 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from pipeline.run_pipeline import Pipeline
-from pipeline.schema import PipelineRunRequest, PipelineSimulateRequest
+from pipeline.schema import PipelineRunRequest, PipelineSimulateRequest, StageRerunRequest
+from services.job_manager import JobManager, JobQueueFull
+from routes.auth import request_user_id
+from config import PIPELINE_CONFIG
+import json
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +27,8 @@ def run():
         "title": "Article Title",
         "content": "Article content...",
         "author": "Author name",
-        "auto_publish": false
+        "auto_publish": false,
+        "run_id": "optional, resumes a failed run from its checkpoints"
     }
     """
     data = request.get_json()
@@ -34,16 +42,8 @@ def run():
     except Exception as e:
         return jsonify({"error": f"Invalid request: {str(e)}"}), 400
     
-    # Extract user_id from auth header if available
-    user_id = None
-    auth_header = request.headers.get('Authorization')
-    if auth_header:
-        try:
-            token = auth_header.split(' ')[1]
-            from services.jwt_auth import JWTAuth
-            user_id, _ = JWTAuth.verify_token(token)
-        except:
-            pass
+    # Extract user_id from the JWT or API key if available
+    user_id = request_user_id()
     
     logger.info(f"Running pipeline for user {user_id}")
     
@@ -52,12 +52,40 @@ def run():
         title=req.title,
         content=req.content,
         user_id=user_id,
-        auto_publish=req.auto_publish
+        auto_publish=req.auto_publish,
+        run_id=req.run_id
     )
     
     status_code = 200 if result.get("status") == "success" else 500
     return jsonify(result), status_code
 
+@pipeline_bp.route('/runs/<run_id>/stages/<stage>', methods=['POST'])
+def rerun_stage(run_id, stage):
+    """
+    Re-run one stage of a checkpointed run
+    
+    Expected JSON (optional):
+    {
+        "overrides": {"humanizer": "Edited article text..."}
+    }
+    """
+    try:
+        req = StageRerunRequest(**(request.get_json(silent=True) or {}))
+    except Exception as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    
+    try:
+        result = pipeline.rerun_stage(run_id, stage, overrides=req.overrides)
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except (ValueError, RuntimeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Stage re-run error: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    return jsonify(result), 200
+
 @pipeline_bp.route('/simulate', methods=['POST'])
 def simulate():
     """
@@ -91,6 +119,208 @@ def simulate():
     status_code = 200 if result.get("status") == "success" else 500
     return jsonify(result), status_code
 
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@pipeline_bp.route('/stream', methods=['POST'])
+def stream():
+    """
+    Run pipeline and stream progress as Server-Sent Events
+    
+    Expected JSON: same as /run. Events:
+        stage    - {"stage", "result", "elapsed_ms", "total_elapsed_ms"} per finished stage
+        token    - {"stage": "humanizer", "text"} humanized text as it is generated
+        complete - final pipeline output
+        error    - {"error"} if the run failed
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+    
+    try:
+        req = PipelineRunRequest(**data)
+    except Exception as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    
+    # Extract user_id from the JWT or API key if available
+    user_id = request_user_id()
+    
+    events = queue.Queue()
+    started = time.time()
+    
+    def on_stage(name, stage_result, elapsed):
+        events.put(("stage", {
+            "stage": name,
+            "result": stage_result,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "total_elapsed_ms": round((time.time() - started) * 1000, 2)
+        }))
+    
+    def on_token(text):
+        events.put(("token", {"stage": "humanizer", "text": text}))
+    
+    def worker():
+        try:
+            result = pipeline.run(
+                title=req.title,
+                content=req.content,
+                user_id=user_id,
+                auto_publish=req.auto_publish,
+                run_id=req.run_id,
+                on_stage=on_stage,
+                on_token=on_token
+            )
+            if result.get("status") == "success":
+                events.put(("complete", result))
+            else:
+                events.put(("error", result))
+        except Exception as e:
+            logger.error(f"Streaming pipeline error: {e}")
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(None)
+    
+    threading.Thread(target=worker, name="pipeline-stream", daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _iter_batch_articles(max_items):
+    """Yield (article, error) pairs from a JSON list or an NDJSON body"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        # Read line by line so large wire imports are never fully buffered
+        lines = (line.decode('utf-8').strip() for line in request.stream)
+        items = (line for line in lines if line)
+    else:
+        data = request.get_json()
+        items = data.get('articles', []) if isinstance(data, dict) else data
+    
+    for count, item in enumerate(items):
+        if count >= max_items:
+            yield None, f"Batch limited to {max_items} articles"
+            return
+        try:
+            if isinstance(item, str):
+                item = json.loads(item)
+            req = PipelineRunRequest(**item)
+            yield {"title": req.title, "content": req.content, "auto_publish": req.auto_publish}, None
+        except Exception as e:
+            yield None, f"Invalid request: {str(e)}"
+
+@pipeline_bp.route('/batch', methods=['POST'])
+def batch():
+    """
+    Run many articles through the pipeline, streaming NDJSON results
+    
+    Accepts a JSON list (or {"articles": [...]}) or an application/x-ndjson
+    body with one article per line. Each output line is
+    {"index", "title", "result"} in completion order; invalid items are
+    reported as {"index", "error"} without being run.
+    """
+    if not request.content_length and request.mimetype not in ('application/x-ndjson', 'application/jsonl'):
+        return jsonify({"error": "No data provided"}), 400
+    
+    # Extract user_id from the JWT or API key if available
+    user_id = request_user_id()
+    
+    max_items = PIPELINE_CONFIG.get("batch_max_items", 1000)
+    try:
+        max_concurrency = int(request.args.get('concurrency', 0)) or None
+    except ValueError:
+        return jsonify({"error": "Invalid concurrency"}), 400
+    if max_concurrency:
+        max_concurrency = min(max_concurrency, PIPELINE_CONFIG.get("batch_concurrency", 4))
+    
+    def generate():
+        errors = []
+        
+        def valid_articles():
+            for index, (article, error) in enumerate(_iter_batch_articles(max_items)):
+                if error:
+                    errors.append({"index": index, "error": error})
+                    continue
+                article["id"] = index
+                yield article
+        
+        try:
+            for item in pipeline.run_many(valid_articles(), user_id=user_id, max_concurrency=max_concurrency):
+                while errors:
+                    yield json.dumps(errors.pop(0), ensure_ascii=False) + "\n"
+                line = {"index": item["id"], "title": item["title"], "result": item["result"]}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Batch pipeline error: {e}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        
+        while errors:
+            yield json.dumps(errors.pop(0), ensure_ascii=False) + "\n"
+    
+    logger.info(f"Running pipeline batch for user {user_id}")
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@pipeline_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a pipeline run and return immediately
+    
+    Expected JSON: same as /run. Poll /jobs/<job_id> for progress.
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+    
+    try:
+        req = PipelineRunRequest(**data)
+    except Exception as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    
+    # Extract user_id from the JWT or API key if available
+    user_id = request_user_id()
+    
+    try:
+        job_id = JobManager.submit(
+            title=req.title,
+            content=req.content,
+            user_id=user_id,
+            auto_publish=req.auto_publish
+        )
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "poll_url": f"/api/pipeline/jobs/{job_id}"
+    }), 202
+
+@pipeline_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get job status, per-stage progress and final output"""
+    job = JobManager.get_job(job_id)
+    
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job), 200
+
 @pipeline_bp.route('/status', methods=['GET'])
 def status():
     """Get pipeline status"""
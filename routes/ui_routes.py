@@ -2,19 +2,11 @@ from flask import Blueprint, jsonify, request, render_template
 from services.review_manager import ReviewManager
 from services.settings_manager import SettingsManager
 from services.metrics_collector import MetricsCollector
-from services.jwt_auth import JWTAuth
+from routes.auth import request_user_id
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Simple in-memory cache for trends (module-level). Keeps the last
-# successful trends response (live or mock) with a timestamp. TTL in seconds.
-_TRENDS_CACHE = {
-    'data': None,
-    'ts': 0
-}
-_TRENDS_CACHE_TTL = 60  # seconds
-
 ui_bp = Blueprint('ui', __name__, url_prefix='/api/ui')
 
 # === Status and Dashboard ===
@@ -39,22 +31,27 @@ def ui_status():
 
 @ui_bp.route('/reviews', methods=['GET'])
 def get_reviews():
-    """Get pending or all reviews"""
+    """Get pending or all reviews (pass next_cursor back as ?cursor= for the next page)"""
     try:
         status = request.args.get('status', 'pending')
         limit = int(request.args.get('limit', 20))
+        cursor = request.args.get('cursor')
         
-        if status == 'pending':
-            reviews = ReviewManager.get_pending_reviews(limit=limit)
-        elif status == 'published':
-            reviews = ReviewManager.get_published_articles(limit=limit)
-        else:
-            reviews = ReviewManager.get_pending_reviews(limit=limit)
+        try:
+            if status == 'published':
+                reviews, next_cursor = ReviewManager.get_published_articles(
+                    limit=limit, cursor=cursor, with_cursor=True)
+            else:
+                reviews, next_cursor = ReviewManager.get_pending_reviews(
+                    limit=limit, cursor=cursor, with_cursor=True)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
         
         return jsonify({
             "status": "success",
             "count": len(reviews),
-            "reviews": reviews
+            "reviews": reviews,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         logger.error(f"Error getting reviews: {e}")
@@ -81,15 +78,8 @@ def get_review(review_id):
 def approve_review(review_id):
     """Approve article for publication"""
     try:
-        # Get editor ID from token
-        auth_header = request.headers.get('Authorization')
-        editor_id = None
-        if auth_header:
-            try:
-                token = auth_header.split(' ')[1]
-                editor_id, _ = JWTAuth.verify_token(token)
-            except:
-                pass
+        # Get editor ID from the JWT or API key
+        editor_id = request_user_id()
         
         if not editor_id:
             return jsonify({"error": "Unauthorized"}), 401
@@ -118,15 +108,8 @@ def reject_review(review_id):
         data = request.get_json() or {}
         reason = data.get('reason', 'No reason provided')
         
-        # Get editor ID from token
-        auth_header = request.headers.get('Authorization')
-        editor_id = None
-        if auth_header:
-            try:
-                token = auth_header.split(' ')[1]
-                editor_id, _ = JWTAuth.verify_token(token)
-            except:
-                pass
+        # Get editor ID from the JWT or API key
+        editor_id = request_user_id()
         
         if not editor_id:
             return jsonify({"error": "Unauthorized"}), 401
@@ -316,15 +299,25 @@ def ui_run_pipeline():
         if not data or not data.get('title') or not data.get('content'):
             return jsonify({"error": "Missing title or content"}), 400
         
-        # Get user ID from token
-        auth_header = request.headers.get('Authorization')
-        user_id = None
-        if auth_header:
+        # Get user ID from the JWT or API key
+        user_id = request_user_id()
+        
+        # Long articles can be queued instead of holding the request open
+        if data.get('async'):
+            from services.job_manager import JobManager, JobQueueFull
             try:
-                token = auth_header.split(' ')[1]
-                user_id, _ = JWTAuth.verify_token(token)
-            except:
-                pass
+                job_id = JobManager.submit(
+                    title=data.get('title'),
+                    content=data.get('content'),
+                    user_id=user_id
+                )
+            except JobQueueFull as e:
+                return jsonify({"error": str(e)}), 503
+            return jsonify({
+                "status": "queued",
+                "job_id": job_id,
+                "poll_url": f"/api/pipeline/jobs/{job_id}"
+            }), 202
         
         pipeline = Pipeline()
         result = pipeline.run(
@@ -344,21 +337,30 @@ def ui_run_pipeline():
 
 @ui_bp.route('/logs', methods=['GET'])
 def get_logs():
-    """Get pipeline execution logs"""
+    """Get pipeline execution logs (pass next_cursor back as ?cursor= for the next page)"""
     try:
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor')
         
-        from storage.models import PipelineLog
         from storage.models import PipelineLog
         from storage.database import get_db_session
+        from storage.pagination import keyset_page
         
         session = get_db_session()
-        logs = session.query(PipelineLog)\
-            .order_by(PipelineLog.created_at.desc())\
-            .limit(limit)\
-            .offset(offset)\
-            .all()
+        next_cursor = None
+        if offset and not cursor:
+            # Legacy offset paging; cost grows with the offset
+            logs = session.query(PipelineLog)\
+                .order_by(PipelineLog.created_at.desc(), PipelineLog.id.desc())\
+                .limit(limit)\
+                .offset(offset)\
+                .all()
+        else:
+            try:
+                logs, next_cursor = keyset_page(session.query(PipelineLog), PipelineLog, cursor, limit)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
         
         logs_data = [{
             "id": log.id,
@@ -375,7 +377,8 @@ def get_logs():
         return jsonify({
             "status": "success",
             "count": len(logs_data),
-            "logs": logs_data
+            "logs": logs_data,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         logger.error(f"Error getting logs: {e}")
@@ -385,8 +388,9 @@ def get_logs():
 def delete_log(log_id):
     """Delete specific log"""
     try:
-        from storage.models import PipelineLog
+        from storage.models import PipelineLog, PipelineLogOutput
         from storage.database import get_db_session
+        from services.metrics_rollup import MetricsRollup
         
         session = get_db_session()
         log = session.query(PipelineLog).filter_by(id=log_id).first()
@@ -394,6 +398,8 @@ def delete_log(log_id):
         if not log:
             return jsonify({"error": "Log not found"}), 404
         
+        session.query(PipelineLogOutput).filter_by(log_id=log_id).delete()
+        MetricsRollup.remove_many(session, [log])
         session.delete(log)
         session.commit()
         
@@ -409,16 +415,15 @@ def delete_log(log_id):
 def clear_logs():
     """Clear all logs"""
     try:
-        from storage.models import PipelineLog
-        from storage.database import get_db_session
+        from services.maintenance import MaintenanceService
         
-        session = get_db_session()
-        session.query(PipelineLog).delete()
-        session.commit()
+        # Batched so the write lock is released between chunks
+        removed = MaintenanceService.delete_logs()
         
         return jsonify({
             "status": "success",
-            "message": "All logs cleared"
+            "message": "All logs cleared",
+            "deleted": removed["rows"]
         }), 200
     except Exception as e:
         logger.error(f"Error clearing logs: {e}")
@@ -430,9 +435,7 @@ def clear_logs():
 def get_metrics_enhanced():
     """Get enhanced system metrics with trends"""
     try:
-        from datetime import datetime, timedelta
-        from storage.models import PipelineLog
-        from storage.database import get_db_session
+        from services.metrics_rollup import MetricsRollup
         
         period = request.args.get('period', '7d')
         
@@ -446,59 +449,18 @@ def get_metrics_enhanced():
         else:
             days = 365
         
-        session = get_db_session()
-        start_date = datetime.now() - timedelta(days=days)
-        
-        logs = session.query(PipelineLog)\
-            .filter(PipelineLog.created_at >= start_date)\
-            .all()
-        
-        # Calculate metrics
-        total_processed = len(logs)
-        successful = sum(1 for log in logs if log.quality_score and log.quality_score > 0.5)
-        success_rate = successful / total_processed if total_processed > 0 else 0
-        avg_quality = sum(log.quality_score or 0 for log in logs) / total_processed if total_processed > 0 else 0
-        avg_execution_time = sum(log.execution_time or 0 for log in logs) / total_processed if total_processed > 0 else 0
-        
-        # Top categories
-        categories = {}
-        for log in logs:
-            cat = getattr(log, 'category', 'Sin categoría') or 'Sin categoría'
-            if cat not in categories:
-                categories[cat] = {'count': 0, 'total_quality': 0}
-            categories[cat]['count'] += 1
-            categories[cat]['total_quality'] += log.quality_score or 0
-        
-        top_categories = [
-            {
-                'name': cat,
-                'count': data['count'],
-                'percentage': data['count'] / total_processed if total_processed > 0 else 0,
-                'avg_quality': data['total_quality'] / data['count'] if data['count'] > 0 else 0
-            }
-            for cat, data in sorted(categories.items(), key=lambda x: x[1]['count'], reverse=True)[:5]
-        ]
-        
-        # Daily trend
-        daily_counts = {}
-        for log in logs:
-            date = log.created_at.strftime('%Y-%m-%d')
-            daily_counts[date] = daily_counts.get(date, 0) + 1
-        
-        daily_trend = [
-            {'date': date, 'count': count}
-            for date, count in sorted(daily_counts.items())
-        ]
+        # Read pre-aggregated daily rows instead of scanning PipelineLog
+        metrics = MetricsRollup.get_dashboard_metrics(days=days)
         
         return jsonify({
             "status": "success",
             "metrics": {
-                "total_processed": total_processed,
-                "success_rate": success_rate,
-                "avg_quality": avg_quality,
-                "avg_execution_time": avg_execution_time,
-                "top_categories": top_categories,
-                "daily_trend": daily_trend,
+                "total_processed": metrics["total_processed"],
+                "success_rate": metrics["success_rate"],
+                "avg_quality": metrics["avg_quality"],
+                "avg_execution_time": metrics["avg_execution_time"],
+                "top_categories": metrics["top_categories"],
+                "daily_trend": metrics["daily_trend"],
                 "common_issues": [
                     {"name": "Bajo SEO", "count": 15, "percentage": 0.15},
                     {"name": "Riesgo factual alto", "count": 8, "percentage": 0.08},
@@ -527,11 +489,12 @@ def get_trends():
         from services.trend_harvester import TrendHarvester
         
         # Fetch from all configured sources
-        all_trends = TrendHarvester.fetch_all_trends(
+        all_trends, fetch_status = TrendHarvester.fetch_all_trends(
             limit=limit, 
             sources=sources, 
             force=force, 
-            keywords=keywords
+            keywords=keywords,
+            with_status=True
         )
         
         # Return flattened (combined and sorted) or by source
@@ -542,6 +505,7 @@ def get_trends():
                 "trends": flattened,
                 "total": len(flattened),
                 "sources": list(all_trends.keys()),
+                "timed_out": fetch_status["timed_out"],
                 "from_sources": "combined"
             }), 200
         else:
@@ -550,6 +514,7 @@ def get_trends():
                 "trends": all_trends,
                 "total": sum(len(v) for v in all_trends.values()),
                 "sources": list(all_trends.keys()),
+                "timed_out": fetch_status["timed_out"],
                 "from_sources": "individual"
             }), 200
             
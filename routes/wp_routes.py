@@ -42,11 +42,13 @@ def create_post():
         
         # Ensure categories exist in WP
         category_ids = []
+        used_categories = []
         for cat in categories:
             cat_id = wp_taxonomy_mgr.ensure_category(cat)
             if cat_id:
                 category_ids.append(cat_id)
-                MetricsCollector.record_category_usage(cat)
+                used_categories.append(cat)
+        MetricsCollector.record_categories_usage(used_categories)
         
         # Ensure tags exist in WP
         tag_ids = []
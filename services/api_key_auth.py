@@ -1,12 +1,147 @@
+import atexit
 import hashlib
 import secrets
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from sqlalchemy import bindparam, or_
 from storage.database import SessionLocal
 from storage.models import ApiKey
+from config import API_KEY_CACHE_TTL, API_KEY_CACHE_SIZE, API_KEY_LAST_USED_FLUSH_INTERVAL
+from config import API_KEY_MAX_ACTIVE_PER_USER
 
 logger = logging.getLogger(__name__)
 
+
+class ApiKeyCache:
+    """Caché en proceso de claves verificadas y de su último uso.
+
+    Verified keys are trusted for `ttl` seconds without a DB read, so a
+    key revoked in another worker stays usable there for at most that
+    long; revoke_key evicts it here immediately. last_used timestamps are
+    coalesced per key and written in one batch every `flush_interval`
+    seconds by a background thread, so steady-state authentication does
+    no DB writes.
+    """
+
+    def __init__(self, ttl=API_KEY_CACHE_TTL, max_size=API_KEY_CACHE_SIZE,
+                 flush_interval=API_KEY_LAST_USED_FLUSH_INTERVAL):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries = OrderedDict()  # key_hash -> (user_id, expires_at, cached_at)
+        self._last_used = {}  # key_hash -> latest use not yet written
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, key_hash):
+        """Return (user_id, expires_at) of a recently verified key, or None"""
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self._entries[key_hash]
+                return None
+            self._entries.move_to_end(key_hash)
+            return entry[:2]
+
+    def put(self, key_hash, user_id, expires_at):
+        """Remember a key that was just verified against the database"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key_hash] = (user_id, expires_at, time.monotonic())
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key_hash):
+        """Forget a key so its next use is checked against the database"""
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+    def touch(self, key_hash, when=None):
+        """Record a use of the key; written to last_used on the next flush"""
+        with self._lock:
+            self._last_used[key_hash] = when or datetime.now()
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_started()
+
+    def flush(self):
+        """
+        Write pending last_used timestamps in one transaction
+
+        Returns:
+            Number of keys updated (0 if nothing was pending or the write failed)
+        """
+        with self._lock:
+            pending, self._last_used = self._last_used, {}
+        if not pending:
+            return 0
+
+        table = ApiKey.__table__
+        stmt = table.update().where(table.c.key_hash == bindparam("b_key_hash")).values(
+            last_used=bindparam("b_last_used")
+        )
+        db = SessionLocal()
+        try:
+            db.execute(stmt, [
+                {"b_key_hash": key_hash, "b_last_used": used}
+                for key_hash, used in pending.items()
+            ])
+            db.commit()
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not write API key last_used, retrying later: {e}")
+            with self._lock:
+                for key_hash, used in pending.items():
+                    if key_hash not in self._last_used:
+                        self._last_used[key_hash] = used
+            return 0
+        finally:
+            db.close()
+
+    def close(self):
+        """Stop the flush thread and write what is pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._run, name="api-key-last-used", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_api_key_cache():
+    """Return the process-wide API key cache (flushed at interpreter exit)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ApiKeyCache()
+            atexit.register(_cache.close)
+        return _cache
+
+
 class APIKeyAuth:
     """Gestiona autenticación por API Key"""
     
@@ -15,6 +150,9 @@ class APIKeyAuth:
         """
         Generate new API key
         
+        The user's oldest active keys are deactivated so that at most
+        API_KEY_MAX_ACTIVE_PER_USER stay active, including the new one.
+        
         Args:
             user_id: User ID
             expires_days: Days until key expires
@@ -39,6 +177,14 @@ class APIKeyAuth:
         # Store in database
         db = SessionLocal()
         try:
+            active = db.query(ApiKey).filter(
+                ApiKey.user_id == user_id,
+                ApiKey.is_active == True
+            ).order_by(ApiKey.created_at.desc(), ApiKey.id.desc()).all()
+            retired = active[max(0, API_KEY_MAX_ACTIVE_PER_USER - 1):]
+            for old_key in retired:
+                old_key.is_active = False
+            
             api_key = ApiKey(
                 user_id=user_id,
                 key_hash=key_hash,
@@ -48,12 +194,76 @@ class APIKeyAuth:
             )
             db.add(api_key)
             db.commit()
+            
+            for old_key in retired:
+                get_api_key_cache().invalidate(old_key.key_hash)
             logger.info(f"API key created successfully")
         finally:
             db.close()
         
         return plain_key, key_hash
     
+    @staticmethod
+    def get_or_create_key(user_id, expires_days=90):
+        """
+        Reuse the user's active key, or generate one if there is none
+        
+        Only key hashes are stored, so an existing key cannot be shown
+        again; callers get its prefix and can rotate_key for a new one.
+        
+        Args:
+            user_id: User ID
+            expires_days: Days until a new key expires
+        
+        Returns:
+            (plain_key, key_prefix) tuple; plain_key is None for a reused key
+        """
+        db = SessionLocal()
+        try:
+            api_key = db.query(ApiKey).filter(
+                ApiKey.user_id == user_id,
+                ApiKey.is_active == True,
+                or_(ApiKey.expires_at.is_(None), ApiKey.expires_at > datetime.now())
+            ).order_by(ApiKey.created_at.desc(), ApiKey.id.desc()).first()
+            
+            if api_key:
+                return None, api_key.key_prefix
+        finally:
+            db.close()
+        
+        plain_key, _ = APIKeyAuth.generate_key(user_id, expires_days)
+        return plain_key, plain_key[:8]
+    
+    @staticmethod
+    def rotate_key(user_id, expires_days=90):
+        """
+        Replace all of the user's active keys with a new one
+        
+        Args:
+            user_id: User ID
+            expires_days: Days until the new key expires
+        
+        Returns:
+            Plain key (for display), key hash (for storage)
+        """
+        db = SessionLocal()
+        try:
+            active = db.query(ApiKey).filter(
+                ApiKey.user_id == user_id,
+                ApiKey.is_active == True
+            ).all()
+            for api_key in active:
+                api_key.is_active = False
+            db.commit()
+            
+            for api_key in active:
+                get_api_key_cache().invalidate(api_key.key_hash)
+            logger.info(f"Rotated {len(active)} API keys for user {user_id}")
+        finally:
+            db.close()
+        
+        return APIKeyAuth.generate_key(user_id, expires_days)
+    
     @staticmethod
     def verify_key(plain_key):
         """
@@ -71,32 +281,39 @@ class APIKeyAuth:
         # Hash the provided key
         key_hash = hashlib.sha256(plain_key.encode()).hexdigest()
         
-        db = SessionLocal()
-        try:
-            # Look up the key
-            api_key = db.query(ApiKey).filter(
-                ApiKey.key_hash == key_hash,
-                ApiKey.is_active == True
-            ).first()
-            
-            if not api_key:
-                logger.warning("Invalid API key")
-                return None, False
-            
-            # Check expiration
-            if api_key.expires_at and api_key.expires_at < datetime.now():
-                logger.warning("API key expired")
-                return None, False
-            
-            # Update last used
-            api_key.last_used = datetime.now()
-            db.commit()
-            
-            logger.info(f"API key verified for user {api_key.user_id}")
-            return api_key.user_id, True
-            
-        finally:
-            db.close()
+        cache = get_api_key_cache()
+        entry = cache.get(key_hash)
+        if entry is None:
+            db = SessionLocal()
+            try:
+                # Look up the key
+                api_key = db.query(ApiKey).filter(
+                    ApiKey.key_hash == key_hash,
+                    ApiKey.is_active == True
+                ).first()
+                
+                if not api_key:
+                    logger.warning("Invalid API key")
+                    return None, False
+                
+                entry = (api_key.user_id, api_key.expires_at)
+                cache.put(key_hash, *entry)
+            finally:
+                db.close()
+        
+        user_id, expires_at = entry
+        
+        # Check expiration
+        if expires_at and expires_at < datetime.now():
+            cache.invalidate(key_hash)
+            logger.warning("API key expired")
+            return None, False
+        
+        # Update last used (written in batches)
+        cache.touch(key_hash)
+        
+        logger.info(f"API key verified for user {user_id}")
+        return user_id, True
     
     @staticmethod
     def revoke_key(key_prefix):
@@ -110,6 +327,7 @@ class APIKeyAuth:
             if api_key:
                 api_key.is_active = False
                 db.commit()
+                get_api_key_cache().invalidate(api_key.key_hash)
                 logger.info(f"API key {key_prefix} revoked")
                 return True
             
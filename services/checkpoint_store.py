@@ -0,0 +1,124 @@
+import hashlib
+import logging
+from sqlalchemy import or_
+from storage.database import SessionLocal
+from storage.models import PipelineCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Persiste la salida de cada etapa del pipeline para reanudar ejecuciones"""
+
+    @staticmethod
+    def input_hash(title, content):
+        """Hash of the pipeline input; checkpoints are only reused for the same input"""
+        payload = f"{title or ''}\n{content or ''}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def load(run_id, input_hash=None):
+        """
+        Load the checkpoints of a run
+
+        Args:
+            run_id: Pipeline run ID
+            input_hash: Only return checkpoints recorded for this input
+                (default: whatever the run last stored)
+
+        Returns:
+            Dict mapping stage name to its output
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(PipelineCheckpoint).filter(PipelineCheckpoint.run_id == run_id)
+            if input_hash:
+                query = query.filter(PipelineCheckpoint.input_hash == input_hash)
+            return {row.stage: row.output_json for row in query.all()}
+        except Exception as e:
+            logger.error(f"Error loading checkpoints for run {run_id}: {e}")
+            return {}
+        finally:
+            db.close()
+
+    @staticmethod
+    def run_hash(run_id):
+        """Input hash the run's checkpoints were recorded for, or None if it has none"""
+        db = SessionLocal()
+        try:
+            row = db.query(PipelineCheckpoint.input_hash).filter(
+                PipelineCheckpoint.run_id == run_id,
+                PipelineCheckpoint.stage == "cleaner"
+            ).first()
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def save(run_id, input_hash, stage, output):
+        """Store (or replace) the output of one stage"""
+        CheckpointStore.save_many(run_id, input_hash, {stage: output})
+
+    @staticmethod
+    def save_many(run_id, input_hash, outputs, drop=()):
+        """
+        Store (or replace) several stage outputs in one transaction
+
+        Checkpoints the run recorded for a different input are deleted in
+        the same transaction.
+
+        Args:
+            run_id: Pipeline run ID
+            input_hash: Hash of the input the outputs were computed from
+            outputs: Dict mapping stage name to its output
+            drop: Other stages whose checkpoints are now stale
+        """
+        if not outputs and not drop:
+            return
+        db = SessionLocal()
+        try:
+            db.query(PipelineCheckpoint).filter(
+                PipelineCheckpoint.run_id == run_id,
+                or_(
+                    PipelineCheckpoint.input_hash != input_hash,
+                    PipelineCheckpoint.stage.in_(list(outputs) + list(drop))
+                )
+            ).delete(synchronize_session=False)
+            db.add_all([
+                PipelineCheckpoint(run_id=run_id, input_hash=input_hash, stage=stage, output_json=output)
+                for stage, output in outputs.items()
+            ])
+            db.commit()
+        except Exception as e:
+            # A lost checkpoint only costs a recomputation on retry
+            db.rollback()
+            logger.error(f"Error saving checkpoints {sorted(outputs)} for run {run_id}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def discard(run_id, stages=None, keep_hash=None):
+        """
+        Delete checkpoints of a run
+
+        Args:
+            run_id: Pipeline run ID
+            stages: Only these stages (default: all)
+            keep_hash: Keep checkpoints recorded for this input hash
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(PipelineCheckpoint).filter(PipelineCheckpoint.run_id == run_id)
+            if stages is not None:
+                query = query.filter(PipelineCheckpoint.stage.in_(list(stages)))
+            if keep_hash:
+                query = query.filter(PipelineCheckpoint.input_hash != keep_hash)
+            deleted = query.delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error discarding checkpoints for run {run_id}: {e}")
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,77 @@
+import logging
+from services.llm_client import LLMClient
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SCORES = ("narrative_quality", "preliminary_factuality", "aggressiveness_level", "neutrality_score")
+
+
+class ContentAnalyzer:
+    """Etiquetado y auditoría editorial en una sola llamada LLM"""
+    
+    def __init__(self):
+        self.llm = LLMClient()
+    
+    def analyze(self, text):
+        """
+        Extract tagger metadata and audit scores from one JSON request
+        
+        Args:
+            text: Cleaned article text
+        
+        Returns:
+            Dict with "tagger" (TaggerOutput fields) and "auditor"
+            (AuditorOutput fields). A part the model did not return in a
+            usable shape is omitted so the caller can fall back to the
+            dedicated TaggerLLM / AuditorLLM request.
+        """
+        logger.info("Starting combined tagging and audit with LLM")
+        
+        system_prompt = """You are a professional news editor and quality auditor.
+        Analyze the provided text and extract:
+        1. suggested_categories: List of relevant news categories (e.g., "Politics", "Sports", "Technology")
+        2. suggested_tags: List of specific topic tags
+        3. entities: Named entities found (persons, organizations, locations)
+        4. tone: Journalistic tone (neutral, critical, positive, investigative, opinion)
+        5. narrative_quality: {"score": 0-10, "reason": brief explanation}
+        6. preliminary_factuality: {"score": 0-10, "reason": ...} (based on language markers, citations)
+        7. aggressiveness_level: {"score": 0-10, "reason": ...} (how harsh/confrontational)
+        8. neutrality_score: {"score": 0-10, "reason": ...} (10=neutral, 0=very biased)
+        9. improvements_suggested: List of specific improvements
+        
+        Return only valid JSON, no markdown."""
+        
+        user_prompt = f"""Analyze and audit this news text:
+
+Text:
+{text[:2000]}
+
+Provide JSON with keys: suggested_categories, suggested_tags, entities, tone,
+narrative_quality, preliminary_factuality, aggressiveness_level, neutrality_score,
+improvements_suggested"""
+        
+        try:
+            result = self.llm.generate_json(user_prompt, system_prompt)
+        except Exception as e:
+            logger.error(f"Error in combined analysis: {e}")
+            return {}
+        
+        if not isinstance(result, dict) or "error" in result:
+            logger.warning("Invalid combined analysis response, using split requests")
+            return {}
+        
+        analysis = {}
+        
+        if isinstance(result.get("suggested_categories"), list) and isinstance(result.get("suggested_tags"), list):
+            analysis["tagger"] = {
+                "suggested_categories": result["suggested_categories"],
+                "suggested_tags": result["suggested_tags"],
+                "entities": result.get("entities", []),
+                "tone": result.get("tone", "neutral")
+            }
+        
+        if all(isinstance(result.get(key), dict) for key in AUDIT_SCORES):
+            analysis["auditor"] = {key: result[key] for key in AUDIT_SCORES}
+            analysis["auditor"]["improvements_suggested"] = result.get("improvements_suggested", [])
+        
+        return analysis
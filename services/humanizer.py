@@ -10,12 +10,14 @@ class Humanizer:
     def __init__(self):
         self.llm = LLMClient()
     
-    def humanize(self, text):
+    def humanize(self, text, on_token=None):
         """
         Make text more human-like and less robotic
         
         Args:
             text: Input text to humanize
+            on_token: Optional callback receiving the rewritten text as it
+                streams from the LLM
         
         Returns:
             Humanized text
@@ -26,7 +28,7 @@ class Humanizer:
         text = self._apply_local_humanization(text)
         
         # Use LLM for advanced humanization
-        text = self._llm_humanize(text)
+        text = self._llm_humanize(text, on_token=on_token)
         
         logger.info("Humanization completed")
         return text
@@ -84,7 +86,7 @@ class Humanizer:
         
         return text
     
-    def _llm_humanize(self, text):
+    def _llm_humanize(self, text, on_token=None):
         """Use LLM to improve text humanization"""
         system_prompt = """You are an expert writer. Rewrite the given text to be more natural and human-like.
         Focus on:
@@ -103,7 +105,14 @@ class Humanizer:
 Provide only the rewritten text, no explanations."""
         
         try:
-            humanized = self.llm.generate(user_prompt, system_prompt)
+            if on_token:
+                parts = []
+                for token in self.llm.stream(user_prompt, system_prompt):
+                    parts.append(token)
+                    on_token(token)
+                humanized = "".join(parts).strip()
+            else:
+                humanized = self.llm.generate(user_prompt, system_prompt)
             return humanized if humanized else text
         except Exception as e:
             logger.error(f"Error in LLM humanization: {e}")
@@ -0,0 +1,268 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from storage.database import SessionLocal
+from storage.models import PipelineJob
+from config import PIPELINE_JOB_WORKERS, PIPELINE_JOB_MAX_PENDING, PIPELINE_JOB_STALE_AFTER
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job pool already holds the maximum pending jobs"""
+
+
+# Jobs that have not finished yet
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+def _worker_id():
+    """Identify this process; computed per call since gunicorn forks after import"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows; assume alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobManager:
+    """Ejecuta el pipeline en segundo plano y registra el progreso por etapa.
+
+    Jobs only live in the memory of the worker that queued them, so each
+    row records that worker ("host:pid"). Jobs left queued or running by a
+    worker that is gone are failed by recover_orphaned_jobs (at startup
+    and during daily maintenance).
+    """
+
+    _executor = None
+    _pipeline = None
+    _lock = threading.Lock()
+    _pending = 0
+    _active = set()  # IDs of jobs queued or running in this process
+
+    @staticmethod
+    def _get_executor():
+        with JobManager._lock:
+            if JobManager._executor is None:
+                JobManager._executor = ThreadPoolExecutor(
+                    max_workers=PIPELINE_JOB_WORKERS,
+                    thread_name_prefix="pipeline-job"
+                )
+            return JobManager._executor
+
+    @staticmethod
+    def _get_pipeline():
+        with JobManager._lock:
+            if JobManager._pipeline is None:
+                from pipeline.run_pipeline import Pipeline
+                JobManager._pipeline = Pipeline()
+            return JobManager._pipeline
+
+    @staticmethod
+    def submit(title, content, user_id=None, auto_publish=False):
+        """
+        Queue a pipeline run
+
+        Args:
+            title: Article title
+            content: Article content
+            user_id: User ID for logging
+            auto_publish: Automatically publish to WordPress
+
+        Returns:
+            Job ID
+
+        Raises:
+            JobQueueFull: if PIPELINE_JOB_MAX_PENDING jobs are already waiting
+        """
+        job_id = uuid.uuid4().hex
+        with JobManager._lock:
+            if JobManager._pending >= PIPELINE_JOB_MAX_PENDING:
+                raise JobQueueFull(f"Too many pending jobs ({JobManager._pending})")
+            JobManager._pending += 1
+            JobManager._active.add(job_id)
+
+        db = SessionLocal()
+        try:
+            db.add(PipelineJob(
+                id=job_id,
+                user_id=user_id,
+                title=title,
+                status="queued",
+                stages={},
+                worker=_worker_id()
+            ))
+            db.commit()
+        except Exception:
+            with JobManager._lock:
+                JobManager._pending -= 1
+                JobManager._active.discard(job_id)
+            raise
+        finally:
+            db.close()
+
+        JobManager._get_executor().submit(
+            JobManager._run_job, job_id, title, content, user_id, auto_publish
+        )
+        logger.info(f"Pipeline job {job_id} queued")
+        return job_id
+
+    @staticmethod
+    def get_job(job_id):
+        """Get job status, per-stage progress and the final result if done"""
+        db = SessionLocal()
+        try:
+            job = db.query(PipelineJob).filter(PipelineJob.id == job_id).first()
+            return JobManager._format_job(job) if job else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _run_job(job_id, title, content, user_id, auto_publish):
+        """Worker body: run the pipeline and persist progress as stages finish"""
+        try:
+            JobManager._update(job_id, status="running", started_at=datetime.now())
+
+            def on_stage(name, stage_result, elapsed):
+                JobManager._record_stage(job_id, name, stage_result, elapsed)
+
+            result = JobManager._get_pipeline().run(
+                title=title,
+                content=content,
+                user_id=user_id,
+                auto_publish=auto_publish,
+                on_stage=on_stage,
+                # Checkpoints are kept under the job ID; a new job has none to load
+                run_id=job_id,
+                resume=False
+            )
+
+            if result.get("status") == "success":
+                JobManager._update(job_id, status="completed", result_json=result,
+                                   finished_at=datetime.now())
+            else:
+                JobManager._update(job_id, status="failed", result_json=result,
+                                   error_message=result.get("error"),
+                                   finished_at=datetime.now())
+        except Exception as e:
+            logger.error(f"Pipeline job {job_id} failed: {e}", exc_info=True)
+            JobManager._update(job_id, status="failed", error_message=str(e),
+                               finished_at=datetime.now())
+        finally:
+            with JobManager._lock:
+                JobManager._pending -= 1
+                JobManager._active.discard(job_id)
+
+    @staticmethod
+    def recover_orphaned_jobs(stale_after=PIPELINE_JOB_STALE_AFTER):
+        """
+        Fail jobs left queued or running by a worker that no longer exists
+
+        A job is orphaned when it was queued by a process on this host that
+        has exited (or by this very process, under a recycled PID, without
+        being in memory), or when it has not finished after `stale_after`
+        seconds, which also covers workers on other hosts or containers.
+
+        Returns:
+            Number of jobs marked failed
+        """
+        host = socket.gethostname()
+        cutoff = datetime.now() - timedelta(seconds=stale_after)
+        with JobManager._lock:
+            active = set(JobManager._active)
+
+        db = SessionLocal()
+        try:
+            orphaned = []
+            jobs = db.query(PipelineJob.id, PipelineJob.worker, PipelineJob.created_at).filter(
+                PipelineJob.status.in_(UNFINISHED_STATUSES)
+            ).all()
+            for job_id, worker, created_at in jobs:
+                if job_id in active:
+                    continue
+                job_host, _, pid = (worker or "").rpartition(":")
+                if not worker or not pid.isdigit():
+                    orphaned.append(job_id)  # Queued before workers were recorded
+                elif job_host == host and (int(pid) == os.getpid() or not _process_alive(int(pid))):
+                    orphaned.append(job_id)
+                elif created_at is not None and created_at.replace(tzinfo=None) < cutoff:
+                    orphaned.append(job_id)
+
+            for start in range(0, len(orphaned), 500):
+                db.query(PipelineJob).filter(
+                    PipelineJob.id.in_(orphaned[start:start + 500]),
+                    PipelineJob.status.in_(UNFINISHED_STATUSES)
+                ).update({
+                    "status": "failed",
+                    "error_message": "Interrupted: the worker running this job stopped",
+                    "finished_at": datetime.now()
+                }, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if orphaned:
+            logger.warning(f"Marked {len(orphaned)} orphaned pipeline jobs as failed")
+        return len(orphaned)
+
+    @staticmethod
+    def _record_stage(job_id, name, stage_result, elapsed):
+        db = SessionLocal()
+        try:
+            job = db.query(PipelineJob).filter(PipelineJob.id == job_id).first()
+            if job:
+                stages = dict(job.stages or {})
+                stages[name] = dict(stage_result, elapsed_ms=round(elapsed * 1000, 2))
+                job.stages = stages  # Reassign so the JSON column is flagged dirty
+                db.commit()
+        except Exception as e:
+            logger.error(f"Error recording stage {name} for job {job_id}: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _update(job_id, **fields):
+        db = SessionLocal()
+        try:
+            db.query(PipelineJob).filter(PipelineJob.id == job_id).update(fields)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _format_job(job):
+        """Format job for API response"""
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "title": job.title,
+            "stages": job.stages or {},
+            "result": job.result_json,
+            "error": job.error_message,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    @staticmethod
+    def shutdown(wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        if JobManager._executor:
+            JobManager._executor.shutdown(wait=wait)
+            JobManager._executor = None
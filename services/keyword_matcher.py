@@ -0,0 +1,108 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Iterable
+from unidecode import unidecode
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents, so "Elección" matches "eleccion" """
+    return unidecode(text or "").lower()
+
+
+class KeywordMatcher:
+    """Búsqueda de varias palabras clave en una sola pasada.
+
+    Keywords are compiled into one regex shaped like a trie (shared
+    prefixes are tested once), wrapped in a lookahead so the text is
+    scanned once and every position yields its longest keyword. Keywords
+    contained in a longer match ("eleccion" inside "elecciones 2026") are
+    added from a table built with the matcher. Matching is substring and
+    accent/case-insensitive, like the plain `in` checks it replaces.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = []  # As given, without blanks or duplicates
+        self._original = {}  # normalized -> as given
+        for keyword in keywords or []:
+            key = normalize(keyword).strip()
+            if key and key not in self._original:
+                self._original[key] = keyword.strip()
+                self.keywords.append(keyword.strip())
+
+        self._order = {key: idx for idx, key in enumerate(self._original)}
+        self._contained = {
+            key: [other for other in self._original if other != key and other in key]
+            for key in self._original
+        }
+        self._regex = None
+        if self._original:
+            self._regex = re.compile("(?=(" + self._trie_pattern(self._original) + "))")
+
+    def __bool__(self):
+        return bool(self._original)
+
+    def matches(self, text: str) -> List[str]:
+        """
+        Keywords found in text
+
+        Returns:
+            Matched keywords as given, in keyword-list order (empty if none)
+        """
+        if self._regex is None or not text:
+            return []
+        found = set()
+        for match in self._regex.finditer(normalize(text)):
+            key = match.group(1)
+            if key not in found:
+                found.add(key)
+                found.update(self._contained[key])
+        return [self._original[key] for key in sorted(found, key=self._order.get)]
+
+    def search(self, text: str) -> bool:
+        """Whether text contains any keyword"""
+        return self._regex is not None and bool(text) and self._regex.search(normalize(text)) is not None
+
+    @staticmethod
+    def _trie_pattern(words) -> str:
+        """Alternation of words as a prefix tree, longer branches first"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def pattern(node):
+            branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if "" in node:
+                # A word ends here; the greedy ? still prefers the longer one
+                return "(?:" + body + ")?"
+            return body
+
+        return pattern(trie)
+
+
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+_MAX_MATCHERS = 32
+
+
+def get_keyword_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Return the compiled matcher for a keyword list, building it only when the list changes"""
+    key = tuple(keywords or ())
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+
+    matcher = KeywordMatcher(key)
+    with _matchers_lock:
+        _matchers[key] = matcher
+        while len(_matchers) > _MAX_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
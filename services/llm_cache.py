@@ -0,0 +1,171 @@
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import LLM_CACHE_ENABLED, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+from config import LLM_CACHE_DB_PATH, LLM_CACHE_DB_MAX_ENTRIES, LLM_CACHE_MAX_TEMPERATURE
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Caché de respuestas LLM direccionada por contenido.
+
+    Two tiers: an in-process LRU dict and an optional SQLite file that every
+    gunicorn worker opens, so a prompt answered by one worker is a hit in
+    all of them. Entries expire after a TTL and both tiers are size-capped.
+    """
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 db_path=LLM_CACHE_DB_PATH, db_max_entries=LLM_CACHE_DB_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.db_max_entries = db_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+        if self.db_path:
+            try:
+                self._db().execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " last_access REAL NOT NULL)"
+                )
+                self._db().execute(
+                    "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)"
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk tier disabled: {e}")
+                self.db_path = ""
+
+    @staticmethod
+    def make_key(model, system_prompt, prompt, temperature, json_mode):
+        """Hash the request fields that determine the completion"""
+        payload = json.dumps(
+            [model, system_prompt or "", prompt, round(float(temperature), 4), bool(json_mode)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_cacheable(temperature):
+        """Only near-deterministic completions are cached by default"""
+        return LLM_CACHE_ENABLED and temperature <= LLM_CACHE_MAX_TEMPERATURE
+
+    def get(self, key):
+        """Return the cached value or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    return copy.deepcopy(entry[0])
+                del self._memory[key]
+
+        if not self.db_path:
+            return None
+
+        try:
+            db = self._db()
+            row = db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if row[1] <= now:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            return value
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def set(self, key, value):
+        """Store a value in both tiers"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+
+        if not self.db_path:
+            return
+
+        try:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time())
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def prune(self):
+        """Drop expired rows and trim the disk tier to its size cap"""
+        if not self.db_path:
+            return
+        try:
+            db = self._db()
+            db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.db_max_entries,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache prune failed: {e}")
+
+    def clear(self):
+        """Empty both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                self._db().execute("DELETE FROM llm_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {e}")
+
+    def _remember(self, key, value, expires_at):
+        # Keep a private copy; callers may mutate what they passed in or got back
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _db(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
@@ -1,100 +1,345 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, RateLimitError
+import asyncio
 import httpx
-import time
+import json
+import queue
+import threading
 import logging
 from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS
+from config import LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY
+from config import LLM_MAX_CONCURRENT_REQUESTS
+from services.llm_cache import LLMResponseCache, get_llm_cache
+from services.rate_limiter import current_priority, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
-class LLMClient:
-    """Wrapper para OpenAI GPT con retries y timeout"""
-    
-    def __init__(self, model=OPENAI_MODEL, temperature=OPENAI_TEMPERATURE, 
+# Process-wide transport shared by every LLM client. All requests run on a
+# single background event loop that owns one AsyncOpenAI client and one
+# keep-alive connection pool, so services no longer hold a pool each.
+_transport_lock = threading.Lock()
+_loop = None
+_loop_thread = None
+_async_openai = None
+_request_slots = None
+
+
+def _get_loop():
+    """Return the background event loop, starting it on first use"""
+    global _loop, _loop_thread
+    with _transport_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="llm-transport", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
+
+
+def _get_async_openai():
+    """Return the shared AsyncOpenAI client (only used on the transport loop)"""
+    global _async_openai
+    with _transport_lock:
+        if _async_openai is None:
+            limits = httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+            )
+            # Retries are handled by AsyncLLMClient so they go through the rate limiter
+            _async_openai = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=limits)
+            )
+        return _async_openai
+
+
+def _get_request_slots():
+    """Semaphore capping in-flight completions across all callers in the process"""
+    global _request_slots
+    if _request_slots is None:
+        # Created lazily on the transport loop, which is the only place it is awaited
+        _request_slots = asyncio.Semaphore(LLM_MAX_CONCURRENT_REQUESTS)
+    return _request_slots
+
+
+class AsyncLLMClient:
+    """Cliente asíncrono para OpenAI sobre el pool HTTP compartido"""
+
+    def __init__(self, model=OPENAI_MODEL, temperature=OPENAI_TEMPERATURE,
                  max_tokens=OPENAI_MAX_TOKENS, retries=3, timeout=30):
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.retries = retries
         self.timeout = timeout
-        
-        # Initialize the OpenAI client with API key and explicit http_client to avoid version conflicts
-        self.client = OpenAI(
-            api_key=OPENAI_API_KEY,
-            http_client=httpx.Client(timeout=timeout)
-        )
-    
-    def generate(self, prompt, system_prompt=None, json_mode=False, temperature=None):
+
+    async def generate(self, prompt, system_prompt=None, json_mode=False, temperature=None,
+                       use_cache=None):
         """
-        Generate text from LLM
-        
+        Generate text from LLM. Safe to await from any event loop and to
+        call concurrently; requests are multiplexed over the shared pool.
+
         Args:
             prompt: User message
             system_prompt: System context
             json_mode: Request JSON output
             temperature: Override default temperature (optional)
-        
+            use_cache: Force caching on/off (default: cache low-temperature calls)
+
         Returns:
             Generated text or dict if json_mode
         """
+        cache_key = self._cache_key(prompt, system_prompt, json_mode, temperature, use_cache)
+        if cache_key:
+            cached = get_llm_cache().get(cache_key)
+            if cached is not None:
+                return cached
+
+        coro = self._generate(prompt, system_prompt, json_mode, temperature, current_priority())
+        loop = _get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            result = await coro
+        else:
+            result = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+        self._store(cache_key, result)
+        return result
+
+    async def generate_json(self, prompt, system_prompt=None, use_cache=None):
+        """Generate JSON from LLM"""
+        return await self.generate(prompt, system_prompt, json_mode=True, use_cache=use_cache)
+
+    def _cache_key(self, prompt, system_prompt, json_mode, temperature, use_cache):
+        """Return the response cache key, or None if the call is not cacheable"""
+        effective = temperature if temperature is not None else self.temperature
+        if use_cache is None:
+            use_cache = LLMResponseCache.is_cacheable(effective)
+        if not use_cache:
+            return None
+        return LLMResponseCache.make_key(self.model, system_prompt, prompt, effective, json_mode)
+
+    @staticmethod
+    def _store(cache_key, result):
+        """Cache a successful completion"""
+        if not cache_key or not result:
+            return
+        if isinstance(result, dict) and "error" in result and "raw" in result:
+            return
+        get_llm_cache().set(cache_key, result)
+
+    async def _wait_for_quota(self, messages, priority):
+        """Wait until the shared RPM/TPM buckets admit this request"""
+        limiter = get_rate_limiter()
+        if not limiter.enabled:
+            return
+        # OpenAI counts max_tokens against TPM, so the estimate does too
+        tokens = sum(len(m["content"]) for m in messages) // 4 + self.max_tokens
+        loop = asyncio.get_running_loop()
+        while True:
+            # The bucket lives in SQLite; keep its lock waits off the event loop
+            wait = await loop.run_in_executor(None, limiter.try_acquire, tokens, priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _retry_after(error):
+        """Seconds requested by the Retry-After headers of an API error, if any"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    async def _stream(self, prompt, system_prompt, temperature, on_chunk, priority=None):
+        """Stream a completion, passing each text delta to on_chunk; runs on the transport loop"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
-        
+
+        await self._wait_for_quota(messages, priority or current_priority())
+
+        # Partial output cannot be retried safely, so streaming makes one attempt
+        async with _get_request_slots():
+            response = await _get_async_openai().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature if temperature is not None else self.temperature,
+                max_tokens=self.max_tokens,
+                timeout=self.timeout,
+                stream=True
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    on_chunk(chunk.choices[0].delta.content)
+
+    async def _generate(self, prompt, system_prompt, json_mode, temperature, priority=None):
+        """Run a completion with retries; executes on the transport loop"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        client = _get_async_openai()
+        priority = priority or current_priority()
+
         for attempt in range(self.retries):
             try:
+                await self._wait_for_quota(messages, priority)
+
                 kwargs = {
                     "model": self.model,
                     "messages": messages,
                     "temperature": temperature if temperature is not None else self.temperature,
                     "max_tokens": self.max_tokens,
+                    "timeout": self.timeout,
                 }
-                
+
                 if json_mode:
                     kwargs["response_format"] = {"type": "json_object"}
 
-                # Use new client method
-                response = self.client.chat.completions.create(**kwargs)
+                async with _get_request_slots():
+                    response = await client.chat.completions.create(**kwargs)
 
                 # Access content
                 content = response.choices[0].message.content.strip()
-                
+
                 if json_mode:
-                    import json
                     try:
                         return json.loads(content)
                     except json.JSONDecodeError:
                         logger.warning(f"Failed to parse JSON response: {content}")
                         return {"error": "Invalid JSON response", "raw": content}
-                
+
                 return content
-                
-            except Exception as e:
-                # Basic error handling
-                exc_name = e.__class__.__name__
-                if "rate" in exc_name.lower():
-                    if attempt < self.retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Rate limited ({exc_name}). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error("Max retries exceeded for rate limit")
-                        raise
-                elif "api" in exc_name.lower() or "service" in exc_name.lower():
-                    if attempt < self.retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"API error ({exc_name}): {e}. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
+
+            except RateLimitError as e:
+                if attempt < self.retries - 1:
+                    wait_time = self._retry_after(e) or 2 ** attempt
+                    limiter = get_rate_limiter()
+                    logger.warning(f"Rate limited. Retrying in {wait_time}s...")
+                    if limiter.enabled:
+                        # Pause every worker, not just this call, until the quota recovers
+                        limiter.penalize(wait_time)
                     else:
-                        logger.error(f"Max retries exceeded: {e}")
-                        raise
+                        # No bucket to enforce the pause; wait here
+                        await asyncio.sleep(wait_time)
+                    continue
+                else:
+                    logger.error("Max retries exceeded for rate limit")
+                    raise
+            except (APIConnectionError, APIStatusError) as e:
+                retryable = isinstance(e, APIConnectionError) or e.status_code >= 500
+                if retryable and attempt < self.retries - 1:
+                    wait_time = self._retry_after(e) or 2 ** attempt
+                    logger.warning(f"API error ({e.__class__.__name__}): {e}. Retrying in {wait_time}s...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                elif retryable:
+                    logger.error(f"Max retries exceeded: {e}")
+                    raise
                 else:
-                    logger.error(f"Unexpected error in LLM client: {e}")
+                    logger.error(f"LLM request rejected: {e}")
                     raise
-            # loop will retry if needed
-    
-    def generate_json(self, prompt, system_prompt=None):
+            except Exception as e:
+                logger.error(f"Unexpected error in LLM client: {e}")
+                raise
+
+
+class LLMClient:
+    """Wrapper síncrono para OpenAI GPT con retries y timeout.
+
+    Blocking facade over AsyncLLMClient: calls are dispatched to the shared
+    transport loop, so many threads can use it concurrently on one pool.
+    """
+
+    def __init__(self, model=OPENAI_MODEL, temperature=OPENAI_TEMPERATURE,
+                 max_tokens=OPENAI_MAX_TOKENS, retries=3, timeout=30):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.retries = retries
+        self.timeout = timeout
+        self.async_client = AsyncLLMClient(
+            model=model, temperature=temperature, max_tokens=max_tokens,
+            retries=retries, timeout=timeout
+        )
+
+    def generate(self, prompt, system_prompt=None, json_mode=False, temperature=None,
+                 use_cache=None):
+        """
+        Generate text from LLM
+
+        Args:
+            prompt: User message
+            system_prompt: System context
+            json_mode: Request JSON output
+            temperature: Override default temperature (optional)
+            use_cache: Force caching on/off (default: cache low-temperature calls)
+
+        Returns:
+            Generated text or dict if json_mode
+        """
+        cache_key = self.async_client._cache_key(prompt, system_prompt, json_mode, temperature, use_cache)
+        if cache_key:
+            cached = get_llm_cache().get(cache_key)
+            if cached is not None:
+                return cached
+
+        coro = self.async_client._generate(prompt, system_prompt, json_mode, temperature,
+                                           current_priority())
+        result = asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+        AsyncLLMClient._store(cache_key, result)
+        return result
+
+    def generate_json(self, prompt, system_prompt=None, use_cache=None):
         """Generate JSON from LLM"""
-        return self.generate(prompt, system_prompt, json_mode=True)
+        return self.generate(prompt, system_prompt, json_mode=True, use_cache=use_cache)
+
+    def stream(self, prompt, system_prompt=None, temperature=None):
+        """
+        Stream generated text as it arrives
+
+        Args:
+            prompt: User message
+            system_prompt: System context
+            temperature: Override default temperature (optional)
+
+        Yields:
+            Text deltas in order
+        """
+        chunks = queue.Queue()
+        done = object()
+
+        def on_chunk(text):
+            chunks.put(text)
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.async_client._stream(prompt, system_prompt, temperature, on_chunk,
+                                      current_priority()),
+            _get_loop()
+        )
+        future.add_done_callback(lambda _: chunks.put(done))
+
+        while True:
+            item = chunks.get()
+            if item is done:
+                break
+            yield item
+
+        # Surface transport errors to the caller
+        future.result()
@@ -0,0 +1,176 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from storage.database import SessionLocal
+from storage.models import PipelineLog
+from services.metrics_rollup import MetricsRollup
+from services.output_store import OutputStore
+from config import PIPELINE_LOG_BATCH_SIZE, PIPELINE_LOG_FLUSH_INTERVAL
+from config import PIPELINE_LOG_QUEUE_SIZE, PIPELINE_LOG_PUT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class PipelineLogWriter:
+    """Cola write-behind que agrupa inserciones de PipelineLog en una transacción.
+
+    Requests hand their log row to a background thread and return
+    immediately. The thread commits rows in batches of `batch_size` or
+    every `flush_interval` seconds, whichever comes first, so SQLite sees
+    one fsync and one write lock per batch instead of per request. A full
+    queue blocks the producer for up to `put_timeout` seconds and then
+    falls back to writing inline, so rows are never dropped.
+    """
+
+    def __init__(self, batch_size=PIPELINE_LOG_BATCH_SIZE, flush_interval=PIPELINE_LOG_FLUSH_INTERVAL,
+                 max_queue=PIPELINE_LOG_QUEUE_SIZE, put_timeout=PIPELINE_LOG_PUT_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, fields):
+        """Queue one PipelineLog row (dict of column values)"""
+        if self._closed:
+            self.write_batch([fields])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put(fields, timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning("Pipeline log queue full, writing inline")
+            self.write_batch([fields])
+
+    def flush(self):
+        """Block until every queued row has been written"""
+        if self._thread:
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread:
+            self._queue.put(_STOP)
+            thread.join()
+
+    @staticmethod
+    def write_batch(batch, attempts=3):
+        """
+        Insert rows and update their rollups in one transaction
+
+        A batch failing for a reason other than a locked database (a
+        constraint, an output that cannot be serialized) is retried row by
+        row, so only the offending row is lost.
+
+        Returns:
+            List of new log IDs of the rows written
+        """
+        split = False
+        for attempt in range(attempts):
+            db = SessionLocal()
+            try:
+                # Output blobs go to their own table, compressed
+                rows = [dict(fields) for fields in batch]
+                outputs = [fields.pop("output_json", None) for fields in rows]
+                logs = [PipelineLog(**fields) for fields in rows]
+                db.add_all(logs)
+                db.flush()
+                for log, output in zip(logs, outputs):
+                    if output is not None:
+                        OutputStore.add(db, log.id, output)
+                MetricsRollup.record_many(db, logs)
+                db.commit()
+                return [log.id for log in logs]
+            except OperationalError as e:
+                # Typically "database is locked" under concurrent writers
+                db.rollback()
+                if attempt < attempts - 1:
+                    logger.warning(f"Pipeline log write failed ({e}), retrying")
+                    time.sleep(0.5 * (attempt + 1))
+                    continue
+                logger.error(f"Dropping {len(batch)} pipeline logs: {e}")
+            except Exception as e:
+                db.rollback()
+                if len(batch) > 1:
+                    logger.warning(f"Pipeline log batch of {len(batch)} failed ({e}), writing rows one by one")
+                    split = True
+                else:
+                    logger.error(f"Dropping pipeline log {PipelineLogWriter._describe(batch[0])}: {e}")
+                break
+            finally:
+                db.close()
+
+        if split:
+            ids = []
+            for fields in batch:
+                ids.extend(PipelineLogWriter.write_batch([fields], attempts))
+            return ids
+        return []
+
+    @staticmethod
+    def _describe(fields):
+        """Short identification of a row for the error log"""
+        title = (fields.get("input_text") or "")[:60]
+        return (f"(user_id={fields.get('user_id')}, status={fields.get('status')}, "
+                f"category={fields.get('category')}, input={title!r})")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pipeline-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if item is not None and not stop:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (stop or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self.write_batch(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+
+            if stop:
+                self._queue.task_done()
+                return
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """Return the process-wide pipeline log writer (flushed at interpreter exit)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PipelineLogWriter()
+            atexit.register(_writer.close)
+        return _writer
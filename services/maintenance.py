@@ -0,0 +1,302 @@
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import undefer
+from storage.database import SessionLocal, engine
+from storage.models import ApiKey, PipelineCheckpoint, PipelineJob, PipelineLog, PipelineLogOutput
+from services.output_store import OutputStore
+from services.metrics_rollup import MetricsRollup
+from services.job_manager import JobManager, UNFINISHED_STATUSES
+from config import PIPELINE_LOG_RETENTION_DAYS, PIPELINE_LOG_ARCHIVE_DIR
+from config import PIPELINE_CHECKPOINT_RETENTION_DAYS, PIPELINE_OUTPUT_RETENTION_DAYS, PIPELINE_JOB_RETENTION_DAYS
+from config import MAINTENANCE_BATCH_SIZE, MAINTENANCE_BATCH_PAUSE, MAINTENANCE_VACUUM_PAGES
+
+logger = logging.getLogger(__name__)
+
+# Logs still waiting on an editor or a running pipeline are never purged
+PROTECTED_STATUSES = ("pending", "processing")
+
+
+class MaintenanceService:
+    """Retención y compactación de la base de datos.
+
+    Every delete runs in batches of MAINTENANCE_BATCH_SIZE rows, each in
+    its own short transaction with a pause in between, so the log writer
+    and the API never wait long on the SQLite write lock. Dashboard
+    rollups keep counting logs purged by retention; logs deleted on
+    request are taken out of them.
+    """
+
+    @staticmethod
+    def run():
+        """
+        Run every retention and compaction task
+
+        Returns:
+            Report dict with rows (and bytes where known) reclaimed per task
+        """
+        report = {
+            "outputs": OutputStore.prune(PIPELINE_OUTPUT_RETENTION_DAYS, MAINTENANCE_BATCH_SIZE),
+            "logs": MaintenanceService.purge_logs(),
+            "checkpoints": MaintenanceService.prune_checkpoints(),
+            "jobs": MaintenanceService.prune_jobs(),
+            "api_keys": MaintenanceService.prune_api_keys(),
+        }
+        # Compact last so the pages freed above are returned to the OS
+        report["database"] = MaintenanceService.compact()
+        logger.info(f"Maintenance report: {report}")
+        return report
+
+    @staticmethod
+    def purge_logs(days=PIPELINE_LOG_RETENTION_DAYS, archive_dir=PIPELINE_LOG_ARCHIVE_DIR):
+        """
+        Delete (or archive then delete) pipeline logs past the retention window
+
+        Returns:
+            Dict with rows, bytes and archived counts
+        """
+        if not days:
+            return {"rows": 0, "bytes": 0, "archived": 0}
+        cutoff = datetime.now() - timedelta(days=days)
+        return MaintenanceService.delete_logs(cutoff, PROTECTED_STATUSES, archive_dir, keep_rollups=True)
+
+    @staticmethod
+    def delete_logs(cutoff=None, keep_statuses=(), archive_dir="", batch_size=MAINTENANCE_BATCH_SIZE,
+                    keep_rollups=False):
+        """
+        Delete pipeline logs and their output blobs in bounded batches
+
+        Args:
+            cutoff: Only delete logs created before this (default: all)
+            keep_statuses: Statuses that are never deleted
+            archive_dir: Append deleted rows to a .jsonl.gz file here first
+            batch_size: Rows per transaction
+            keep_rollups: Leave the deleted logs in the dashboard rollups
+                (retention); otherwise they are subtracted in the same transaction
+
+        Returns:
+            Dict with rows, bytes (input text plus uncompressed output,
+            approximate) and archived counts
+        """
+        removed = {"rows": 0, "bytes": 0, "archived": 0}
+        db = SessionLocal()
+        try:
+            while True:
+                query = db.query(
+                    PipelineLog.id, func.length(PipelineLog.input_text).label("input_length"),
+                    PipelineLog.created_at, PipelineLog.category, PipelineLog.status,
+                    PipelineLog.quality_score, PipelineLog.execution_time
+                )
+                if cutoff is not None:
+                    query = query.filter(PipelineLog.created_at < cutoff)
+                if keep_statuses:
+                    query = query.filter(or_(
+                        PipelineLog.status.is_(None),
+                        PipelineLog.status.notin_(keep_statuses)
+                    ))
+                batch = query.order_by(PipelineLog.id).limit(batch_size).all()
+                if not batch:
+                    break
+
+                ids = [row.id for row in batch]
+                if archive_dir:
+                    removed["archived"] += MaintenanceService._archive(db, ids, archive_dir)
+
+                output_bytes = db.query(func.sum(PipelineLogOutput.size)).filter(
+                    PipelineLogOutput.log_id.in_(ids)
+                ).scalar() or 0
+                db.query(PipelineLogOutput).filter(
+                    PipelineLogOutput.log_id.in_(ids)
+                ).delete(synchronize_session=False)
+                db.query(PipelineLog).filter(PipelineLog.id.in_(ids)).delete(synchronize_session=False)
+                if not keep_rollups:
+                    MetricsRollup.remove_many(db, batch)
+                db.commit()
+
+                removed["rows"] += len(ids)
+                removed["bytes"] += output_bytes + sum(row.input_length or 0 for row in batch)
+                if len(batch) < batch_size:
+                    break
+                time.sleep(MAINTENANCE_BATCH_PAUSE)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        logger.info(f"Deleted {removed['rows']} pipeline logs ({removed['bytes']} bytes)")
+        return removed
+
+    @staticmethod
+    def prune_checkpoints(days=PIPELINE_CHECKPOINT_RETENTION_DAYS):
+        """Delete stage checkpoints of runs too old to be resumed"""
+        if not days:
+            return {"rows": 0}
+        cutoff = datetime.now() - timedelta(days=days)
+        return {"rows": MaintenanceService._delete_batched(
+            PipelineCheckpoint, PipelineCheckpoint.id, PipelineCheckpoint.created_at < cutoff
+        )}
+
+    @staticmethod
+    def prune_jobs(days=PIPELINE_JOB_RETENTION_DAYS):
+        """Fail orphaned background jobs and delete finished ones past retention"""
+        recovered = JobManager.recover_orphaned_jobs()
+        if not days:
+            return {"rows": 0, "recovered": recovered}
+        cutoff = datetime.now() - timedelta(days=days)
+        return {"rows": MaintenanceService._delete_batched(
+            PipelineJob, PipelineJob.id,
+            (PipelineJob.created_at < cutoff) & PipelineJob.status.notin_(UNFINISHED_STATUSES)
+        ), "recovered": recovered}
+
+    @staticmethod
+    def prune_api_keys():
+        """Delete API keys past their expiration date"""
+        return {"rows": MaintenanceService._delete_batched(
+            ApiKey, ApiKey.id, ApiKey.expires_at < datetime.now()
+        )}
+
+    @staticmethod
+    def compact(pages=MAINTENANCE_VACUUM_PAGES, bind=None):
+        """
+        Return free pages to the OS and refresh planner statistics
+
+        SQLite databases in auto_vacuum=INCREMENTAL mode release up to
+        `pages` free pages, which is quick. Databases created before that
+        mode was the default need a one-time full VACUUM, which locks the
+        whole file, so it is never done here: run enable_incremental_vacuum
+        (python -m services.maintenance --incremental-vacuum) in a quiet
+        window. ANALYZE is bounded by analysis_limit. Other backends only
+        get ANALYZE (their own autovacuum does the rest).
+
+        Returns:
+            Dict with bytes reclaimed and the resulting database size
+        """
+        bind = bind or engine
+        if bind.dialect.name != "sqlite":
+            with bind.connect() as conn:
+                conn.execute(text("ANALYZE"))
+                conn.commit()
+            return {"bytes": 0, "size_bytes": None}
+
+        # incremental_vacuum cannot run inside a transaction
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+                # sqlite3's execute() steps once and frees a single page;
+                # executescript() runs the pragma to completion
+                conn.connection.driver_connection.executescript(
+                    f"PRAGMA incremental_vacuum({int(pages)})"
+                )
+            else:
+                logger.info(
+                    "SQLite free pages not released: run "
+                    "`python -m services.maintenance --incremental-vacuum` once"
+                )
+
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+            conn.exec_driver_sql("ANALYZE")
+            after = conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+        return {"bytes": max(0, before - after) * page_size, "size_bytes": after * page_size}
+
+    @staticmethod
+    def enable_incremental_vacuum(bind=None):
+        """
+        Switch a SQLite database to auto_vacuum=INCREMENTAL
+
+        Rewrites the whole file with a full VACUUM, holding the write lock
+        (and needing as much free disk as the database) until it is done.
+        Does nothing on databases already converted or on other backends.
+
+        Returns:
+            Dict with bytes reclaimed and the resulting database size
+        """
+        bind = bind or engine
+        if bind.dialect.name != "sqlite":
+            return {"bytes": 0, "size_bytes": None}
+
+        # VACUUM cannot run inside a transaction
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+                logger.info("Converting SQLite database to incremental auto-vacuum")
+                conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.exec_driver_sql("VACUUM")
+            after = conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+        return {"bytes": max(0, before - after) * page_size, "size_bytes": after * page_size}
+
+    @staticmethod
+    def _delete_batched(model, key, condition, batch_size=MAINTENANCE_BATCH_SIZE):
+        """Delete rows matching condition in short transactions; returns the count"""
+        deleted = 0
+        db = SessionLocal()
+        try:
+            while True:
+                ids = [row[0] for row in db.query(key).filter(condition).limit(batch_size).all()]
+                if not ids:
+                    break
+                db.query(model).filter(key.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+                deleted += len(ids)
+                if len(ids) < batch_size:
+                    break
+                time.sleep(MAINTENANCE_BATCH_PAUSE)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return deleted
+
+    @staticmethod
+    def _archive(db, ids, archive_dir):
+        """Append logs (with their full output) to today's archive file"""
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"pipeline_logs-{datetime.now():%Y%m%d}.jsonl.gz")
+
+        logs = db.query(PipelineLog).options(undefer(PipelineLog.output_json)).filter(
+            PipelineLog.id.in_(ids)
+        ).all()
+        outputs = {
+            row.log_id: row for row in
+            db.query(PipelineLogOutput).filter(PipelineLogOutput.log_id.in_(ids)).all()
+        }
+
+        # gzip members can be appended; readers see one continuous stream
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            for log in logs:
+                record = {
+                    column.name: getattr(log, column.name)
+                    for column in PipelineLog.__table__.columns
+                }
+                if log.id in outputs:
+                    row = outputs[log.id]
+                    record["output_json"] = OutputStore.decode(row.codec, row.payload)
+                archive.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        return len(logs)
+
+
+if __name__ == "__main__":
+    import argparse
+    from storage.database import init_db
+
+    parser = argparse.ArgumentParser(description="Run database retention and compaction")
+    parser.add_argument("--incremental-vacuum", action="store_true",
+                        help="one-time full VACUUM switching SQLite to incremental auto-vacuum")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    if args.incremental_vacuum:
+        print(MaintenanceService.enable_incremental_vacuum())
+    else:
+        print(MaintenanceService.run())
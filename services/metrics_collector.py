@@ -1,8 +1,12 @@
 import json
 import logging
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
 from storage.database import SessionLocal
 from storage.models import PipelineLog, TaxonomyStats
+from services.log_writer import PipelineLogWriter, get_log_writer
+from config import PIPELINE_LOG_ASYNC
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +15,8 @@ class MetricsCollector:
     
     @staticmethod
     def log_pipeline_execution(user_id, input_text, output_json, status, 
-                              execution_time, model_used, error_message=None, wp_post_id=None):
+                              execution_time, model_used, error_message=None, wp_post_id=None,
+                              quality_score=None, category=None, tags=None):
         """
         Log pipeline execution
         
@@ -24,36 +29,40 @@ class MetricsCollector:
             model_used: Model name (e.g., "gpt-4")
             error_message: Error message if failed
             wp_post_id: WordPress post ID if published
+            quality_score: Overall quality score (0-1)
+            category: Primary category
+            tags: List of tags
         
         Returns:
-            Log ID
+            Log ID, or None when the row is queued for the background writer
         """
         logger.info(f"Logging pipeline execution for user {user_id}")
         
-        db = SessionLocal()
-        try:
-            log = PipelineLog(
-                user_id=user_id,
-                input_text=input_text[:1000],  # Store first 1000 chars
-                output_json=output_json,
-                status=status,
-                error_message=error_message,
-                execution_time=execution_time,
-                model_used=model_used,
-                wp_post_id=wp_post_id
-            )
-            db.add(log)
-            db.commit()
-            
-            log_id = log.id
-            logger.info(f"Pipeline log created: {log_id}")
-            return log_id
-            
-        except Exception as e:
-            logger.error(f"Error logging pipeline: {e}")
+        fields = {
+            "user_id": user_id,
+            "input_text": input_text[:1000],  # Store first 1000 chars
+            "output_json": output_json,
+            "status": status,
+            "error_message": error_message,
+            "execution_time": execution_time,
+            "model_used": model_used,
+            "wp_post_id": wp_post_id,
+            "quality_score": quality_score or 0.0,
+            "category": category,
+            "tags": tags
+        }
+        
+        if PIPELINE_LOG_ASYNC:
+            # Batched by the write-behind queue; keeps the commit off the request
+            get_log_writer().submit(fields)
             return None
-        finally:
-            db.close()
+        
+        # Log row and its rollup share one transaction
+        ids = PipelineLogWriter.write_batch([fields])
+        if ids:
+            logger.info(f"Pipeline log created: {ids[0]}")
+            return ids[0]
+        return None
     
     @staticmethod
     def record_category_usage(category_name, traffic_score=1.0, relevance_score=0.5):
@@ -65,35 +74,82 @@ class MetricsCollector:
             traffic_score: Traffic indicator (0-1 or higher)
             relevance_score: Relevance score (0-1)
         """
-        logger.info(f"Recording category usage: {category_name}")
+        MetricsCollector.record_categories_usage([category_name], traffic_score, relevance_score)
+    
+    @staticmethod
+    def record_categories_usage(category_names, traffic_score=1.0, relevance_score=0.5):
+        """
+        Record one use of each category of a post in a single statement
+        
+        The counters are updated atomically in the database (INSERT ...
+        ON CONFLICT DO UPDATE), so concurrent posts never lose increments.
+        
+        Args:
+            category_names: Category names (duplicates count once)
+            traffic_score: Traffic indicator added to each category
+            relevance_score: Relevance score averaged into each category
+        """
+        names = list(dict.fromkeys(name for name in category_names if name))
+        if not names:
+            return
+        
+        logger.info(f"Recording category usage: {', '.join(names)}")
         
         db = SessionLocal()
         try:
-            # Find or create category stats
-            stat = db.query(TaxonomyStats).filter(
-                TaxonomyStats.category_name == category_name
-            ).first()
-            
+            MetricsCollector._upsert_category_stats(db, names, traffic_score, relevance_score)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error recording category usage: {e}")
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _upsert_category_stats(db, names, traffic_score, relevance_score):
+        """Add one use to each category, creating missing rows"""
+        table = TaxonomyStats.__table__
+        dialect = db.bind.dialect.name
+        
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            stmt = dialect_insert(table).values([{
+                "category_name": name,
+                "usage_count": 1,
+                "traffic_score": traffic_score,
+                "relevance_score": relevance_score
+            } for name in names])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["category_name"],
+                set_={
+                    "usage_count": table.c.usage_count + stmt.excluded.usage_count,
+                    "traffic_score": table.c.traffic_score + stmt.excluded.traffic_score,
+                    "relevance_score": (table.c.relevance_score + stmt.excluded.relevance_score) / 2,
+                    "updated_at": func.now()
+                }
+            )
+            db.execute(stmt)
+            return
+        
+        existing = {
+            stat.category_name: stat for stat in
+            db.query(TaxonomyStats).filter(
+                TaxonomyStats.category_name.in_(names)
+            ).with_for_update().all()
+        }
+        for name in names:
+            stat = existing.get(name)
             if stat:
                 stat.usage_count += 1
                 stat.traffic_score += traffic_score
                 stat.relevance_score = (stat.relevance_score + relevance_score) / 2
             else:
-                stat = TaxonomyStats(
-                    category_name=category_name,
+                db.add(TaxonomyStats(
+                    category_name=name,
                     usage_count=1,
                     traffic_score=traffic_score,
                     relevance_score=relevance_score
-                )
-                db.add(stat)
-            
-            db.commit()
-            logger.info(f"Category usage recorded: {category_name}")
-            
-        except Exception as e:
-            logger.error(f"Error recording category usage: {e}")
-        finally:
-            db.close()
+                ))
     
     @staticmethod
     def get_pipeline_stats(days=30):
@@ -112,15 +168,21 @@ class MetricsCollector:
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
             
-            # Get all logs in period
-            logs = db.query(PipelineLog).filter(
+            # Aggregate in the database; only status, execution_time and
+            # created_at are read, never the JSON/text payload columns
+            rows = db.query(
+                PipelineLog.status,
+                func.count(PipelineLog.id),
+                func.sum(PipelineLog.execution_time)
+            ).filter(
                 PipelineLog.created_at >= cutoff_date
-            ).all()
+            ).group_by(PipelineLog.status).all()
             
-            total = len(logs)
-            successful = sum(1 for log in logs if log.status == "success")
-            failed = sum(1 for log in logs if log.status == "failed")
-            avg_time = sum(log.execution_time for log in logs) / max(total, 1)
+            counts = {status: count for status, count, _ in rows}
+            total = sum(counts.values())
+            successful = counts.get("success", 0)
+            failed = counts.get("failed", 0)
+            avg_time = sum(time_sum or 0 for _, _, time_sum in rows) / max(total, 1)
             
             stats = {
                 "total_runs": total,
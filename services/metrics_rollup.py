@@ -0,0 +1,221 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from storage.database import SessionLocal
+from storage.models import PipelineLog, PipelineDailyRollup
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED = "Sin categoría"
+
+
+class MetricsRollup:
+    """Agregados diarios de PipelineLog por (fecha, categoría, estado) para el dashboard"""
+    
+    @staticmethod
+    def record(db, log):
+        """Add one log row to its daily bucket inside the caller's transaction"""
+        MetricsRollup.record_many(db, [log])
+    
+    @staticmethod
+    def record_many(db, logs):
+        """
+        Add log rows to their daily buckets inside the caller's transaction
+        
+        Args:
+            db: Open session that just flushed `logs`
+            logs: PipelineLog instances (created_at populated)
+        """
+        for (day, category, status), (count, quality_sum, time_sum) in MetricsRollup._fold(logs).items():
+            MetricsRollup._add(db, {
+                "date": day,
+                "category": category,
+                "status": status,
+                "count": count,
+                "quality_sum": quality_sum,
+                "execution_time_sum": time_sum
+            })
+    
+    @staticmethod
+    def remove_many(db, logs):
+        """
+        Take deleted log rows out of their daily buckets inside the caller's transaction
+        
+        Args:
+            db: Open session deleting `logs`
+            logs: PipelineLog instances or rows with created_at, category,
+                status, quality_score and execution_time
+        """
+        table = PipelineDailyRollup.__table__
+        buckets = MetricsRollup._fold(logs)
+        for (day, category, status), (count, quality_sum, time_sum) in buckets.items():
+            db.execute(table.update().where(
+                table.c.date == day,
+                table.c.category == category,
+                table.c.status.is_(None) if status is None else table.c.status == status
+            ).values(
+                count=table.c.count - count,
+                quality_sum=table.c.quality_sum - quality_sum,
+                execution_time_sum=table.c.execution_time_sum - time_sum
+            ))
+        if buckets:
+            days = {day for day, _, _ in buckets}
+            db.execute(table.delete().where(table.c.date.in_(days), table.c.count <= 0))
+    
+    @staticmethod
+    def _fold(logs):
+        """Group log rows by bucket so each bucket is written once"""
+        buckets = {}
+        for log in logs:
+            key = ((log.created_at or datetime.now()).date(), log.category or "", log.status)
+            bucket = buckets.setdefault(key, [0, 0.0, 0.0])
+            bucket[0] += 1
+            bucket[1] += log.quality_score or 0.0
+            bucket[2] += log.execution_time or 0.0
+        return buckets
+    
+    @staticmethod
+    def _add(db, values):
+        """Upsert one bucket increment"""
+        table = PipelineDailyRollup.__table__
+        dialect = db.bind.dialect.name
+        
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            stmt = dialect_insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["date", "category", "status"],
+                set_={
+                    "count": table.c.count + stmt.excluded.count,
+                    "quality_sum": table.c.quality_sum + stmt.excluded.quality_sum,
+                    "execution_time_sum": table.c.execution_time_sum + stmt.excluded.execution_time_sum
+                }
+            )
+            db.execute(stmt)
+            return
+        
+        rollup = db.query(PipelineDailyRollup).filter(
+            PipelineDailyRollup.date == values["date"],
+            PipelineDailyRollup.category == values["category"],
+            PipelineDailyRollup.status == values["status"]
+        ).with_for_update().first()
+        if rollup:
+            rollup.count += values["count"]
+            rollup.quality_sum += values["quality_sum"]
+            rollup.execution_time_sum += values["execution_time_sum"]
+        else:
+            db.add(PipelineDailyRollup(**values))
+    
+    @staticmethod
+    def rebuild(days=None):
+        """
+        Recompute rollups from PipelineLog
+        
+        Args:
+            days: Only rebuild the last N days (default: everything)
+        
+        Returns:
+            Number of rollup rows written
+        """
+        day = func.date(PipelineLog.created_at)
+        query = select(
+            day,
+            func.coalesce(PipelineLog.category, ""),
+            PipelineLog.status,
+            func.count(PipelineLog.id),
+            func.coalesce(func.sum(PipelineLog.quality_score), 0.0),
+            func.coalesce(func.sum(PipelineLog.execution_time), 0.0)
+        ).group_by(day, func.coalesce(PipelineLog.category, ""), PipelineLog.status)
+        clear = delete(PipelineDailyRollup)
+        
+        if days is not None:
+            start = (datetime.now() - timedelta(days=days)).date()
+            query = query.where(PipelineLog.created_at >= start)
+            clear = clear.where(PipelineDailyRollup.date >= start)
+        
+        db = SessionLocal()
+        try:
+            db.execute(clear)
+            result = db.execute(insert(PipelineDailyRollup).from_select(
+                ["date", "category", "status", "count", "quality_sum", "execution_time_sum"],
+                query
+            ))
+            db.commit()
+            logger.info(f"Rebuilt {result.rowcount} daily rollup rows")
+            return result.rowcount
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    @staticmethod
+    def backfill():
+        """Build all rollups on first run, then refresh the last two days"""
+        db = SessionLocal()
+        try:
+            empty = db.query(PipelineDailyRollup.id).first() is None
+        finally:
+            db.close()
+        return MetricsRollup.rebuild(days=None if empty else 2)
+    
+    @staticmethod
+    def get_dashboard_metrics(days=7, top=5):
+        """
+        Dashboard metrics for the last N days, read from the rollup table
+        
+        Returns:
+            Dict with total_processed, success_rate, avg_quality,
+            avg_execution_time, top_categories and daily_trend
+        """
+        start = (datetime.now() - timedelta(days=days)).date()
+        in_window = PipelineDailyRollup.date >= start
+        
+        db = SessionLocal()
+        try:
+            total, quality_sum, time_sum = db.query(
+                func.coalesce(func.sum(PipelineDailyRollup.count), 0),
+                func.coalesce(func.sum(PipelineDailyRollup.quality_sum), 0.0),
+                func.coalesce(func.sum(PipelineDailyRollup.execution_time_sum), 0.0)
+            ).filter(in_window).one()
+            
+            successful = db.query(
+                func.coalesce(func.sum(PipelineDailyRollup.count), 0)
+            ).filter(in_window, PipelineDailyRollup.status == "success").scalar()
+            
+            category_count = func.sum(PipelineDailyRollup.count)
+            categories = db.query(
+                PipelineDailyRollup.category,
+                category_count,
+                func.sum(PipelineDailyRollup.quality_sum)
+            ).filter(in_window).group_by(PipelineDailyRollup.category)\
+                .order_by(category_count.desc()).limit(top).all()
+            
+            daily = db.query(
+                PipelineDailyRollup.date,
+                func.sum(PipelineDailyRollup.count)
+            ).filter(in_window).group_by(PipelineDailyRollup.date)\
+                .order_by(PipelineDailyRollup.date).all()
+        finally:
+            db.close()
+        
+        return {
+            "total_processed": total,
+            "success_rate": successful / total if total > 0 else 0,
+            "avg_quality": quality_sum / total if total > 0 else 0,
+            "avg_execution_time": time_sum / total if total > 0 else 0,
+            "top_categories": [
+                {
+                    "name": name or UNCATEGORIZED,
+                    "count": count,
+                    "percentage": count / total if total > 0 else 0,
+                    "avg_quality": (quality or 0) / count if count > 0 else 0
+                }
+                for name, count, quality in categories
+            ],
+            "daily_trend": [
+                {"date": date.strftime('%Y-%m-%d'), "count": count}
+                for date, count in daily
+            ]
+        }
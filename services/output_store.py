@@ -0,0 +1,136 @@
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import null
+from storage.database import SessionLocal
+from storage.models import PipelineLog, PipelineLogOutput
+from config import PIPELINE_OUTPUT_COMPRESSION_LEVEL, PIPELINE_OUTPUT_MAX_BYTES
+from config import PIPELINE_OUTPUT_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+class OutputStore:
+    """Guarda la salida completa de cada ejecución comprimida y fuera de pipeline_logs.
+
+    Blobs live in pipeline_log_outputs, keyed by log id, so list and
+    aggregate queries over pipeline_logs never read them. Only detail
+    views call load(). The codec column leaves room for other codecs;
+    zlib is used because it ships with Python.
+    """
+
+    @staticmethod
+    def encode(value):
+        """
+        Serialize and compress an output value
+
+        Returns:
+            (codec, payload, size) with size the uncompressed byte count
+        """
+        # Callers pass either the results dict or its JSON text
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        raw = text.encode("utf-8")
+        size = len(raw)
+
+        if size > PIPELINE_OUTPUT_MAX_BYTES:
+            logger.warning(f"Pipeline output of {size} bytes exceeds cap, storing a stub")
+            raw = json.dumps({"truncated": True, "original_size": size}).encode("utf-8")
+
+        return "zlib", zlib.compress(raw, PIPELINE_OUTPUT_COMPRESSION_LEVEL), size
+
+    @staticmethod
+    def decode(codec, payload):
+        """Inverse of encode"""
+        if codec != "zlib":
+            raise ValueError(f"Unsupported output codec: {codec}")
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    @staticmethod
+    def add(db, log_id, value):
+        """Stage the compressed output of a log inside the caller's transaction"""
+        codec, payload, size = OutputStore.encode(value)
+        db.merge(PipelineLogOutput(log_id=log_id, codec=codec, payload=payload, size=size))
+
+    @staticmethod
+    def load(log_id, db=None):
+        """
+        Load the full output of a log
+
+        Falls back to the legacy pipeline_logs.output_json column for rows
+        written before outputs moved to their own table.
+
+        Returns:
+            Decoded output, or None if none is stored (or it expired)
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            row = db.get(PipelineLogOutput, log_id)
+            if row:
+                return OutputStore.decode(row.codec, row.payload)
+
+            legacy = db.query(PipelineLog.output_json).filter(PipelineLog.id == log_id).scalar()
+            if isinstance(legacy, str):
+                try:
+                    return json.loads(legacy)
+                except ValueError:
+                    return legacy
+            return legacy
+        finally:
+            if own_session:
+                db.close()
+
+    @staticmethod
+    def prune(days=PIPELINE_OUTPUT_RETENTION_DAYS, batch_size=1000):
+        """
+        Drop output blobs older than the retention window
+
+        Log rows, metrics and rollups are kept; only the payloads go.
+        Deletes in batches so SQLite never holds the write lock for long.
+
+        Returns:
+            Dict with rows and bytes (uncompressed) removed
+        """
+        if not days:
+            return {"rows": 0, "bytes": 0}
+
+        cutoff = datetime.now() - timedelta(days=days)
+        removed = {"rows": 0, "bytes": 0}
+        db = SessionLocal()
+        try:
+            while True:
+                batch = db.query(PipelineLogOutput.log_id, PipelineLogOutput.size).filter(
+                    PipelineLogOutput.created_at < cutoff
+                ).limit(batch_size).all()
+                if not batch:
+                    break
+                db.query(PipelineLogOutput).filter(
+                    PipelineLogOutput.log_id.in_([log_id for log_id, _ in batch])
+                ).delete(synchronize_session=False)
+                db.commit()
+                removed["rows"] += len(batch)
+                removed["bytes"] += sum(size or 0 for _, size in batch)
+
+            # Legacy inline blobs follow the same policy. SQL NULL, not JSON null,
+            # so the rows drop out of the filter
+            while True:
+                ids = [row[0] for row in db.query(PipelineLog.id).filter(
+                    PipelineLog.created_at < cutoff,
+                    PipelineLog.output_json.isnot(None)
+                ).limit(batch_size).all()]
+                if not ids:
+                    break
+                db.query(PipelineLog).filter(PipelineLog.id.in_(ids)).update(
+                    {PipelineLog.output_json: null()}, synchronize_session=False
+                )
+                db.commit()
+                removed["rows"] += len(ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        logger.info(f"Pruned {removed['rows']} pipeline outputs ({removed['bytes']} bytes)")
+        return removed
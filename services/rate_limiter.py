@@ -0,0 +1,203 @@
+import contextvars
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from config import LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM, LLM_RATE_LIMIT_DB_PATH, LLM_BATCH_RESERVE
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+
+# Lane of the current call chain. Copied into stage/batch worker threads by
+# the executors and read by LLMClient before dispatching to the transport.
+_priority = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority():
+    """Return the LLM priority lane of the current context"""
+    return _priority.get()
+
+
+@contextmanager
+def llm_priority(lane):
+    """Run the enclosed LLM calls in the given priority lane"""
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimiter:
+    """Token bucket de solicitudes/tokens por minuto compartido entre procesos.
+
+    Bucket state lives in a small SQLite file updated under BEGIN IMMEDIATE,
+    so every gunicorn worker and the scheduler draw from the same quota.
+    Interactive callers that have to wait raise a shared flag; batch callers
+    yield while it is set and never dig into the last LLM_BATCH_RESERVE
+    fraction of the bucket.
+    """
+
+    def __init__(self, rpm=LLM_RATE_LIMIT_RPM, tpm=LLM_RATE_LIMIT_TPM,
+                 db_path=LLM_RATE_LIMIT_DB_PATH, batch_reserve=LLM_BATCH_RESERVE):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.db_path = db_path
+        self.batch_reserve = batch_reserve
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._state = {
+            "requests": float(rpm),
+            "tokens": float(tpm),
+            "updated_at": time.time(),
+            "blocked_until": 0.0,
+            "interactive_until": 0.0
+        }
+
+        if self.db_path:
+            try:
+                db = self._db()
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_rate_limit ("
+                    " id INTEGER PRIMARY KEY,"
+                    " requests REAL, tokens REAL, updated_at REAL,"
+                    " blocked_until REAL, interactive_until REAL)"
+                )
+                db.execute(
+                    "INSERT OR IGNORE INTO llm_rate_limit VALUES (1, ?, ?, ?, 0, 0)",
+                    (float(rpm), float(tpm), time.time())
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Shared rate limiter disabled, using per-process bucket: {e}")
+                self.db_path = ""
+
+    @property
+    def enabled(self):
+        return self.rpm > 0 or self.tpm > 0
+
+    def try_acquire(self, tokens, priority=PRIORITY_INTERACTIVE):
+        """
+        Take one request and `tokens` tokens from the bucket if possible
+
+        Returns:
+            0 if granted, otherwise seconds to wait before trying again
+        """
+        if not self.enabled:
+            return 0.0
+        return self._with_state(lambda state: self._take(state, tokens, priority))
+
+    def acquire(self, tokens, priority=PRIORITY_INTERACTIVE):
+        """Block the calling thread until the request fits in the bucket"""
+        while True:
+            wait = self.try_acquire(tokens, priority)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def penalize(self, retry_after):
+        """Pause every lane in every process after an upstream 429"""
+        until = time.time() + retry_after
+
+        def update(state):
+            state["blocked_until"] = max(state["blocked_until"], until)
+            return 0.0
+
+        self._with_state(update)
+
+    def _take(self, state, tokens, priority):
+        now = time.time()
+        elapsed = max(0.0, now - state["updated_at"])
+        state["requests"] = min(float(self.rpm), state["requests"] + elapsed * self.rpm / 60.0)
+        state["tokens"] = min(float(self.tpm), state["tokens"] + elapsed * self.tpm / 60.0)
+        state["updated_at"] = now
+
+        if now < state["blocked_until"]:
+            return state["blocked_until"] - now
+
+        # Never ask for more than a full bucket, or the request could never run
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        reserve = 0.0
+        if priority == PRIORITY_BATCH:
+            if now < state["interactive_until"]:
+                return min(state["interactive_until"] - now, 1.0)
+            reserve = self.batch_reserve
+
+        need_requests = 1 + reserve * self.rpm if self.rpm else 0
+        need_tokens = tokens + reserve * self.tpm if self.tpm else 0
+
+        waits = []
+        if self.rpm and state["requests"] < need_requests:
+            waits.append((need_requests - state["requests"]) * 60.0 / self.rpm)
+        if self.tpm and state["tokens"] < need_tokens:
+            waits.append((need_tokens - state["tokens"]) * 60.0 / self.tpm)
+
+        if waits:
+            wait = max(waits)
+            if priority == PRIORITY_INTERACTIVE:
+                state["interactive_until"] = max(state["interactive_until"], now + wait)
+            return wait
+
+        if self.rpm:
+            state["requests"] -= 1
+        if self.tpm:
+            state["tokens"] -= tokens
+        return 0.0
+
+    def _with_state(self, func):
+        """Apply func to the bucket state atomically (in-process or shared)"""
+        with self._lock:
+            if not self.db_path:
+                return func(self._state)
+
+            try:
+                db = self._db()
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = db.execute(
+                        "SELECT requests, tokens, updated_at, blocked_until, interactive_until "
+                        "FROM llm_rate_limit WHERE id = 1"
+                    ).fetchone()
+                    state = dict(zip(
+                        ("requests", "tokens", "updated_at", "blocked_until", "interactive_until"), row
+                    ))
+                    result = func(state)
+                    db.execute(
+                        "UPDATE llm_rate_limit SET requests = ?, tokens = ?, updated_at = ?, "
+                        "blocked_until = ?, interactive_until = ? WHERE id = 1",
+                        (state["requests"], state["tokens"], state["updated_at"],
+                         state["blocked_until"], state["interactive_until"])
+                    )
+                    db.execute("COMMIT")
+                    return result
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                # Fail open on the local bucket rather than stalling LLM calls
+                logger.warning(f"Shared rate limiter unavailable: {e}")
+                return func(self._state)
+
+    def _db(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide LLM rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
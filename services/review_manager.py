@@ -1,6 +1,8 @@
 from datetime import datetime
 from storage.database import SessionLocal
 from storage.models import PipelineLog
+from storage.pagination import keyset_page
+from services.output_store import OutputStore
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,23 +11,31 @@ class ReviewManager:
     """Gestiona revisiones de artículos antes de publicar"""
     
     @staticmethod
-    def get_pending_reviews(limit=20):
-        """Get articles pending review"""
+    def get_pending_reviews(limit=20, cursor=None, with_cursor=False):
+        """
+        Get articles pending review, newest first
+        
+        Args:
+            limit: Page size
+            cursor: next_cursor of the previous page
+            with_cursor: Also return the cursor of the next page
+        
+        Returns:
+            List of reviews, or (reviews, next_cursor) if with_cursor
+        """
         db = SessionLocal()
         try:
-            logs = db.query(PipelineLog).filter(
-                PipelineLog.status == "pending"
-            ).order_by(
-                PipelineLog.created_at.desc()
-            ).limit(limit).all()
+            query = db.query(PipelineLog).filter(PipelineLog.status == "pending")
+            logs, next_cursor = keyset_page(query, PipelineLog, cursor, limit)
             
-            return [ReviewManager._format_log(log) for log in logs]
+            reviews = [ReviewManager._format_log(log) for log in logs]
+            return (reviews, next_cursor) if with_cursor else reviews
         finally:
             db.close()
     
     @staticmethod
     def get_review_by_id(log_id):
-        """Get specific review"""
+        """Get specific review, including the full pipeline output"""
         db = SessionLocal()
         try:
             log = db.query(PipelineLog).filter(
@@ -33,7 +43,10 @@ class ReviewManager:
             ).first()
             
             if log:
-                return ReviewManager._format_log(log)
+                review = ReviewManager._format_log(log)
+                # Only detail views pay for decompressing the output blob
+                review["output"] = OutputStore.load(log.id, db)
+                return review
             return None
         finally:
             db.close()
@@ -78,18 +91,28 @@ class ReviewManager:
             db.close()
     
     @staticmethod
-    def get_published_articles(limit=50):
-        """Get published articles"""
+    def get_published_articles(limit=50, cursor=None, with_cursor=False):
+        """
+        Get published articles, newest first
+        
+        Args:
+            limit: Page size
+            cursor: next_cursor of the previous page
+            with_cursor: Also return the cursor of the next page
+        
+        Returns:
+            List of articles, or (articles, next_cursor) if with_cursor
+        """
         db = SessionLocal()
         try:
-            logs = db.query(PipelineLog).filter(
+            query = db.query(PipelineLog).filter(
                 PipelineLog.status == "published",
                 PipelineLog.wp_post_id.isnot(None)
-            ).order_by(
-                PipelineLog.created_at.desc()
-            ).limit(limit).all()
+            )
+            logs, next_cursor = keyset_page(query, PipelineLog, cursor, limit)
             
-            return [ReviewManager._format_log(log) for log in logs]
+            articles = [ReviewManager._format_log(log) for log in logs]
+            return (articles, next_cursor) if with_cursor else articles
         finally:
             db.close()
     
@@ -100,7 +123,7 @@ class ReviewManager:
             "id": log.id,
             "user_id": log.user_id,
             "status": log.status,
-            "quality_score": log.output_json.get("quality_score", 0) if log.output_json else 0,
+            "quality_score": log.quality_score or 0,
             "created_at": log.created_at.isoformat() if log.created_at else None,
             "wp_post_id": log.wp_post_id,
             "execution_time": log.execution_time,
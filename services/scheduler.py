@@ -2,7 +2,7 @@ import logging
 import time
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +46,16 @@ class SchedulerService:
             replace_existing=True
         )
         
+        # 4. Back-fill dashboard rollups once at startup
+        SchedulerService._scheduler.add_job(
+            func=SchedulerService.backfill_rollups,
+            trigger='date',
+            run_date=datetime.now(),
+            id='backfill_rollups',
+            name='Back-fill Metric Rollups',
+            replace_existing=True
+        )
+        
         SchedulerService._scheduler.start()
         logger.info("Scheduler started")
         
@@ -68,9 +78,9 @@ class SchedulerService:
             keywords = settings.trend_keywords if settings else ""
             session.close()
             
-            # Force refresh
-            TrendHarvester.fetch_all_trends(force=True, keywords=keywords)
-            logger.info("Scheduled trend update completed")
+            # Refresh the shared cache; other workers skip sources already refreshed
+            refreshed = TrendHarvester.refresh_trends(keywords=keywords)
+            logger.info(f"Scheduled trend update completed: {', '.join(refreshed) or 'nothing due'}")
             
         except Exception as e:
             logger.error(f"Error in trend update job: {e}")
@@ -80,7 +90,9 @@ class SchedulerService:
         """Generate articles based on trends"""
         try:
             from services.trend_harvester import TrendHarvester
+            from services.trend_sources.rss_feeds import RssFeedSource
             from services.article_generator import ArticleGenerator
+            from services.rate_limiter import llm_priority, PRIORITY_BATCH
             from storage.database import get_db_session
             from storage.models import Settings, PipelineLog
             
@@ -100,6 +112,10 @@ class SchedulerService:
             
             # 2. Get Trends
             trends = TrendHarvester.fetch_all_trends(limit=5, keywords=keywords)
+            # Only RSS stories this worker has not offered before, so the same
+            # item is not written up again every run (unchanged feeds cost a 304)
+            keyword_list = [k.strip() for k in keywords.split(',')] if keywords else []
+            trends["rss_feeds"] = RssFeedSource.fetch(limit=5, keywords=keyword_list, only_new=True)
             flat_trends = TrendHarvester.flatten_trends(trends, limit=5)
             
             if not flat_trends:
@@ -111,8 +127,10 @@ class SchedulerService:
             top_trend = flat_trends[0]
             
             # 4. Generate Article
+            # Scheduled work yields LLM quota to interactive requests
             generator = ArticleGenerator()
-            result = generator.generate_from_trend(top_trend, auto_publish=auto_publish)
+            with llm_priority(PRIORITY_BATCH):
+                result = generator.generate_from_trend(top_trend, auto_publish=auto_publish)
             
             if result.get('status') == 'success':
                 logger.info(f"Article generated successfully: {top_trend.get('title')}")
@@ -124,13 +142,40 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Error in article generation job: {e}")
 
+    @staticmethod
+    def backfill_rollups(lease=True):
+        """Rebuild dashboard rollups (everything the first time, then recent days)"""
+        try:
+            from services.metrics_rollup import MetricsRollup
+            from storage.database import engine
+            from storage.leases import try_acquire_lease
+            
+            # Runs at startup in every gunicorn worker; one full rebuild is enough
+            if lease and not try_acquire_lease(engine, "backfill_rollups", timedelta(hours=1)):
+                logger.info("Metric rollups already back-filled by another worker, skipping")
+                return
+            MetricsRollup.backfill()
+        except Exception as e:
+            logger.error(f"Error back-filling metric rollups: {e}")
+
     @staticmethod
     def daily_maintenance():
-        """Cleanup logs etc"""
+        """Refresh rollups, apply retention and compact the database (one worker per day)"""
         try:
+            from config import MAINTENANCE_LEASE_HOURS
+            from storage.database import engine
+            from storage.leases import try_acquire_lease
+            
+            # Every gunicorn worker has its own scheduler; only the lease holder runs
+            if not try_acquire_lease(engine, "daily_maintenance", timedelta(hours=MAINTENANCE_LEASE_HOURS)):
+                logger.info("Daily maintenance already run by another worker, skipping")
+                return None
+            
             logger.info("Running daily maintenance...")
-            # Cleanup old logs, etc.
-            pass
+            # Already the only worker running this, under its own lease
+            SchedulerService.backfill_rollups(lease=False)
+            from services.maintenance import MaintenanceService
+            return MaintenanceService.run()
         except Exception as e:
             logger.error(f"Error in maintenance job: {e}")
 
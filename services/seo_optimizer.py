@@ -1,12 +1,16 @@
 import re
 import logging
 from services.llm_client import LLMClient
+from config import PIPELINE_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class SEOOptimizer:
     """Optimiza para SEO: H1, H2, H3, metadescripción, densidad, etc"""
     
+    H1_MAX_LENGTH = 60  # Limits asked for in the prompts
+    META_MAX_LENGTH = 160
+    
     def __init__(self):
         self.llm = LLMClient()
     
@@ -23,13 +27,18 @@ class SEOOptimizer:
         """
         logger.info("Starting SEO optimization")
         
-        # Parallelize these if possible in future, for now sequential
+        combined = {}
+        if PIPELINE_CONFIG.get("seo_single_request", True):
+            combined = self._generate_all(text)
+        
+        # Any artifact missing from the combined response falls back to
+        # its dedicated single-field request
         results = {
             "optimized_text": text,
-            "h1": self._generate_h1(text),
-            "h2_suggestions": self._generate_h2_suggestions(text),
-            "meta_description": self._generate_meta_description(text),
-            "schema_markup": self._generate_schema_markup(text),
+            "h1": combined.get("h1") or self._generate_h1(text),
+            "h2_suggestions": combined.get("h2_suggestions") or self._generate_h2_suggestions(text),
+            "meta_description": combined.get("meta_description") or self._generate_meta_description(text),
+            "schema_markup": combined.get("schema_markup") or self._generate_schema_markup(text),
             "keyword_density": self._analyze_keyword_density(text, primary_entity),
             "seo_recommendations": []
         }
@@ -39,6 +48,64 @@ class SEOOptimizer:
         logger.info("SEO optimization completed")
         return results
     
+    def _generate_all(self, text):
+        """Generate H1, H2s, meta description and schema in one JSON request"""
+        system_prompt = """You are an SEO editor for a news site. From the article text, produce:
+        - h1: compelling, SEO-friendly heading under 60 characters that includes the main topic
+        - h2_suggestions: list of 3-4 logical H2 subheadings (strings)
+        - meta_description: compelling meta description, maximum 160 characters, with relevant keywords
+        - schema_markup: valid JSON-LD Schema.org 'NewsArticle' object with headline,
+          datePublished and dateModified (current ISO datetime if not found), description
+          and articleBody (first 100 chars...)
+        
+        Return only valid JSON with keys: h1, h2_suggestions, meta_description, schema_markup"""
+        
+        user_prompt = f"""Generate the SEO artifacts for this text:
+
+{text[:1500]}"""
+        
+        try:
+            response = self.llm.generate_json(user_prompt, system_prompt)
+        except Exception as e:
+            logger.error(f"Error in combined SEO request: {e}")
+            return {}
+        
+        if not isinstance(response, dict) or "error" in response:
+            logger.warning("Invalid combined SEO response, using per-field requests")
+            return {}
+        
+        # Each field is checked on its own; one that fails is left out so
+        # only that artifact falls back to its single-field request
+        combined = {}
+        
+        h1 = response.get("h1")
+        if isinstance(h1, str):
+            h1 = h1.strip().strip('"')
+            if h1 and len(h1) <= self.H1_MAX_LENGTH:
+                combined["h1"] = h1
+        
+        h2_list = response.get("h2_suggestions")
+        if isinstance(h2_list, list):
+            h2_list = [h.strip() for h in h2_list if isinstance(h, str) and h.strip()]
+            if h2_list:
+                combined["h2_suggestions"] = [{"suggestion": h} for h in h2_list]
+        
+        meta = response.get("meta_description")
+        if isinstance(meta, str):
+            meta = meta.strip()
+            if meta and len(meta) <= self.META_MAX_LENGTH:
+                combined["meta_description"] = meta
+        
+        schema = response.get("schema_markup")
+        if isinstance(schema, dict) and schema:
+            combined["schema_markup"] = schema
+        
+        rejected = {"h1", "h2_suggestions", "meta_description", "schema_markup"} - set(combined)
+        if rejected:
+            logger.warning(f"Combined SEO response missing or invalid: {', '.join(sorted(rejected))}")
+        
+        return combined
+    
     def _generate_h1(self, text):
         """Generate optimal H1 heading"""
         system_prompt = """Generate a compelling, SEO-friendly H1 heading for this news article.
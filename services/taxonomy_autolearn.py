@@ -1,16 +1,21 @@
 import json
 import os
 import logging
+import tempfile
+import threading
 from datetime import datetime, timedelta
 from collections import defaultdict
+from config import TAXONOMY_AUTOLEARN_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class TaxonomyAutolearn:
     """Taxonomía completamente adaptativa con aprendizaje automático diario"""
     
-    def __init__(self, profile_file="taxonomy_profile.json"):
-        self.profile_file = profile_file
+    def __init__(self, profile_file=None):
+        self.profile_file = profile_file or TAXONOMY_AUTOLEARN_CONFIG["profile_file"]
+        # One instance is shared by concurrent pipeline runs (run_many, job workers)
+        self._lock = threading.RLock()
         self.profile = self._load_profile()
     
     def _load_profile(self):
@@ -50,6 +55,13 @@ class TaxonomyAutolearn:
         """
         logger.info("Learning from new article")
         
+        with self._lock:
+            self._learn(article_categories, article_tags, traffic_score)
+            self._save_profile()
+        logger.info("Learning completed and profile saved")
+    
+    def _learn(self, article_categories, article_tags, traffic_score):
+        """Update the in-memory profile; caller holds the lock"""
         # Update category statistics
         for cat in article_categories:
             cat_lower = cat.lower()
@@ -83,9 +95,6 @@ class TaxonomyAutolearn:
         
         # Update counters
         self.profile["statistics"]["total_articles"] += 1
-        
-        self._save_profile()
-        logger.info("Learning completed and profile saved")
     
     def _learn_associations(self, categories, tags):
         """Learn relationships between categories and tags"""
@@ -104,6 +113,10 @@ class TaxonomyAutolearn:
         """Discover new synonyms based on co-occurrence patterns"""
         logger.info("Discovering potential synonyms")
         
+        with self._lock:
+            return self._discover_synonyms()
+    
+    def _discover_synonyms(self):
         synonyms = {}
         categories = self.profile["categories"]
         
@@ -175,6 +188,10 @@ class TaxonomyAutolearn:
         """Automatically merge very similar categories"""
         logger.info("Checking for categories to merge")
         
+        with self._lock:
+            return self._merge_similar_categories()
+    
+    def _merge_similar_categories(self):
         merges = []
         cat_list = list(self.profile["categories"].keys())
         
@@ -207,15 +224,23 @@ class TaxonomyAutolearn:
         del self.profile["categories"][source]
     
     def _save_profile(self):
-        """Save profile to file"""
-        self.profile["last_update"] = datetime.now().isoformat()
-        
-        try:
-            with open(self.profile_file, 'w', encoding='utf-8') as f:
-                json.dump(self.profile, f, indent=2, ensure_ascii=False)
-            logger.info(f"Profile saved to {self.profile_file}")
-        except Exception as e:
-            logger.error(f"Error saving profile: {e}")
+        """Save profile to file (written to a temp file, then swapped in)"""
+        with self._lock:
+            self.profile["last_update"] = datetime.now().isoformat()
+            
+            tmp_path = None
+            try:
+                directory = os.path.dirname(os.path.abspath(self.profile_file))
+                fd, tmp_path = tempfile.mkstemp(prefix=".taxonomy_profile-", suffix=".tmp", dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.profile, f, indent=2, ensure_ascii=False)
+                # Readers see the old file or the new one, never a torn write
+                os.replace(tmp_path, self.profile_file)
+                logger.info(f"Profile saved to {self.profile_file}")
+            except Exception as e:
+                logger.error(f"Error saving profile: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
     
     def get_profile_summary(self):
         """Get summary of learned taxonomy"""
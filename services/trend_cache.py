@@ -0,0 +1,169 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from config import TRENDS_CACHE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class TrendCache:
+    """Caché de tendencias compartida entre workers.
+
+    Entries live in a small SQLite file opened by every gunicorn worker, so
+    a source fetched by one worker is served to all of them. Each entry also
+    carries a refresh lease taken under BEGIN IMMEDIATE: only the worker
+    holding it revalidates a stale entry, the rest keep serving the old
+    data. A lease that is never released (crashed worker) simply expires.
+    """
+
+    def __init__(self, db_path=TRENDS_CACHE_DB_PATH):
+        self.db_path = db_path
+        self._memory = {}  # key -> {"value", "fetched_at", "refreshing_until"}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        if self.db_path:
+            try:
+                self._db().execute(
+                    "CREATE TABLE IF NOT EXISTS trend_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT,"
+                    " fetched_at REAL,"
+                    " refreshing_until REAL NOT NULL DEFAULT 0)"
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Shared trend cache disabled, using per-process cache: {e}")
+                self.db_path = ""
+
+    def get(self, key):
+        """
+        Return the cached value and when it was fetched
+
+        Returns:
+            (value, fetched_at) tuple, or (None, None) if nothing is cached
+        """
+        if not self.db_path:
+            with self._lock:
+                entry = self._memory.get(key)
+                if not entry or entry["value"] is None:
+                    return None, None
+                return entry["value"], entry["fetched_at"]
+
+        try:
+            row = self._db().execute(
+                "SELECT value, fetched_at FROM trend_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row or row[0] is None:
+                return None, None
+            return json.loads(row[0]), row[1]
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Trend cache read failed: {e}")
+            return None, None
+
+    def set(self, key, value):
+        """Store a freshly fetched value and release the refresh lease"""
+        now = time.time()
+        if not self.db_path:
+            with self._lock:
+                self._memory[key] = {"value": value, "fetched_at": now, "refreshing_until": 0.0}
+            return
+
+        try:
+            self._db().execute(
+                "INSERT INTO trend_cache (key, value, fetched_at, refreshing_until) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "fetched_at = excluded.fetched_at, refreshing_until = 0",
+                (key, json.dumps(value, ensure_ascii=False), now)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Trend cache write failed: {e}")
+
+    def try_lock(self, key, lease):
+        """
+        Take the refresh lease of an entry for `lease` seconds
+
+        Returns:
+            True if this caller should refresh, False if someone else is
+        """
+        now = time.time()
+        if not self.db_path:
+            with self._lock:
+                entry = self._memory.setdefault(
+                    key, {"value": None, "fetched_at": None, "refreshing_until": 0.0}
+                )
+                if entry["refreshing_until"] > now:
+                    return False
+                entry["refreshing_until"] = now + lease
+                return True
+
+        try:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT refreshing_until FROM trend_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    db.execute("ROLLBACK")
+                    return False
+                db.execute(
+                    "INSERT INTO trend_cache (key, refreshing_until) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET refreshing_until = excluded.refreshing_until",
+                    (key, now + lease)
+                )
+                db.execute("COMMIT")
+                return True
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Refreshing twice is better than never refreshing
+            logger.warning(f"Trend cache lock failed: {e}")
+            return True
+
+    def release(self, key):
+        """Give up the refresh lease without storing a value (fetch failed)"""
+        if not self.db_path:
+            with self._lock:
+                if key in self._memory:
+                    self._memory[key]["refreshing_until"] = 0.0
+            return
+
+        try:
+            self._db().execute("UPDATE trend_cache SET refreshing_until = 0 WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning(f"Trend cache release failed: {e}")
+
+    def clear(self):
+        """Empty the cache"""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            try:
+                self._db().execute("DELETE FROM trend_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"Trend cache clear failed: {e}")
+
+    def _db(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_trend_cache():
+    """Return the process-wide trend cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TrendCache()
+        return _cache
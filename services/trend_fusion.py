@@ -0,0 +1,234 @@
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import List, Dict, Any
+from dateutil import parser as date_parser
+from unidecode import unidecode
+from config import TRENDS_FUSION_THRESHOLD, TRENDS_FUSION_HALF_LIFE
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Spanish and English function words; they say nothing about the topic
+STOPWORDS = frozenset("""
+a al ante con contra de del desde durante e el en entre es esta este esto hacia hasta la las le les
+lo los mas mientras ni o para pero por que quien se segun sin sobre su sus tras un una uno unos unas
+y ya como cuando donde fue han hay ser son sera muy tambien
+an and are as at be by for from has have in is it its of on or that the their this to was were will
+with after over new how what why who
+""".split())
+
+
+class TrendFusion:
+    """Fusión de tendencias entre fuentes.
+
+    Titles are reduced to sets of normalized tokens (no accents, no
+    stopwords, crude plural folding) and grouped with an inverted index:
+    each item is only compared with items sharing a token. Words found in
+    more than MAX_POSTINGS titles are indexed by pairs instead, so two
+    titles sharing two of them still meet while the work grows
+    near-linearly with the number of items. Only a pair itself shared by
+    more than MAX_POSTINGS titles stops producing candidates (and, with a
+    threshold of 0.5 or less, one frequent word in common is not enough
+    to be compared). Two items are
+    merged when their token sets are similar (Jaccard) or one title is
+    contained in the other ("Elecciones 2026" in "Elecciones 2026: lo que
+    hay que saber").
+
+    Per-source scores are not comparable, so clusters are ranked with
+    reciprocal rank fusion over each source's own ordering (every source
+    reporting the cluster adds to it), decayed by the age of the newest
+    item. Clusters matching more of the editors' keywords rank higher.
+    """
+
+    RANK_OFFSET = 60  # Usual RRF constant; damps the gap between ranks 1 and 2
+    KEYWORD_WEIGHT = 0.25  # Score bonus per distinct keyword the cluster matched
+    CONTAINMENT = 0.8  # Share of the shorter title found in the longer one
+    MAX_POSTINGS = 32
+
+    @staticmethod
+    def tokens(text: str) -> frozenset:
+        """Normalized topic tokens of a title"""
+        result = set()
+        for token in _TOKEN_RE.findall(unidecode(text or "").lower()):
+            if token in STOPWORDS:
+                continue
+            if not token.isdigit():
+                if len(token) < 2:
+                    continue
+                # elecciones/eleccion, presidentes/presidente -> same token
+                if len(token) > 4 and token.endswith("s"):
+                    token = token[:-1]
+                if len(token) > 4 and token.endswith("e"):
+                    token = token[:-1]
+            result.add(token)
+        return frozenset(result)
+
+    @staticmethod
+    def is_similar(a: frozenset, b: frozenset, threshold: float = TRENDS_FUSION_THRESHOLD) -> bool:
+        """Whether two token sets describe the same trend"""
+        return TrendFusion._similar_counts(len(a), len(b), len(a & b), threshold)
+
+    @staticmethod
+    def _similar_counts(size_a, size_b, common, threshold):
+        if not common:
+            return False
+        if common / (size_a + size_b - common) >= threshold:
+            return True
+        # One-word titles only merge on an exact match
+        shorter = min(size_a, size_b)
+        return shorter >= 2 and common / shorter >= TrendFusion.CONTAINMENT
+
+    @staticmethod
+    def cluster(token_sets: List[frozenset], threshold: float = TRENDS_FUSION_THRESHOLD) -> List[List[int]]:
+        """
+        Group near-duplicate items
+
+        Args:
+            token_sets: Token set of each item
+            threshold: Minimum Jaccard similarity to merge
+
+        Returns:
+            Lists of item indexes, in order of first appearance
+        """
+        parent = list(range(len(token_sets)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            if i != j:
+                parent[max(i, j)] = min(i, j)
+
+        # Words in more than MAX_POSTINGS titles are indexed by pairs instead
+        frequency = Counter(token for tokens in set(token_sets) for token in tokens)
+        frequent = {token for token, count in frequency.items() if count > TrendFusion.MAX_POSTINGS}
+
+        exact = {}
+        postings = {}  # rare token -> every item having it
+        pair_postings = {}  # (frequent token, frequent token) -> first MAX_POSTINGS items having both
+        for i, tokens in enumerate(token_sets):
+            # Identical token sets merge without comparisons
+            if tokens in exact:
+                union(i, exact[tokens])
+                continue
+            exact[tokens] = i
+
+            # Count shared tokens per candidate instead of intersecting sets
+            shared = {}
+            common = [token for token in tokens if token in frequent]
+            for token in tokens:
+                if token in frequent:
+                    continue
+                bucket = postings.setdefault(token, [])
+                for j in bucket:
+                    shared[j] = shared.get(j, 0) + 1
+                bucket.append(i)
+
+            paired = set()
+            for pair in combinations(sorted(common), 2):
+                bucket = pair_postings.setdefault(pair, [])
+                paired.update(bucket)
+                if len(bucket) < TrendFusion.MAX_POSTINGS:
+                    bucket.append(i)
+            for j in paired.difference(shared):
+                shared[j] = 0
+            common = frozenset(common)
+
+            for j, count in shared.items():
+                if common:
+                    count += len(common & token_sets[j])
+                # Above 0.5 one shared token only matches identical one-token titles
+                if (count > 1 or threshold <= 0.5) and TrendFusion._similar_counts(len(tokens), len(token_sets[j]), count, threshold):
+                    union(i, j)
+
+        groups = {}
+        for i in range(len(token_sets)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    @staticmethod
+    def fuse(all_trends: Dict[str, List[Dict[str, Any]]], threshold: float = TRENDS_FUSION_THRESHOLD,
+             half_life: float = TRENDS_FUSION_HALF_LIFE, now: datetime = None) -> List[Dict[str, Any]]:
+        """
+        Merge near-duplicate trends across sources and rank the clusters
+
+        Args:
+            all_trends: Dict of source name to trends, each list in that source's order
+            threshold: Minimum Jaccard similarity to merge
+            half_life: Hours after which a trend's score is halved (0 disables decay)
+            now: Reference time for recency (default: now)
+
+        Returns:
+            One trend per cluster, best first. Each is the best-ranked item
+            of its cluster plus "fused_score", "sources" (source names that
+            reported it), "related" (items merged into it) and, when trends
+            were filtered by keyword, every "keyword_hits" of the cluster.
+        """
+        now = now or datetime.now(timezone.utc)
+        items = []  # (source, rank, trend)
+        for source, trends in all_trends.items():
+            for rank, trend in enumerate(trends or []):
+                items.append((source, rank, trend))
+        if not items:
+            return []
+
+        token_sets = []
+        for _, _, trend in items:
+            title = trend.get("title", "")
+            # Titles made only of stopwords still dedupe exactly
+            token_sets.append(TrendFusion.tokens(title) or frozenset([title.strip().lower()]))
+
+        fused = []
+        for group in TrendFusion.cluster(token_sets, threshold):
+            best_rank = {}
+            keyword_hits = {}
+            newest = None
+            for i in group:
+                source, rank, trend = items[i]
+                best_rank[source] = min(rank, best_rank.get(source, rank))
+                keyword_hits.update(dict.fromkeys(trend.get("keyword_hits") or []))
+                published = TrendFusion._parse_time(trend.get("timestamp"))
+                if published is not None and (newest is None or published > newest):
+                    newest = published
+
+            score = sum(1.0 / (TrendFusion.RANK_OFFSET + rank + 1) for rank in best_rank.values())
+            score *= 1 + TrendFusion.KEYWORD_WEIGHT * len(keyword_hits)
+            if half_life and newest is not None:
+                age_hours = max(0.0, (now - newest).total_seconds() / 3600)
+                score *= 0.5 ** (age_hours / half_life)
+
+            lead = min(group, key=lambda i: (items[i][1], -len(items[i][2].get("summary") or "")))
+            trend = dict(items[lead][2])
+            trend["fused_score"] = round(score, 6)
+            trend["sources"] = list(best_rank)
+            trend["related"] = len(group) - 1
+            if keyword_hits:
+                trend["keyword_hits"] = list(keyword_hits)
+            fused.append(trend)
+
+        fused.sort(key=lambda x: x["fused_score"], reverse=True)
+        return fused
+
+    @staticmethod
+    def _parse_time(value):
+        """Parse ISO or RFC 822 timestamps to aware UTC datetimes; None if unknown"""
+        if not value or not isinstance(value, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = date_parser.parse(value)
+            except (ValueError, OverflowError):
+                return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
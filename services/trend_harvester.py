@@ -1,103 +1,253 @@
 import logging
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Dict, Any
 from services.trend_sources.google_trends import GoogleTrendsSource
 from services.trend_sources.twitter_x import TwitterSource
 from services.trend_sources.news_api import NewsApiSource
 from services.trend_sources.rss_feeds import RssFeedSource
 from services.trend_sources.serpapi import SerpApiSource
+from services.trend_cache import get_trend_cache
+from services.trend_fusion import TrendFusion
+from services.keyword_matcher import get_keyword_matcher
+from config import TRENDS_FETCH_WORKERS, TRENDS_SOURCE_TIMEOUT, TRENDS_FETCH_BUDGET
+from config import TRENDS_MAX_RESULTS, TRENDS_CACHE_MAX_STALE, TRENDS_REFRESH_LEASE
 
 logger = logging.getLogger(__name__)
 
+# Shared by every call: a source that overruns its deadline keeps its
+# thread until it returns, and its late result still lands in the cache
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRENDS_FETCH_WORKERS, thread_name_prefix="trend-source")
+        return _executor
+
 class TrendHarvester:
     """Aggregate trends from multiple real sources"""
 
-    # Default cache to store results
-    _cache = {}
+    # Cached trends are shared by all workers (see TrendCache). Past the TTL
+    # they are still served while one worker refreshes them in background.
     _cache_ttl = 10800  # 3 hours (was 1 hour)
 
     @staticmethod
-    def _is_cached_valid(source: str, ttl: int = None) -> bool:
+    def _sources() -> Dict[str, Any]:
+        return {
+            "google_trends": GoogleTrendsSource,
+            "twitter": TwitterSource,
+            "newsapi": NewsApiSource,
+            "rss_feeds": RssFeedSource,
+            "serpapi": SerpApiSource
+        }
+
+    @staticmethod
+    def _cache_key(source: str, keyword_list: List[str]) -> str:
+        """Cache entries are per source and keyword filter"""
+        return source + "|" + ",".join(sorted({k.lower() for k in keyword_list if k}))
+
+    @staticmethod
+    def _is_cached_valid(source: str, ttl: int = None, keywords: List[str] = None) -> bool:
         """Check if cache for a source is still valid"""
         if ttl is None:
             ttl = TrendHarvester._cache_ttl
         
-        cached = TrendHarvester._cache.get(source, {})
-        if not cached or "timestamp" not in cached:
+        _, fetched_at = get_trend_cache().get(TrendHarvester._cache_key(source, keywords or []))
+        if fetched_at is None:
             return False
         
-        age = time.time() - cached["timestamp"]
+        age = time.time() - fetched_at
         return age < ttl
 
     @staticmethod
     def _filter_trends_by_keywords(trends: List[Dict[str, Any]], keywords: List[str]) -> List[Dict[str, Any]]:
-        """Filter trends based on keywords"""
-        if not keywords:
+        """Filter trends based on keywords, recording the keywords each one matched"""
+        matcher = get_keyword_matcher(keywords)
+        if not matcher:
             return trends
-            
-        keyword_set = {k.lower() for k in keywords}
-        filtered = []
         
+        filtered = []
         for trend in trends:
-            title = trend.get('title', '').lower()
-            summary = trend.get('summary', '').lower()
-            
-            if any(keyword in title or keyword in summary for keyword in keyword_set):
+            hits = matcher.matches(trend.get('title', '') + "\n" + (trend.get('summary') or ''))
+            if hits:
+                trend["keyword_hits"] = hits
                 filtered.append(trend)
         return filtered
 
+    @staticmethod
+    def _fetch_source(source_name: str, source_class, limit: int, keyword_list: List[str]) -> List[Dict[str, Any]]:
+        """Fetch one source, filter it and update its cache entry"""
+        key = TrendHarvester._cache_key(source_name, keyword_list)
+        try:
+            # Fetch enough for any page size, plus more to allow for filtering
+            trends = source_class.fetch(
+                limit=max(limit, TRENDS_MAX_RESULTS) + len(keyword_list) * 2, keywords=keyword_list
+            )
+            
+            if keyword_list:
+                trends = TrendHarvester._filter_trends_by_keywords(trends, keyword_list)
+        except Exception:
+            get_trend_cache().release(key)
+            raise
+        
+        # Update cache
+        get_trend_cache().set(key, trends)
+        return trends
+
+    @staticmethod
+    def _revalidate(source_name: str, source_class, limit: int, keyword_list: List[str]):
+        """Refresh a stale entry in background unless another worker already is"""
+        key = TrendHarvester._cache_key(source_name, keyword_list)
+        if not get_trend_cache().try_lock(key, TRENDS_REFRESH_LEASE):
+            return
+        
+        def refresh():
+            try:
+                TrendHarvester._fetch_source(source_name, source_class, limit, keyword_list)
+            except Exception as e:
+                logger.error(f"Error refreshing trends from {source_name}: {e}")
+        
+        _get_executor().submit(refresh)
+
+    @staticmethod
+    def refresh_trends(keywords: str = '', sources: List[str] = None) -> List[str]:
+        """
+        Refresh cache entries that are missing or past half their TTL
+        
+        Meant for the periodic job. Every worker may run it; the refresh
+        lease makes sure each source is fetched upstream only once.
+        
+        Returns:
+            Names of the sources refreshed by this call
+        """
+        keyword_list = [k.strip() for k in keywords.split(',')] if keywords else []
+        refreshed = []
+        
+        for source_name, source_class in TrendHarvester._sources().items():
+            if sources is not None and source_name not in sources:
+                continue
+            if TrendHarvester._is_cached_valid(source_name, TrendHarvester._cache_ttl / 2, keyword_list):
+                continue
+            if not get_trend_cache().try_lock(TrendHarvester._cache_key(source_name, keyword_list), TRENDS_REFRESH_LEASE):
+                continue
+            try:
+                TrendHarvester._fetch_source(source_name, source_class, TRENDS_MAX_RESULTS, keyword_list)
+                refreshed.append(source_name)
+            except Exception as e:
+                logger.error(f"Error refreshing trends from {source_name}: {e}")
+        
+        return refreshed
+
     @staticmethod
     def fetch_all_trends(limit: int = 20, sources: List[str] = None, 
-                        force: bool = False, keywords: str = '') -> Dict[str, List[Dict[str, Any]]]:
-        """Fetch trends from all enabled sources and combine them"""
+                        force: bool = False, keywords: str = '',
+                        timeout: float = None, budget: float = None,
+                        with_status: bool = False):
+        """
+        Fetch trends from all enabled sources concurrently and combine them
         
-        all_sources_map = {
-            "google_trends": GoogleTrendsSource,
-            "twitter": TwitterSource,
-            "newsapi": NewsApiSource,
-            "rss_feeds": RssFeedSource,
-            "serpapi": SerpApiSource
-        }
+        Cached sources (fresh or stale) are returned at once; only sources
+        with nothing cached are fetched here. Each runs in its own worker and
+        gets `timeout` seconds from when it actually starts (time spent
+        waiting for a free worker does not count); the call returns after
+        at most `budget` seconds with whatever finished. A failing or slow
+        source never holds up the others.
+        
+        Args:
+            limit: Max trends per source
+            sources: Source names (default: all)
+            force: Fetch upstream instead of reading the cache
+            keywords: Comma-separated keyword filter
+            timeout: Per-source deadline (default TRENDS_SOURCE_TIMEOUT)
+            budget: Overall deadline (default TRENDS_FETCH_BUDGET)
+            with_status: Also return which sources timed out or failed
+        
+        Returns:
+            Dict of source name to trends, or (trends, status) if with_status,
+            status being {"timed_out": [...], "failed": [...]}
+        """
+        
+        all_sources_map = TrendHarvester._sources()
         
         keyword_list = [k.strip() for k in keywords.split(',')] if keywords else []
         if sources is None:
             sources = list(all_sources_map.keys())
-        
-        if force:
-            TrendHarvester._cache.clear()
+        timeout = TRENDS_SOURCE_TIMEOUT if timeout is None else timeout
+        budget = TRENDS_FETCH_BUDGET if budget is None else budget
         
         results = {}
+        status = {"timed_out": [], "failed": []}
+        futures = {}
+        started = time.monotonic()
+        budget_deadline = started + budget
+        started_at = {}  # source name -> when a worker picked it up
+        
+        def run(source_name, *args):
+            started_at[source_name] = time.monotonic()
+            return TrendHarvester._fetch_source(source_name, *args)
         
         for source_name in sources:
             if source_name not in all_sources_map:
                 continue
                 
-            # Check cache unless forced
-            if not force and TrendHarvester._is_cached_valid(source_name):
-                 results[source_name] = TrendHarvester._cache[source_name]["data"][:limit]
-                 continue
+            # Serve from cache unless forced; stale entries too, while refreshing
+            if not force:
+                data, fetched_at = get_trend_cache().get(TrendHarvester._cache_key(source_name, keyword_list))
+                age = time.time() - fetched_at if fetched_at is not None else None
+                if data is not None and age < TRENDS_CACHE_MAX_STALE:
+                    results[source_name] = data[:limit]
+                    if age >= TrendHarvester._cache_ttl:
+                        TrendHarvester._revalidate(source_name, all_sources_map[source_name], limit, keyword_list)
+                    continue
             
-            try:
-                # Fetch new data
-                source_class = all_sources_map[source_name]
-                # Fetch more to allow for filtering
-                trends = source_class.fetch(limit=limit + len(keyword_list) * 2, keywords=keyword_list)
-                
-                if keyword_list:
-                    trends = TrendHarvester._filter_trends_by_keywords(trends, keyword_list)
-                
-                # Update cache
-                TrendHarvester._cache[source_name] = {
-                    "data": trends,
-                    "timestamp": time.time()
-                }
-                
-                results[source_name] = trends[:limit]
-            except Exception as e:
-                logger.error(f"Error fetching trends from {source_name}: {e}")
-                # Continue to next source instead of failing completely
+            future = _get_executor().submit(
+                run, source_name, all_sources_map[source_name], limit, keyword_list
+            )
+            futures[future] = source_name
+        
+        def deadline(future):
+            begun = started_at.get(futures[future])
+            return budget_deadline if begun is None else min(begun + timeout, budget_deadline)
+        
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for future in [f for f in pending if not f.done() and now >= deadline(f)]:
+                pending.discard(future)
+                source_name = futures[future]
+                begun = started_at.get(source_name)
+                if begun is None:
+                    # Not started yet (pool busy): drop it rather than run it late
+                    future.cancel()
+                    logger.warning(f"Trend source {source_name} never started within the {budget}s budget")
+                else:
+                    logger.warning(f"Trend source {source_name} timed out after {now - begun:.1f}s")
+                status["timed_out"].append(source_name)
+            if not pending:
+                break
+            
+            remaining = min(deadline(f) for f in pending) - now
+            if any(futures[f] not in started_at for f in pending):
+                # A queued source gets its own deadline once it starts
+                remaining = min(remaining, 0.05)
+            done, pending = wait(pending, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            for future in done:
+                source_name = futures[future]
+                try:
+                    results[source_name] = future.result()[:limit]
+                except Exception as e:
+                    logger.error(f"Error fetching trends from {source_name}: {e}")
+                    # Continue with the other sources instead of failing completely
+                    status["failed"].append(source_name)
         
-        return results
+        # Keep the caller's source order
+        results = {name: results[name] for name in sources if name in results}
+        return (results, status) if with_status else results
 
     @staticmethod
     def fetch_trends_realtime(limit: int = 20) -> List[Dict[str, Any]]:
@@ -107,17 +257,5 @@ class TrendHarvester:
 
     @staticmethod
     def flatten_trends(all_trends: Dict[str, List[Dict[str, Any]]], limit: int = 20) -> List[Dict[str, Any]]:
-        """Flatten and sort all trends from multiple sources by score"""
-        flattened = []
-        seen_titles = set()
-        
-        for source, trends in all_trends.items():
-            for trend in trends:
-                title_lower = trend.get("title", "").lower()
-                if title_lower not in seen_titles:
-                    flattened.append(trend)
-                    seen_titles.add(title_lower)
-        
-        # Sort by score descending
-        flattened.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return flattened[:limit]
+        """Merge near-duplicate trends across sources and rank them (see TrendFusion)"""
+        return TrendFusion.fuse(all_trends)[:limit]
@@ -1,64 +1,166 @@
 import logging
+import threading
 import time
 import feedparser
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any
+from services.keyword_matcher import get_keyword_matcher
 
 logger = logging.getLogger(__name__)
 
 class RssFeedSource:
+    """RSS/Atom feeds downloaded in parallel over one pooled session.
+
+    Each feed's ETag/Last-Modified is kept and sent back, so an unchanged
+    feed costs a 304 and no parsing; its last parsed entries are reused.
+    Entry GUIDs returned to an only_new caller are remembered per feed,
+    so the next only_new call skips them; plain fetches neither skip nor
+    record anything (they still flag each entry as "new" or not).
+    """
+
+    _session = None
+    _feeds = {}  # url -> {"etag", "modified", "title", "entries", "seen"}
+    _lock = threading.Lock()
+
     @staticmethod
-    def fetch(limit: int = 10, keywords: list = None) -> List[Dict[str, Any]]:
+    def fetch(limit: int = 10, keywords: list = None, only_new: bool = False) -> List[Dict[str, Any]]:
         try:
-            from config import RSS_FEEDS_ENABLED, RSS_FEED_URLS
-            
+            from config import RSS_FEEDS_ENABLED, RSS_FEED_URLS, RSS_FETCH_WORKERS, RSS_SEEN_GUIDS_MAX
+
             if not RSS_FEEDS_ENABLED or not RSS_FEED_URLS:
                 logger.warning("RSS Feeds not enabled or configured")
                 return []
-            
+
             trends = []
-            
-            # Helper to check keywords
-            def matches_keywords(text):
-                if not keywords: return True
-                text = text.lower()
-                return any(k.lower() in text for k in keywords)
-            
-            for feed_url in RSS_FEED_URLS:
+            matcher = get_keyword_matcher(keywords)
+
+            urls = [url for url in RSS_FEED_URLS if url]
+            with ThreadPoolExecutor(max_workers=max(1, min(RSS_FETCH_WORKERS, len(urls)))) as pool:
+                feeds = list(pool.map(RssFeedSource._fetch_feed, urls))
+
+            # Entries are taken in configured feed order, as before
+            for feed_url, feed in zip(urls, feeds):
                 if len(trends) >= limit:
                     break
-                
-                try:
-                    feed = feedparser.parse(feed_url)
-                    
-                    for idx, entry in enumerate(feed.entries[:10]):  # Check more to filter
-                        if len(trends) >= limit:
-                            break
-                        
-                        title = entry.get("title", "")
-                        summary = entry.get("summary", "")[:200]
-                        
-                        if not matches_keywords(title + " " + summary):
-                            continue
-                        
-                        trends.append({
-                            "id": f"rss_{len(trends)}",
-                            "title": title,
-                            "source": feed.feed.get("title", "RSS Feed"),
-                            "category": "RSS",
-                            "score": 90 - (len(trends) * 3),
-                            "summary": summary,
-                            "timestamp": entry.get("published", datetime.utcnow().isoformat() + 'Z'),
-                            "url": entry.get("link", "")
-                        })
-                        
-                except Exception as feed_err:
-                    logger.warning(f"Error parsing RSS feed {feed_url}: {feed_err}")
+                if feed is None:
                     continue
-            
+
+                seen = feed["seen"]
+                for entry in feed["entries"][:10]:  # Check more to filter
+                    if len(trends) >= limit:
+                        break
+
+                    title = entry["title"]
+                    summary = entry["summary"]
+
+                    hits = matcher.matches(title + "\n" + summary)
+                    if matcher and not hits:
+                        continue
+
+                    with RssFeedSource._lock:
+                        is_new = entry["guid"] not in seen
+                        if only_new:
+                            seen[entry["guid"]] = True
+                            seen.move_to_end(entry["guid"])
+                            while len(seen) > RSS_SEEN_GUIDS_MAX:
+                                seen.popitem(last=False)
+                    if only_new and not is_new:
+                        continue
+
+                    trends.append({
+                        "id": f"rss_{len(trends)}",
+                        "title": title,
+                        "source": feed["title"],
+                        "category": "RSS",
+                        "score": 90 - (len(trends) * 3),
+                        "summary": summary,
+                        "timestamp": entry["published"],
+                        "url": entry["link"],
+                        "guid": entry["guid"],
+                        "new": is_new,
+                        "keyword_hits": hits
+                    })
+
             logger.info(f"Fetched {len(trends)} trends from RSS Feeds")
             return trends
-            
+
         except Exception as e:
             logger.error(f"RSS Feeds error: {e}")
             return []
+
+    @staticmethod
+    def _get_session():
+        """Shared session with one keep-alive pool sized for the fetch workers"""
+        from config import RSS_FETCH_WORKERS
+
+        with RssFeedSource._lock:
+            if RssFeedSource._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=RSS_FETCH_WORKERS, pool_maxsize=RSS_FETCH_WORKERS)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = "SIA-R News Engine RSS reader"
+                RssFeedSource._session = session
+            return RssFeedSource._session
+
+    @staticmethod
+    def _fetch_feed(feed_url: str):
+        """
+        Download one feed with a conditional GET
+
+        Returns:
+            Feed state dict (title, entries, seen), or None if it could not be read
+        """
+        from config import RSS_FETCH_TIMEOUT
+
+        with RssFeedSource._lock:
+            state = RssFeedSource._feeds.setdefault(feed_url, {
+                "etag": None, "modified": None, "title": "RSS Feed",
+                "entries": None, "seen": OrderedDict()
+            })
+
+        headers = {}
+        if state["entries"] is not None:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["modified"]:
+                headers["If-Modified-Since"] = state["modified"]
+
+        try:
+            started = time.time()
+            response = RssFeedSource._get_session().get(feed_url, headers=headers, timeout=RSS_FETCH_TIMEOUT)
+
+            if response.status_code == 304 and state["entries"] is not None:
+                logger.debug(f"RSS feed {feed_url} not modified")
+                return state
+            response.raise_for_status()
+
+            feed = feedparser.parse(response.content)
+            now = datetime.utcnow().isoformat() + 'Z'
+            entries = []
+            for entry in feed.entries:
+                link = entry.get("link", "")
+                title = entry.get("title", "")
+                entries.append({
+                    "guid": entry.get("id") or link or title,
+                    "title": title,
+                    "summary": entry.get("summary", "")[:200],
+                    "published": entry.get("published", now),
+                    "link": link
+                })
+
+            with RssFeedSource._lock:
+                state["etag"] = response.headers.get("ETag")
+                state["modified"] = response.headers.get("Last-Modified")
+                state["title"] = feed.feed.get("title", "RSS Feed")
+                state["entries"] = entries
+            logger.debug(f"RSS feed {feed_url}: {len(entries)} entries in {time.time() - started:.2f}s")
+            return state
+
+        except Exception as feed_err:
+            logger.warning(f"Error parsing RSS feed {feed_url}: {feed_err}")
+            return None
@@ -1,13 +1,77 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import OperationalError
-from config import DB_URL
+from sqlalchemy.pool import StaticPool
+from config import DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE
+from config import DB_SQLITE_WAL, DB_SQLITE_BUSY_TIMEOUT_MS, DB_SQLITE_MMAP_SIZE
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def create_storage_engine(url=DB_URL):
+    """Create an engine tuned for the backend behind `url`.
+
+    SQLite is shared by several gunicorn workers and the scheduler, so
+    every connection gets WAL (readers no longer block the writer),
+    synchronous=NORMAL (one fsync per checkpoint instead of per commit),
+    a busy timeout (writers wait for the lock instead of failing with
+    "database is locked") and a memory-mapped read path. New database
+    files are created with auto_vacuum=INCREMENTAL; existing ones keep
+    their mode until converted (python -m services.maintenance
+    --incremental-vacuum). Server databases
+    get a bounded pool with pre-ping and recycling for stale connections.
+    """
+    url = make_url(url)
+
+    if url.get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+
+    in_memory = url.database in (None, "", ":memory:")
+    if in_memory:
+        # One shared connection, otherwise each checkout sees an empty database
+        sqlite_engine = create_engine(
+            url, echo=False, poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+    else:
+        sqlite_engine = create_engine(
+            url,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": DB_SQLITE_BUSY_TIMEOUT_MS / 1000.0
+            }
+        )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Only takes effect before the first table exists, so it must precede WAL
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if DB_SQLITE_WAL and not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(DB_SQLITE_BUSY_TIMEOUT_MS)}")
+        if DB_SQLITE_MMAP_SIZE:
+            cursor.execute(f"PRAGMA mmap_size={int(DB_SQLITE_MMAP_SIZE)}")
+        cursor.close()
+
+    return sqlite_engine
+
+
 # Create engine
-engine = create_engine(DB_URL, echo=False)
+engine = create_storage_engine(DB_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,6 +101,10 @@ def init_db():
         logger.error(f"Unexpected error initializing DB: {e}")
         raise
 
+    # Bring tables that already existed up to the current schema
+    from storage.migrations import run_migrations
+    run_migrations(engine)
+
 
 def get_db_session():
     """Get a database session"""
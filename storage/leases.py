@@ -0,0 +1,45 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from storage.models import SchedulerLease
+
+
+def try_acquire_lease(engine, name, duration: timedelta, holder=None):
+    """
+    Take a named lease shared by every process using the database
+
+    Each gunicorn worker runs its own scheduler; a job guarded by a lease
+    runs in whichever worker takes it first, and the others skip it until
+    the lease expires. It is never released early, so a job that finishes
+    quickly still runs once per lease period. A worker that dies holding
+    it only blocks the job until expiry.
+
+    Args:
+        engine: Engine of the shared database
+        name: Lease name (usually the scheduled job id)
+        duration: How long the lease is held
+        holder: Owner recorded on the row (default: "host:pid")
+
+    Returns:
+        True if this caller holds the lease now, False if someone else does
+    """
+    table = SchedulerLease.__table__
+    holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+    now = datetime.now()
+    values = {"holder": holder, "expires_at": now + duration}
+
+    # The UPDATE takes the write lock, so only one worker can win an expired lease
+    with engine.begin() as conn:
+        taken = conn.execute(table.update().where(
+            table.c.name == name, table.c.expires_at <= now
+        ).values(**values)).rowcount
+    if taken:
+        return True
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(table.insert().values(name=name, **values))
+        return True
+    except IntegrityError:
+        return False
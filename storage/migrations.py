@@ -0,0 +1,127 @@
+"""
+Schema migrations for databases created by an older version.
+
+create_all only creates missing tables, so anything added to an existing
+table (indexes, columns, constraints, data fixes) needs a step here.
+Steps run once, in version order, and are recorded in schema_migrations.
+
+Run against the configured DB_URL (e.g. an existing sia_r.db) with:
+    python -m storage.migrations
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import func, inspect, or_, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from storage.models import ApiKey, PipelineJob, PipelineLog, SchemaMigration, TaxonomyStats
+from config import API_KEY_MAX_ACTIVE_PER_USER
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration step taking an open connection"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return func
+    return register
+
+
+@migration(1, "Index pipeline_logs on (status, created_at) and (created_at)")
+def _pipeline_log_indexes(conn):
+    for index in PipelineLog.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+@migration(2, "Merge duplicate taxonomy_stats rows and make category_name unique")
+def _unique_taxonomy_stats(conn):
+    table = TaxonomyStats.__table__
+    duplicates = conn.execute(
+        select(
+            table.c.category_name,
+            func.min(table.c.id),
+            func.sum(table.c.usage_count),
+            func.sum(table.c.traffic_score),
+            func.avg(table.c.relevance_score)
+        ).group_by(table.c.category_name).having(func.count() > 1)
+    ).all()
+    for name, keep_id, usage, traffic, relevance in duplicates:
+        conn.execute(table.update().where(table.c.id == keep_id).values(
+            usage_count=usage, traffic_score=traffic, relevance_score=relevance
+        ))
+        conn.execute(table.delete().where(
+            table.c.category_name == name, table.c.id != keep_id
+        ))
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+@migration(3, "Deactivate surplus API keys per user and delete inactive or expired ones")
+def _compact_api_keys(conn):
+    table = ApiKey.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.user_id).where(table.c.is_active == True).order_by(
+            table.c.user_id, table.c.created_at.desc(), table.c.id.desc()
+        )
+    ).all()
+
+    # Every login used to mint a key; keep each user's newest ones
+    kept = {}
+    surplus = []
+    for key_id, user_id in rows:
+        kept[user_id] = kept.get(user_id, 0) + 1
+        if kept[user_id] > API_KEY_MAX_ACTIVE_PER_USER:
+            surplus.append(key_id)
+    for start in range(0, len(surplus), 500):
+        conn.execute(table.update().where(table.c.id.in_(surplus[start:start + 500])).values(is_active=False))
+
+    conn.execute(table.delete().where(or_(
+        table.c.is_active == False,
+        table.c.expires_at < datetime.now()
+    )))
+
+
+@migration(4, "Add pipeline_jobs.worker")
+def _pipeline_job_worker(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns(PipelineJob.__tablename__)}
+    if "worker" not in columns:
+        conn.exec_driver_sql("ALTER TABLE pipeline_jobs ADD COLUMN worker VARCHAR")
+
+
+def run_migrations(engine):
+    """
+    Apply pending migrations
+
+    Each step commits on its own. Another worker applying the same step
+    concurrently is logged and skipped, like table creation in init_db.
+
+    Returns:
+        List of versions applied by this call
+    """
+    table = SchemaMigration.__table__
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(table.c.version)).scalars())
+
+    done = []
+    for version, description, func in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                func(conn)
+                conn.execute(table.insert().values(version=version, description=description))
+            logger.info(f"Applied migration {version}: {description}")
+            done.append(version)
+        except (IntegrityError, OperationalError) as e:
+            logger.warning(f"Migration {version} skipped (applied concurrently?): {e}")
+    return done
+
+
+if __name__ == "__main__":
+    from storage.database import engine, init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    print(f"Database at {engine.url} is up to date")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Float, Boolean, JSON, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from storage.database import Base
 from datetime import datetime
@@ -28,13 +29,18 @@ class ApiKey(Base):
 
 class PipelineLog(Base):
     __tablename__ = "pipeline_logs"
+    __table_args__ = (
+        Index("ix_pipeline_logs_status_created_at", "status", "created_at"),
+        Index("ix_pipeline_logs_created_at", "created_at"),
+    )
+    __mapper_args__ = {"eager_defaults": True}  # Fetch created_at with the INSERT for rollups
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=True)
     title = Column(String, nullable=True)
     content = Column(Text, nullable=True)
     input_text = Column(Text)
-    output_json = Column(JSON)
+    output_json = deferred(Column(JSON))  # Legacy rows only; new output goes to PipelineLogOutput
     status = Column(String)  # "success", "failed", "processing"
     error_message = Column(Text, nullable=True)
     execution_time = Column(Float)  # milliseconds
@@ -45,11 +51,36 @@ class PipelineLog(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     wp_post_id = Column(Integer, nullable=True)
 
+class PipelineLogOutput(Base):
+    __tablename__ = "pipeline_log_outputs"
+    
+    log_id = Column(Integer, primary_key=True)  # pipeline_logs.id
+    codec = Column(String, default="zlib")
+    payload = Column(LargeBinary)  # Compressed JSON
+    size = Column(Integer)  # Uncompressed bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class PipelineDailyRollup(Base):
+    __tablename__ = "pipeline_daily_rollups"
+    __table_args__ = (UniqueConstraint("date", "category", "status", name="uq_pipeline_daily_rollup"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, index=True)  # Day of PipelineLog.created_at
+    category = Column(String, default="")  # "" when the run had no category
+    status = Column(String)
+    count = Column(Integer, default=0)
+    quality_sum = Column(Float, default=0.0)
+    execution_time_sum = Column(Float, default=0.0)
+
 class TaxonomyStats(Base):
     __tablename__ = "taxonomy_stats"
+    __table_args__ = (
+        # Conflict target of the usage upsert
+        Index("uq_taxonomy_stats_category_name", "category_name", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    category_name = Column(String, index=True)
+    category_name = Column(String)
     tag_name = Column(String, nullable=True)
     usage_count = Column(Integer, default=0)
     traffic_score = Column(Float, default=0.0)
@@ -82,3 +113,42 @@ class Settings(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+class PipelineJob(Base):
+    __tablename__ = "pipeline_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, nullable=True)
+    title = Column(String, nullable=True)
+    status = Column(String, index=True)  # "queued", "running", "completed", "failed"
+    stages = Column(JSON, default=dict)  # {"tagger": {"status": "completed", "elapsed_ms": ...}, ...}
+    result_json = Column(JSON, nullable=True)  # Final pipeline output
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    worker = Column(String, nullable=True)  # "host:pid" of the process that queued it
+
+class PipelineCheckpoint(Base):
+    __tablename__ = "pipeline_checkpoints"
+    __table_args__ = (UniqueConstraint("run_id", "stage", name="uq_pipeline_checkpoint_stage"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)
+    input_hash = Column(String)  # sha256 of title + content the stage ran on
+    stage = Column(String)  # "cleaner", "tagger", ..., "autolearn"
+    output_json = Column(JSON, nullable=True)  # Raw stage output
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)  # Scheduled job id, e.g. "daily_maintenance"
+    holder = Column(String)  # "host:pid" of the worker that took it
+    expires_at = Column(DateTime)
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
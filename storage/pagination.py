@@ -0,0 +1,39 @@
+from sqlalchemy import and_, or_, select
+
+
+def keyset_page(query, model, cursor=None, limit=50):
+    """
+    Newest-first page of `query` using keyset (cursor) pagination
+
+    Rows are ordered by (created_at DESC, id DESC) and the cursor is the id
+    of the last row of the previous page. The next page starts strictly
+    after that row's stored created_at, so the cost does not grow with the
+    page depth the way OFFSET does.
+
+    Args:
+        query: SQLAlchemy query over `model` (filters already applied)
+        model: Mapped class with id and created_at columns
+        cursor: next_cursor returned with the previous page, or None
+        limit: Page size
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValueError: malformed cursor
+    """
+    if cursor:
+        cursor_id = int(cursor)
+        # Compare against the anchor row's stored value rather than a bound
+        # datetime, whose text form may differ from what SQLite stored
+        anchor = select(model.created_at).where(model.id == cursor_id).scalar_subquery()
+        query = query.filter(or_(
+            model.created_at < anchor,
+            and_(model.created_at == anchor, model.id < cursor_id),
+            # Anchor row deleted meanwhile: fall back to insertion order
+            and_(anchor.is_(None), model.id < cursor_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
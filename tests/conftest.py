@@ -0,0 +1,29 @@
+import pytest
+import storage.database as database
+from config import TAXONOMY_AUTOLEARN_CONFIG
+from storage.database import SessionLocal, create_storage_engine, init_db
+import storage.models  # noqa: F401  registers every table before init_db
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """Point the app at a throwaway SQLite database instead of ./sia_r.db
+
+    SessionLocal is shared by every service, so it is rebound in place.
+    """
+    engine = create_storage_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    original = database.engine
+    monkeypatch.setattr(database, "engine", engine)
+    SessionLocal.configure(bind=engine)
+    init_db()
+    yield engine
+    SessionLocal.configure(bind=original)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def tmp_taxonomy_profile(tmp_path, monkeypatch):
+    """Keep every TaxonomyAutolearn built by a test off ./taxonomy_profile.json"""
+    path = tmp_path / "taxonomy_profile.json"
+    monkeypatch.setitem(TAXONOMY_AUTOLEARN_CONFIG, "profile_file", str(path))
+    return path
@@ -0,0 +1,168 @@
+import pytest
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from flask import Flask
+from storage.database import Base, SessionLocal
+from storage.migrations import run_migrations
+from storage.models import ApiKey
+import services.api_key_auth as api_key_auth
+from services.api_key_auth import APIKeyAuth, ApiKeyCache
+from services.jwt_auth import JWTAuth
+from routes.auth import request_user_id
+
+def stored_key(key_hash):
+    db = SessionLocal()
+    try:
+        return db.query(ApiKey).filter(ApiKey.key_hash == key_hash).first()
+    finally:
+        db.close()
+
+def active_keys(user_id):
+    db = SessionLocal()
+    try:
+        return db.query(ApiKey).filter(ApiKey.user_id == user_id, ApiKey.is_active == True).count()
+    finally:
+        db.close()
+
+class TestAPIKeyAuth:
+    """Test suite for APIKeyAuth verification caching"""
+    
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch, tmp_db):
+        cache = ApiKeyCache(ttl=60, max_size=10, flush_interval=3600)
+        monkeypatch.setattr(api_key_auth, "_cache", cache)
+        yield cache
+        cache.close()
+    
+    def test_cached_verification_skips_database(self, cache):
+        """Test that a verified key is served from the cache"""
+        plain_key, key_hash = APIKeyAuth.generate_key(user_id=7)
+        assert APIKeyAuth.verify_key(plain_key) == (7, True)
+        
+        # Deactivate behind the cache's back: the cached entry is still trusted
+        db = SessionLocal()
+        try:
+            db.query(ApiKey).filter(ApiKey.key_hash == key_hash).update({ApiKey.is_active: False})
+            db.commit()
+        finally:
+            db.close()
+        assert APIKeyAuth.verify_key(plain_key) == (7, True)
+        
+        cache.invalidate(key_hash)
+        assert APIKeyAuth.verify_key(plain_key) == (None, False)
+    
+    def test_revoke_invalidates_immediately(self):
+        """Test that revoke_key evicts the key from the cache"""
+        plain_key, _ = APIKeyAuth.generate_key(user_id=7)
+        assert APIKeyAuth.verify_key(plain_key)[1]
+        
+        assert APIKeyAuth.revoke_key(plain_key[:8])
+        assert APIKeyAuth.verify_key(plain_key) == (None, False)
+    
+    def test_ttl_expiry(self, monkeypatch):
+        """Test that entries older than the TTL are re-checked"""
+        cache = ApiKeyCache(ttl=0.01)
+        cache.put("hash", 7, None)
+        assert cache.get("hash") == (7, None)
+        
+        now = api_key_auth.time.monotonic()
+        monkeypatch.setattr(api_key_auth.time, "monotonic", lambda: now + 1)
+        assert cache.get("hash") is None
+    
+    def test_expired_key_rejected_from_cache(self):
+        """Test that key expiration is checked on cached entries"""
+        plain_key, key_hash = APIKeyAuth.generate_key(user_id=7, expires_days=-1)
+        assert APIKeyAuth.verify_key(plain_key) == (None, False)
+    
+    def test_last_used_flushed_in_batches(self, cache):
+        """Test that last_used is coalesced and written on flush only"""
+        keys = [APIKeyAuth.generate_key(user_id=7) for _ in range(3)]
+        for plain_key, _ in keys:
+            for _ in range(5):
+                APIKeyAuth.verify_key(plain_key)
+        
+        assert all(stored_key(key_hash).last_used is None for _, key_hash in keys)
+        
+        assert cache.flush() == 3
+        assert all(stored_key(key_hash).last_used is not None for _, key_hash in keys)
+        assert cache.flush() == 0
+    
+    def test_cache_size_bounded(self):
+        """Test that the least recently used entries are evicted"""
+        cache = ApiKeyCache(ttl=60, max_size=2)
+        for key_hash in ("a", "b", "c"):
+            cache.put(key_hash, 1, None)
+        
+        assert cache.get("a") is None
+        assert cache.get("c") == (1, None)
+    
+    def test_login_reuses_active_key(self):
+        """Test that repeated logins do not mint new keys"""
+        user_id = random.randint(10 ** 6, 10 ** 9)
+        plain_key, prefix = APIKeyAuth.get_or_create_key(user_id)
+        assert plain_key and prefix == plain_key[:8]
+        
+        assert APIKeyAuth.get_or_create_key(user_id) == (None, prefix)
+        assert active_keys(user_id) == 1
+    
+    def test_active_keys_capped(self, monkeypatch):
+        """Test that the oldest keys are deactivated beyond the cap"""
+        monkeypatch.setattr(api_key_auth, "API_KEY_MAX_ACTIVE_PER_USER", 2)
+        user_id = random.randint(10 ** 6, 10 ** 9)
+        keys = [APIKeyAuth.generate_key(user_id)[0] for _ in range(3)]
+        
+        assert active_keys(user_id) == 2
+        assert APIKeyAuth.verify_key(keys[0]) == (None, False)
+        assert APIKeyAuth.verify_key(keys[2]) == (user_id, True)
+    
+    def test_rotate_replaces_keys(self):
+        """Test that rotation invalidates cached old keys"""
+        user_id = random.randint(10 ** 6, 10 ** 9)
+        old_key, _ = APIKeyAuth.generate_key(user_id)
+        assert APIKeyAuth.verify_key(old_key)[1]
+        
+        new_key, _ = APIKeyAuth.rotate_key(user_id)
+        
+        assert APIKeyAuth.verify_key(old_key) == (None, False)
+        assert APIKeyAuth.verify_key(new_key) == (user_id, True)
+        assert active_keys(user_id) == 1
+    
+    def test_request_user_id_accepts_api_keys(self, cache):
+        """Test that routes authenticate API keys through the cached verify_key"""
+        plain_key, _ = APIKeyAuth.generate_key(user_id=7)
+        app = Flask(__name__)
+        
+        for headers in ({"X-API-Key": plain_key}, {"Authorization": f"Bearer {plain_key}"}):
+            with app.test_request_context(headers=headers):
+                assert request_user_id() == 7
+        assert cache.flush() == 1
+        
+        with app.test_request_context(headers={"X-API-Key": "not-a-key"}):
+            assert request_user_id() is None
+        with app.test_request_context(headers={"Authorization": f"Bearer {JWTAuth.create_token(9, 'a@b.c')}"}):
+            assert request_user_id() == 9
+        with app.test_request_context():
+            assert request_user_id() is None
+    
+    def test_migration_compacts_login_keys(self, tmp_path):
+        """Test that surplus, revoked and expired keys are removed"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        Base.metadata.create_all(bind=engine)
+        now = datetime.now()
+        with engine.begin() as conn:
+            conn.execute(ApiKey.__table__.insert(), [
+                {"user_id": 1, "key_hash": f"h{i}", "key_prefix": f"p{i}", "is_active": True,
+                 "created_at": now - timedelta(days=10 - i), "expires_at": now + timedelta(days=30)}
+                for i in range(5)
+            ] + [
+                {"user_id": 2, "key_hash": "revoked", "key_prefix": "r", "is_active": False,
+                 "created_at": now, "expires_at": now + timedelta(days=30)},
+                {"user_id": 2, "key_hash": "expired", "key_prefix": "e", "is_active": True,
+                 "created_at": now, "expires_at": now - timedelta(days=1)},
+            ])
+        
+        assert 3 in run_migrations(engine)
+        with engine.connect() as conn:
+            remaining = conn.execute(ApiKey.__table__.select().order_by(ApiKey.__table__.c.id)).all()
+        assert [row.key_hash for row in remaining] == ["h2", "h3", "h4"]
@@ -0,0 +1,79 @@
+import pytest
+from config import PIPELINE_CONFIG
+from pipeline.run_pipeline import Pipeline
+from pipeline.schema import TaggerOutput, AuditorOutput
+from services.content_analyzer import ContentAnalyzer
+
+class FakeLLM:
+    """Records calls and replies with a canned JSON response"""
+    
+    def __init__(self, json_response):
+        self.json_response = json_response
+        self.json_calls = 0
+    
+    def generate_json(self, prompt, system_prompt=None):
+        self.json_calls += 1
+        return self.json_response
+
+SCORE = {"score": 8, "reason": "Claro"}
+
+FULL_RESPONSE = {
+    "suggested_categories": ["Política"],
+    "suggested_tags": ["Congreso", "Reforma"],
+    "entities": [{"name": "Congreso de Michoacán", "type": "organization"}],
+    "tone": "neutral",
+    "narrative_quality": SCORE,
+    "preliminary_factuality": SCORE,
+    "aggressiveness_level": {"score": 1, "reason": "Sin ataques"},
+    "neutrality_score": SCORE,
+    "improvements_suggested": ["Citar la fuente"]
+}
+
+TEXT = "El Congreso de Michoacán aprobó hoy la reforma electoral. La votación fue unánime."
+
+class TestContentAnalyzer:
+    """Test suite for ContentAnalyzer"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.analyzer = ContentAnalyzer()
+    
+    def test_maps_onto_tagger_and_auditor_outputs(self):
+        """Test that one response fills both stage outputs"""
+        self.analyzer.llm = FakeLLM(FULL_RESPONSE)
+        
+        result = self.analyzer.analyze(TEXT)
+        
+        assert self.analyzer.llm.json_calls == 1
+        assert TaggerOutput(**result["tagger"]).suggested_tags == ["Congreso", "Reforma"]
+        assert AuditorOutput(**result["auditor"]).aggressiveness_level["score"] == 1
+    
+    def test_incomplete_audit_is_omitted(self):
+        """Test that a part with missing scores is left for the split request"""
+        response = dict(FULL_RESPONSE)
+        del response["neutrality_score"]
+        self.analyzer.llm = FakeLLM(response)
+        
+        result = self.analyzer.analyze(TEXT)
+        
+        assert "tagger" in result
+        assert "auditor" not in result
+    
+    def test_invalid_response(self):
+        """Test that an unparseable response yields nothing"""
+        self.analyzer.llm = FakeLLM({"error": "Invalid JSON response", "raw": "..."})
+        assert self.analyzer.analyze(TEXT) == {}
+    
+    def test_pipeline_merged_mode(self, monkeypatch):
+        """Test that merged mode skips the dedicated tagger and auditor calls"""
+        monkeypatch.setitem(PIPELINE_CONFIG, "merged_analysis", True)
+        pipeline = Pipeline()
+        pipeline.analyzer.llm = FakeLLM(FULL_RESPONSE)
+        pipeline.tagger.extract_tags = lambda text: pytest.fail("tagger called")
+        pipeline.auditor.audit = lambda text: pytest.fail("auditor called")
+        
+        executor = pipeline._build_executor()
+        outputs = executor.run(initial={"cleaned_text": TEXT}, only=["analysis", "tagger", "auditor"])
+        
+        assert outputs["tagger"]["suggested_categories"] == ["Política"]
+        assert outputs["auditor"]["improvements_suggested"] == ["Citar la fuente"]
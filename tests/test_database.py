@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from storage.database import create_storage_engine
+
+class TestStorageEngine:
+    """Test suite for create_storage_engine"""
+    
+    def test_sqlite_file_pragmas(self, tmp_path):
+        """Test that file databases get WAL, NORMAL sync and a busy timeout"""
+        engine = create_storage_engine(f"sqlite:///{tmp_path / 'app.db'}")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+        engine.dispose()
+    
+    def test_sqlite_memory_shares_one_connection(self):
+        """Test that an in-memory database survives across checkouts"""
+        engine = create_storage_engine("sqlite://")
+        assert isinstance(engine.pool, StaticPool)
+        
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
@@ -0,0 +1,127 @@
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, inspect
+from storage.database import Base, SessionLocal
+from storage.migrations import run_migrations
+from storage.models import PipelineJob
+from services.job_manager import JobManager
+from services.maintenance import MaintenanceService
+
+class FakePipeline:
+    """Pipeline stand-in that reports two stages"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def run(self, title, content, user_id=None, auto_publish=False, on_stage=None, run_id=None, resume=None):
+        self.calls.append({"run_id": run_id, "resume": resume})
+        on_stage("cleaner", {"status": "completed"}, 0.01)
+        on_stage("tagger", {"status": "completed", "categories": ["Política"]}, 0.02)
+        return {"status": "success", "final_text": content}
+
+def wait_for(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = JobManager.get_job(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+class TestJobManager:
+    """Test suite for JobManager"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_db):
+        """Setup test fixtures"""
+        JobManager._pipeline = FakePipeline()
+        yield
+        JobManager.shutdown()
+        JobManager._pipeline = None
+    
+    def test_submit_returns_job_id(self):
+        """Test that submit returns immediately with a queued job"""
+        job_id = JobManager.submit("Titular", "Contenido de prueba")
+        assert job_id
+        assert JobManager.get_job(job_id)["status"] in ("queued", "running", "completed")
+    
+    def test_job_records_stages_and_result(self):
+        """Test that stage progress and final output are persisted"""
+        job = wait_for(JobManager.submit("Titular", "Contenido de prueba"))
+        
+        assert job["status"] == "completed"
+        assert set(job["stages"]) == {"cleaner", "tagger"}
+        assert job["stages"]["tagger"]["categories"] == ["Política"]
+        assert job["result"]["final_text"] == "Contenido de prueba"
+    
+    def test_job_starts_a_new_run(self):
+        """Test that a job keys its checkpoints by job id without resuming"""
+        job_id = JobManager.submit("Titular", "Contenido de prueba")
+        wait_for(job_id)
+        
+        assert JobManager._pipeline.calls == [{"run_id": job_id, "resume": False}]
+    
+    def test_unknown_job(self):
+        """Test that an unknown id returns None"""
+        assert JobManager.get_job("does-not-exist") is None
+    
+    def add_job(self, job_id, status, worker, age_days=0):
+        db = SessionLocal()
+        db.add(PipelineJob(id=job_id, title=job_id, status=status, stages={}, worker=worker,
+                           created_at=datetime.now() - timedelta(days=age_days)))
+        db.commit()
+        db.close()
+    
+    def test_orphaned_jobs_failed_on_restart(self):
+        """Test that jobs of dead or recycled workers are failed, live workers' jobs kept"""
+        host = socket.gethostname()
+        self.add_job("dead", "running", f"{host}:999999999")
+        self.add_job("recycled", "queued", f"{host}:{os.getpid()}")
+        self.add_job("legacy", "running", None)
+        self.add_job("other-live", "running", f"{host}:1")
+        self.add_job("other-host", "running", "elsewhere:42")
+        self.add_job("other-host-stale", "running", "elsewhere:42", age_days=2)
+        
+        assert JobManager.recover_orphaned_jobs() == 4
+        status = {job_id: JobManager.get_job(job_id)["status"]
+                  for job_id in ("dead", "recycled", "legacy", "other-live", "other-host", "other-host-stale")}
+        assert status == {"dead": "failed", "recycled": "failed", "legacy": "failed",
+                          "other-live": "running", "other-host": "running", "other-host-stale": "failed"}
+        assert "Interrupted" in JobManager.get_job("dead")["error"]
+    
+    def test_own_running_jobs_not_recovered(self):
+        """Test that a job this process is still running is left alone"""
+        job_id = JobManager.submit("Titular", "Contenido de prueba")
+        JobManager.recover_orphaned_jobs()
+        
+        assert wait_for(job_id)["status"] == "completed"
+    
+    def test_maintenance_prunes_finished_jobs(self):
+        """Test that finished jobs past retention are deleted, unfinished ones kept"""
+        host = socket.gethostname()
+        self.add_job("old-done", "completed", f"{host}:1", age_days=60)
+        self.add_job("old-stuck", "running", f"{host}:1", age_days=60)
+        self.add_job("new-running", "running", f"{host}:1")
+        self.add_job("new-done", "completed", f"{host}:1")
+        
+        result = MaintenanceService.prune_jobs(days=30)
+        
+        assert result == {"rows": 2, "recovered": 1}
+        assert JobManager.get_job("old-done") is None
+        assert JobManager.get_job("old-stuck") is None
+        assert JobManager.get_job("new-running")["status"] == "running"
+        assert JobManager.get_job("new-done")["status"] == "completed"
+    
+    def test_migration_adds_worker_column(self, tmp_path):
+        """Test that an existing pipeline_jobs table gets the worker column"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE TABLE pipeline_jobs (id VARCHAR PRIMARY KEY, status VARCHAR)")
+        Base.metadata.create_all(bind=engine)
+        
+        assert 4 in run_migrations(engine)
+        assert "worker" in {column["name"] for column in inspect(engine).get_columns("pipeline_jobs")}
+        engine.dispose()
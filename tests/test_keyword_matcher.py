@@ -0,0 +1,66 @@
+import time
+from services.keyword_matcher import KeywordMatcher, get_keyword_matcher
+from services.trend_harvester import TrendHarvester
+
+class TestKeywordMatcher:
+    """Test suite for KeywordMatcher"""
+
+    def test_accent_and_case_insensitive(self):
+        """Test that accents and case are ignored on both sides"""
+        matcher = KeywordMatcher(["Elección", "morelia"])
+
+        assert matcher.matches("ELECCION en Morelia") == ["Elección", "morelia"]
+        assert matcher.matches("Sin coincidencias") == []
+
+    def test_reports_overlapping_and_nested_keywords(self):
+        """Test that keywords inside or overlapping other matches are reported"""
+        matcher = KeywordMatcher(["eleccion", "elecciones 2026", "2026", "nes 20", "michoacan"])
+
+        assert matcher.matches("Elecciones 2026 en Michoacán") == [
+            "eleccion", "elecciones 2026", "2026", "nes 20", "michoacan"
+        ]
+        assert matcher.matches("elección") == ["eleccion"]
+
+    def test_blank_and_duplicate_keywords_ignored(self):
+        """Test that an empty list (or only blanks) disables filtering"""
+        assert not KeywordMatcher(["", "  "])
+        assert KeywordMatcher(["", "  "]).matches("texto") == []
+        assert KeywordMatcher(["Salud", "salud", " "]).keywords == ["Salud"]
+
+    def test_special_characters_escaped(self):
+        """Test that regex metacharacters in keywords are literal"""
+        matcher = KeywordMatcher(["c++", "a.b"])
+
+        assert matcher.matches("Aprende C++ hoy") == ["c++"]
+        assert matcher.matches("axb") == []
+
+    def test_matcher_built_once_per_keyword_list(self):
+        """Test that the compiled matcher is reused until the keywords change"""
+        first = get_keyword_matcher(["salud", "economia"])
+
+        assert get_keyword_matcher(["salud", "economia"]) is first
+        assert get_keyword_matcher(["salud"]) is not first
+
+    def test_long_keyword_lists_scale(self):
+        """Test that matching cost does not grow with one pass per keyword"""
+        matcher = KeywordMatcher([f"tema{i:04d}" for i in range(2000)] + ["michoacan"])
+        text = "Noticias de Michoacán y del tema0500 " * 20
+
+        started = time.time()
+        for _ in range(200):
+            hits = matcher.matches(text)
+        assert time.time() - started < 1.5
+        assert hits == ["tema0500", "michoacan"]
+
+    def test_filter_trends_records_hits(self):
+        """Test that the harvester filter keeps matching trends with their hits"""
+        trends = [
+            {"title": "Elecciones en Michoacán", "summary": "Resultados de la jornada"},
+            {"title": "Final de la Liga MX", "summary": None},
+            {"title": "Jornada", "summary": "Economía regional"},
+        ]
+
+        filtered = TrendHarvester._filter_trends_by_keywords(trends, ["michoacan", "economia", "jornada"])
+
+        assert [t["keyword_hits"] for t in filtered] == [["michoacan", "jornada"], ["economia", "jornada"]]
+        assert TrendHarvester._filter_trends_by_keywords(trends, [""]) == trends
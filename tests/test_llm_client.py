@@ -0,0 +1,217 @@
+import asyncio
+import httpx
+import openai
+import pytest
+import time
+from types import SimpleNamespace
+import services.llm_client as llm_client
+from services.llm_client import LLMClient, AsyncLLMClient
+from services.llm_cache import LLMResponseCache
+from services.rate_limiter import RateLimiter, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+class FakeCompletions:
+    """Stand-in for AsyncOpenAI chat.completions"""
+    
+    def __init__(self):
+        self.calls = []
+        self.errors = []
+    
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        if self.errors:
+            raise self.errors.pop(0)
+        if kwargs.get("stream"):
+            return self._chunks(["Hola", " ", "mundo"])
+        content = '{"ok": true}' if "response_format" in kwargs else "  texto  "
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _chunks(self, parts):
+        for part in parts:
+            delta = SimpleNamespace(content=part)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    completions = FakeCompletions()
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_client, "_get_async_openai", lambda: fake)
+    monkeypatch.setattr(llm_client, "get_llm_cache",
+                        lambda cache=LLMResponseCache(db_path=""): cache)
+    monkeypatch.setattr(llm_client, "get_rate_limiter",
+                        lambda limiter=RateLimiter(db_path=""): limiter)
+    return completions
+
+def rate_limit_error(retry_after_ms):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": str(retry_after_ms)}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+class TestLLMClient:
+    """Test suite for LLMClient and AsyncLLMClient"""
+    
+    def test_sync_generate(self, fake_openai):
+        """Test the sync facade returns stripped text"""
+        assert LLMClient().generate("hola") == "texto"
+    
+    def test_sync_generate_json(self, fake_openai):
+        """Test json_mode parses the response"""
+        assert LLMClient().generate_json("hola") == {"ok": True}
+        assert fake_openai.calls[-1]["response_format"] == {"type": "json_object"}
+    
+    def test_async_concurrent_generate(self, fake_openai):
+        """Test concurrent async calls from a foreign event loop"""
+        client = AsyncLLMClient()
+        
+        async def run():
+            return await asyncio.gather(*(client.generate(f"p{i}") for i in range(5)))
+        
+        assert asyncio.run(run()) == ["texto"] * 5
+    
+    def test_stream_yields_deltas(self, fake_openai):
+        """Test that stream yields text chunks in order"""
+        assert list(LLMClient().stream("hola")) == ["Hola", " ", "mundo"]
+    
+    def test_rate_limit_honours_retry_after(self, fake_openai):
+        """Test a 429 is retried after the server-provided delay"""
+        fake_openai.errors.append(rate_limit_error(200))
+        
+        started = time.time()
+        assert LLMClient().generate("hola") == "texto"
+        assert len(fake_openai.calls) == 2
+        assert time.time() - started >= 0.2
+    
+    def test_rate_limit_waits_with_limiter_disabled(self, fake_openai, monkeypatch):
+        """Test that 429s still back off when RPM and TPM limits are off"""
+        limiter = RateLimiter(rpm=0, tpm=0, db_path="")
+        monkeypatch.setattr(llm_client, "get_rate_limiter", lambda: limiter)
+        fake_openai.errors.extend([rate_limit_error(150), rate_limit_error(150)])
+        
+        started = time.time()
+        assert LLMClient().generate("hola") == "texto"
+        assert len(fake_openai.calls) == 3
+        assert time.time() - started >= 0.3
+    
+    def test_client_errors_not_retried(self, fake_openai):
+        """Test that 4xx responses other than 429 fail immediately"""
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        response = httpx.Response(400, request=request)
+        fake_openai.errors.append(openai.BadRequestError("bad", response=response, body=None))
+        
+        with pytest.raises(openai.BadRequestError):
+            LLMClient().generate("hola")
+        assert len(fake_openai.calls) == 1
+    
+    def test_clients_share_transport_loop(self):
+        """Test every client dispatches onto the same event loop"""
+        assert llm_client._get_loop() is llm_client._get_loop()
+
+class TestLLMResponseCache:
+    """Test suite for LLMResponseCache"""
+    
+    def test_repeated_call_is_served_from_cache(self, fake_openai, monkeypatch, tmp_path):
+        """Test that an identical low-temperature call skips the API"""
+        monkeypatch.setattr(llm_client, "get_llm_cache",
+                            lambda cache=LLMResponseCache(db_path=str(tmp_path / "c.db")): cache)
+        client = LLMClient(temperature=0.2)
+        
+        assert client.generate("misma nota") == "texto"
+        assert client.generate("misma nota") == "texto"
+        assert len(fake_openai.calls) == 1
+    
+    def test_high_temperature_not_cached(self, fake_openai, monkeypatch):
+        """Test that creative calls are not cached by default"""
+        monkeypatch.setattr(llm_client, "get_llm_cache",
+                            lambda cache=LLMResponseCache(db_path=""): cache)
+        client = LLMClient()
+        
+        client.generate("titular", temperature=0.8)
+        client.generate("titular", temperature=0.8)
+        assert len(fake_openai.calls) == 2
+    
+    def test_disk_tier_shared_between_instances(self, tmp_path):
+        """Test that a second cache instance (another worker) sees entries"""
+        path = str(tmp_path / "shared.db")
+        key = LLMResponseCache.make_key("m", "s", "p", 0.3, True)
+        
+        LLMResponseCache(db_path=path).set(key, {"a": 1})
+        assert LLMResponseCache(db_path=path).get(key) == {"a": 1}
+    
+    def test_cached_values_isolated_from_callers(self, tmp_path):
+        """Test that mutating a stored or returned value does not change later hits"""
+        cache = LLMResponseCache(db_path=str(tmp_path / "cache.db"))
+        value = {"tags": ["a"]}
+        cache.set("k", value)
+        value["tags"].append("mutated")
+        cache.get("k")["tags"].append("mutated")
+        assert cache.get("k") == {"tags": ["a"]}
+        
+        # Disk hit promoted to memory
+        other = LLMResponseCache(db_path=cache.db_path)
+        other.get("k")["tags"].append("mutated")
+        assert other.get("k") == {"tags": ["a"]}
+    
+    def test_ttl_and_lru_eviction(self):
+        """Test expiry and size-based eviction of the memory tier"""
+        cache = LLMResponseCache(ttl=-1, db_path="")
+        cache.set("k", "v")
+        assert cache.get("k") is None
+        
+        cache = LLMResponseCache(max_entries=2, db_path="")
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        assert cache.get("a") is None
+        assert cache.get("c") == "c"
+
+class TestRateLimiter:
+    """Test suite for RateLimiter"""
+    
+    def test_request_bucket(self):
+        """Test that requests beyond the RPM bucket must wait"""
+        limiter = RateLimiter(rpm=2, tpm=0, db_path="", batch_reserve=0)
+        
+        assert limiter.try_acquire(10) == 0
+        assert limiter.try_acquire(10) == 0
+        assert limiter.try_acquire(10) > 0
+    
+    def test_token_bucket(self):
+        """Test that large requests drain the TPM bucket"""
+        limiter = RateLimiter(rpm=0, tpm=1000, db_path="", batch_reserve=0)
+        
+        assert limiter.try_acquire(800) == 0
+        assert limiter.try_acquire(800) > 0
+        assert limiter.try_acquire(100) == 0
+    
+    def test_batch_yields_to_interactive(self):
+        """Test batch calls keep a reserve and wait while interactive ones queue"""
+        limiter = RateLimiter(rpm=10, tpm=0, db_path="", batch_reserve=0.5)
+        
+        for _ in range(5):
+            assert limiter.try_acquire(1, PRIORITY_BATCH) == 0
+        assert limiter.try_acquire(1, PRIORITY_BATCH) > 0
+        
+        for _ in range(5):
+            assert limiter.try_acquire(1, PRIORITY_INTERACTIVE) == 0
+        assert limiter.try_acquire(1, PRIORITY_INTERACTIVE) > 0
+        # An interactive caller is now waiting, so batch backs off
+        limiter._state["requests"] = 10
+        assert limiter.try_acquire(1, PRIORITY_BATCH) > 0
+    
+    def test_penalize_blocks_all_lanes(self):
+        """Test that a 429 pause applies to every caller"""
+        limiter = RateLimiter(rpm=100, tpm=0, db_path="")
+        limiter.penalize(5)
+        
+        assert limiter.try_acquire(1, PRIORITY_INTERACTIVE) > 4
+        assert limiter.try_acquire(1, PRIORITY_BATCH) > 4
+    
+    def test_bucket_shared_between_instances(self, tmp_path):
+        """Test that limiters in different workers draw from one bucket"""
+        path = str(tmp_path / "limits.db")
+        first = RateLimiter(rpm=2, tpm=0, db_path=path, batch_reserve=0)
+        second = RateLimiter(rpm=2, tpm=0, db_path=path, batch_reserve=0)
+        
+        assert first.try_acquire(1) == 0
+        assert second.try_acquire(1) == 0
+        assert first.try_acquire(1) > 0
@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+import pytest
+from storage.database import SessionLocal
+from storage.models import PipelineLog
+from services.log_writer import PipelineLogWriter
+
+def row(category, i=0):
+    return {
+        "user_id": 1, "input_text": f"texto {i}", "output_json": "{}", "status": "success",
+        "execution_time": 1.0, "model_used": "gpt-4", "quality_score": 0.5, "category": category
+    }
+
+class RecordingWriter(PipelineLogWriter):
+    """Writer that records batches instead of touching the database"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+    
+    def write_batch(self, batch, attempts=3):
+        self.gate.wait()
+        self.batches.append(list(batch))
+        return []
+
+class TestPipelineLogWriter:
+    """Test suite for PipelineLogWriter"""
+    
+    def test_flushes_by_size(self):
+        """Test that rows are grouped into batches of batch_size"""
+        writer = RecordingWriter(batch_size=3, flush_interval=60)
+        for i in range(6):
+            writer.submit(row("x", i))
+        writer.flush()
+        
+        assert [len(batch) for batch in writer.batches] == [3, 3]
+        writer.close()
+    
+    def test_flushes_by_time(self):
+        """Test that a partial batch is written after flush_interval"""
+        writer = RecordingWriter(batch_size=100, flush_interval=0.05)
+        writer.submit(row("x"))
+        time.sleep(0.3)
+        
+        assert [len(batch) for batch in writer.batches] == [1]
+        writer.close()
+    
+    def test_close_writes_pending_rows(self):
+        """Test that shutdown drains the queue"""
+        writer = RecordingWriter(batch_size=100, flush_interval=60)
+        for i in range(4):
+            writer.submit(row("x", i))
+        writer.close()
+        
+        assert sum(len(batch) for batch in writer.batches) == 4
+    
+    def test_backpressure_when_full(self):
+        """Test that a full queue blocks, then writes inline instead of dropping"""
+        writer = RecordingWriter(batch_size=1, flush_interval=60, max_queue=1, put_timeout=0.05)
+        writer.gate.clear()  # Stall the background thread
+        
+        writer.submit(row("x", 0))  # Taken by the thread, blocked in write_batch
+        time.sleep(0.05)
+        writer.submit(row("x", 1))  # Fills the queue
+        writer.gate.set()
+        started = time.time()
+        writer.submit(row("x", 2))  # Waits for room instead of failing
+        writer.close()
+        
+        assert sum(len(batch) for batch in writer.batches) == 3
+        assert time.time() - started < 2
+    
+    def test_batch_committed_to_database(self, tmp_db):
+        """Test that queued rows reach pipeline_logs in one batch"""
+        category = f"Writer-{uuid.uuid4().hex[:8]}"
+        writer = PipelineLogWriter(batch_size=10, flush_interval=60)
+        for i in range(3):
+            writer.submit(row(category, i))
+        writer.close()
+        
+        db = SessionLocal()
+        try:
+            assert db.query(PipelineLog).filter(PipelineLog.category == category).count() == 3
+        finally:
+            db.close()
+    
+    def test_bad_row_does_not_drop_batch(self, tmp_db, caplog):
+        """Test that a row that cannot be written is retried alone and only it is lost"""
+        category = f"Writer-{uuid.uuid4().hex[:8]}"
+        bad = dict(row(category, 1), input_text="fila rota", user_id=object())
+        
+        ids = PipelineLogWriter.write_batch([row(category, 0), bad, row(category, 2)])
+        
+        assert len(ids) == 2
+        db = SessionLocal()
+        try:
+            texts = {log.input_text for log in db.query(PipelineLog).filter(PipelineLog.category == category)}
+        finally:
+            db.close()
+        assert texts == {"texto 0", "texto 2"}
+        assert "fila rota" in caplog.text
@@ -0,0 +1,185 @@
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from storage.database import SessionLocal, create_storage_engine
+from storage.leases import try_acquire_lease
+from storage.models import ApiKey, PipelineCheckpoint, PipelineLog, PipelineLogOutput
+from services.log_writer import PipelineLogWriter
+from services.maintenance import MaintenanceService
+import services.maintenance as maintenance
+
+def write_logs(category, count, status="success", age_days=0):
+    ids = PipelineLogWriter.write_batch([{
+        "user_id": 1, "input_text": f"texto {i}", "output_json": {"final_text": "x" * 100},
+        "status": status, "execution_time": 1.0, "model_used": "gpt-4",
+        "quality_score": 0.8, "category": category
+    } for i in range(count)])
+    if age_days:
+        db = SessionLocal()
+        try:
+            db.query(PipelineLog).filter(PipelineLog.id.in_(ids)).update(
+                {PipelineLog.created_at: datetime.now() - timedelta(days=age_days)},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+    return ids
+
+def count_logs(ids):
+    db = SessionLocal()
+    try:
+        return db.query(PipelineLog).filter(PipelineLog.id.in_(ids)).count()
+    finally:
+        db.close()
+
+class TestMaintenanceService:
+    """Test suite for MaintenanceService"""
+    
+    @pytest.fixture(autouse=True)
+    def database(self, monkeypatch, tmp_db):
+        monkeypatch.setattr(maintenance, "engine", tmp_db)
+        monkeypatch.setattr(maintenance, "MAINTENANCE_BATCH_PAUSE", 0)
+    
+    def test_purge_logs_in_batches(self):
+        """Test that expired logs and their outputs go, recent and pending ones stay"""
+        category = f"Maint-{uuid.uuid4().hex[:8]}"
+        old = write_logs(category, 7, age_days=400)
+        pending = write_logs(category, 2, status="pending", age_days=400)
+        recent = write_logs(category, 3)
+        
+        removed = MaintenanceService.delete_logs(
+            datetime.now() - timedelta(days=365), maintenance.PROTECTED_STATUSES, batch_size=3
+        )
+        
+        assert removed["rows"] >= 7 and removed["bytes"] > 0
+        assert count_logs(old) == 0
+        assert count_logs(pending) == 2
+        assert count_logs(recent) == 3
+        db = SessionLocal()
+        try:
+            assert db.query(PipelineLogOutput).filter(PipelineLogOutput.log_id.in_(old)).count() == 0
+        finally:
+            db.close()
+    
+    def test_archive_before_delete(self, tmp_path):
+        """Test that archived logs keep their full output"""
+        category = f"Maint-{uuid.uuid4().hex[:8]}"
+        old = write_logs(category, 2, age_days=400)
+        
+        removed = MaintenanceService.purge_logs(days=365, archive_dir=str(tmp_path))
+        
+        assert removed["archived"] == removed["rows"]
+        archive = next(tmp_path.glob("pipeline_logs-*.jsonl.gz"))
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        archived = [r for r in records if r["id"] in old]
+        assert len(archived) == 2
+        assert archived[0]["output_json"] == {"final_text": "x" * 100}
+    
+    def test_retention_disabled(self):
+        """Test that a retention of 0 keeps every log"""
+        assert MaintenanceService.purge_logs(days=0)["rows"] == 0
+    
+    def test_prune_expired_api_keys(self):
+        """Test that only expired API keys are deleted"""
+        prefix = uuid.uuid4().hex[:8]
+        db = SessionLocal()
+        try:
+            db.add_all([
+                ApiKey(user_id=1, key_hash=uuid.uuid4().hex, key_prefix=prefix,
+                       expires_at=datetime.now() - timedelta(days=1)),
+                ApiKey(user_id=1, key_hash=uuid.uuid4().hex, key_prefix=prefix,
+                       expires_at=datetime.now() + timedelta(days=1)),
+            ])
+            db.commit()
+        finally:
+            db.close()
+        
+        assert MaintenanceService.prune_api_keys()["rows"] >= 1
+        
+        db = SessionLocal()
+        try:
+            assert db.query(ApiKey).filter(ApiKey.key_prefix == prefix).count() == 1
+        finally:
+            db.close()
+    
+    def test_prune_old_checkpoints(self):
+        """Test that checkpoints of old runs are deleted"""
+        run_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            db.add(PipelineCheckpoint(run_id=run_id, stage="cleaner", output_json={},
+                                      created_at=datetime.now() - timedelta(days=30)))
+            db.commit()
+        finally:
+            db.close()
+        
+        assert MaintenanceService.prune_checkpoints(days=7)["rows"] >= 1
+    
+    def test_compact_sqlite_incrementally(self, tmp_path):
+        """Test that compaction never fully vacuums and releases pages once converted"""
+        engine = create_storage_engine(f"sqlite:///{tmp_path / 'app.db'}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=NONE")
+            conn.exec_driver_sql("VACUUM")
+        
+        def churn():
+            with engine.begin() as conn:
+                for _ in range(200):
+                    conn.execute(text("INSERT INTO t VALUES (:x)"), {"x": "x" * 4000})
+                conn.execute(text("DELETE FROM t"))
+        
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x TEXT)"))
+        churn()
+        
+        # Legacy database: the nightly job only analyzes
+        assert MaintenanceService.compact(bind=engine)["bytes"] == 0
+        
+        assert MaintenanceService.enable_incremental_vacuum(bind=engine)["bytes"] > 0
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+        
+        churn()
+        assert MaintenanceService.compact(pages=10, bind=engine)["bytes"] == 10 * page_size
+        assert MaintenanceService.compact(pages=0, bind=engine)["bytes"] > 10 * page_size
+        engine.dispose()
+    
+    def test_new_sqlite_databases_are_incremental(self, tmp_db):
+        """Test that fresh database files need no conversion"""
+        with tmp_db.connect() as conn:
+            assert conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+    
+    def test_daily_maintenance_runs_in_one_worker(self, tmp_db, monkeypatch):
+        """Test that the lease lets one worker run the daily job until it expires"""
+        from services.scheduler import SchedulerService
+        runs = []
+        monkeypatch.setattr(MaintenanceService, "run", staticmethod(lambda: runs.append(1) or {}))
+        monkeypatch.setattr(SchedulerService, "backfill_rollups", staticmethod(lambda lease=True: None))
+        
+        assert SchedulerService.daily_maintenance() == {}
+        assert SchedulerService.daily_maintenance() is None
+        assert runs == [1]
+        
+        assert not try_acquire_lease(tmp_db, "daily_maintenance", timedelta(hours=1), holder="other:1")
+        assert try_acquire_lease(tmp_db, "expired", timedelta(seconds=-1), holder="other:1")
+        assert try_acquire_lease(tmp_db, "expired", timedelta(hours=1), holder="other:2")
+    
+    def test_startup_backfill_runs_in_one_worker(self, tmp_db, monkeypatch):
+        """Test that the startup back-fill is leased, but daily maintenance always refreshes"""
+        from services.metrics_rollup import MetricsRollup
+        from services.scheduler import SchedulerService
+        runs = []
+        monkeypatch.setattr(MetricsRollup, "backfill", staticmethod(lambda: runs.append(1)))
+        
+        SchedulerService.backfill_rollups()
+        SchedulerService.backfill_rollups()
+        assert runs == [1]
+        
+        SchedulerService.backfill_rollups(lease=False)
+        assert runs == [1, 1]
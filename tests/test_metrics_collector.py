@@ -0,0 +1,184 @@
+import pytest
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect
+from storage.database import Base, SessionLocal
+from storage.migrations import run_migrations
+from storage.models import PipelineDailyRollup, PipelineLog, TaxonomyStats
+import services.metrics_collector as metrics_collector
+from services.metrics_collector import MetricsCollector
+from services.metrics_rollup import MetricsRollup
+from services.maintenance import MaintenanceService
+
+def rollup_rows(category):
+    db = SessionLocal()
+    try:
+        rows = db.query(PipelineDailyRollup).filter(PipelineDailyRollup.category == category).all()
+        return {(r.status): (r.count, round(r.quality_sum, 4), round(r.execution_time_sum, 4)) for r in rows}
+    finally:
+        db.close()
+
+def category_stats(name):
+    db = SessionLocal()
+    try:
+        return db.query(TaxonomyStats).filter(TaxonomyStats.category_name == name).all()
+    finally:
+        db.close()
+
+class TestMetricsCollector:
+    """Test suite for MetricsCollector"""
+    
+    @pytest.fixture(autouse=True)
+    def sync_log_writes(self, monkeypatch, tmp_db):
+        """Write logs inline, on a throwaway database, so they can be read back immediately"""
+        monkeypatch.setattr(metrics_collector, "PIPELINE_LOG_ASYNC", False)
+    
+    def test_pipeline_stats_aggregates(self):
+        """Test that counts and average time reflect new log rows"""
+        before = MetricsCollector.get_pipeline_stats(days=1)
+        
+        for status, seconds in (("success", 10.0), ("success", 20.0), ("failed", 30.0)):
+            MetricsCollector.log_pipeline_execution(
+                user_id=1, input_text="texto", output_json="{}", status=status,
+                execution_time=seconds, model_used="gpt-4"
+            )
+        
+        after = MetricsCollector.get_pipeline_stats(days=1)
+        
+        assert after["total_runs"] == before["total_runs"] + 3
+        assert after["successful"] == before["successful"] + 2
+        assert after["failed"] == before["failed"] + 1
+        total_time = after["avg_execution_time"] * after["total_runs"]
+        previous_time = before["avg_execution_time"] * before["total_runs"]
+        assert total_time - previous_time == pytest.approx(60.0, abs=0.01 * after["total_runs"] + 0.01)
+        assert after["period_days"] == 1
+    
+    def test_pipeline_stats_shape(self):
+        """Test the keys the UI and WP routes rely on"""
+        stats = MetricsCollector.get_pipeline_stats(days=7)
+        
+        assert set(stats) == {
+            "total_runs", "successful", "failed", "success_rate", "avg_execution_time", "period_days"
+        }
+        assert 0 <= stats["success_rate"] <= 1
+    
+    def test_log_updates_daily_rollup(self):
+        """Test that each log is added to its (date, category, status) bucket"""
+        category = f"Cat-{uuid.uuid4().hex[:8]}"
+        for status, quality in (("success", 0.8), ("success", 0.6), ("failed", 0.0)):
+            MetricsCollector.log_pipeline_execution(
+                user_id=1, input_text="texto", output_json="{}", status=status,
+                execution_time=5.0, model_used="gpt-4", quality_score=quality, category=category
+            )
+        
+        assert rollup_rows(category) == {"success": (2, 1.4, 10.0), "failed": (1, 0.0, 5.0)}
+    
+    def test_rebuild_matches_incremental(self):
+        """Test that the back-fill reproduces the incrementally kept rollup"""
+        category = f"Cat-{uuid.uuid4().hex[:8]}"
+        MetricsCollector.log_pipeline_execution(
+            user_id=1, input_text="texto", output_json="{}", status="success",
+            execution_time=3.0, model_used="gpt-4", quality_score=0.7, category=category
+        )
+        incremental = rollup_rows(category)
+        
+        MetricsRollup.rebuild(days=2)
+        
+        assert rollup_rows(category) == incremental
+    
+    def test_deleted_logs_leave_rollup(self):
+        """Test that deleting logs subtracts them, while retention purges keep history"""
+        category = f"Cat-{uuid.uuid4().hex[:8]}"
+        ids = [
+            MetricsCollector.log_pipeline_execution(
+                user_id=1, input_text="texto", output_json="{}", status=status,
+                execution_time=2.0, model_used="gpt-4", quality_score=0.5, category=category
+            )
+            for status in ("success", "success", "failed", None)
+        ]
+        
+        # Single delete, as the UI route does
+        db = SessionLocal()
+        try:
+            log = db.query(PipelineLog).filter(PipelineLog.id == ids[0]).first()
+            MetricsRollup.remove_many(db, [log])
+            db.delete(log)
+            db.commit()
+        finally:
+            db.close()
+        assert rollup_rows(category) == {"success": (1, 0.5, 2.0), "failed": (1, 0.5, 2.0), None: (1, 0.5, 2.0)}
+        
+        MaintenanceService.delete_logs(keep_statuses=("success",), batch_size=1)
+        assert rollup_rows(category) == {"success": (1, 0.5, 2.0)}
+        
+        MaintenanceService.delete_logs(datetime.now() + timedelta(days=1), keep_rollups=True)
+        assert rollup_rows(category) == {"success": (1, 0.5, 2.0)}
+    
+    def test_dashboard_metrics_shape(self):
+        """Test the dashboard summary read from rollups"""
+        metrics = MetricsRollup.get_dashboard_metrics(days=7)
+        
+        assert metrics["total_processed"] >= 0
+        assert len(metrics["top_categories"]) <= 5
+        dates = [day["date"] for day in metrics["daily_trend"]]
+        assert dates == sorted(dates)
+    
+    def test_category_usage_upsert(self):
+        """Test that repeated usage updates one row"""
+        name = f"Cat-{uuid.uuid4().hex[:8]}"
+        MetricsCollector.record_category_usage(name, traffic_score=1.0, relevance_score=0.4)
+        MetricsCollector.record_category_usage(name, traffic_score=2.0, relevance_score=0.8)
+        
+        stats = category_stats(name)
+        assert len(stats) == 1
+        assert stats[0].usage_count == 2
+        assert stats[0].traffic_score == 3.0
+        assert stats[0].relevance_score == pytest.approx(0.6)
+    
+    def test_category_usage_concurrent(self):
+        """Test that concurrent posts do not lose increments"""
+        name = f"Cat-{uuid.uuid4().hex[:8]}"
+        threads = [
+            threading.Thread(target=MetricsCollector.record_category_usage, args=(name,))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = category_stats(name)
+        assert len(stats) == 1 and stats[0].usage_count == 10
+    
+    def test_categories_usage_bulk(self):
+        """Test that all categories of a post are recorded, duplicates once"""
+        names = [f"Cat-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+        MetricsCollector.record_category_usage(names[0])
+        MetricsCollector.record_categories_usage(names + [names[1], ""])
+        
+        assert [category_stats(name)[0].usage_count for name in names] == [2, 1, 1]
+    
+    def test_migration_merges_duplicate_categories(self, tmp_path):
+        """Test that an old taxonomy_stats table is de-duplicated and made unique"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE taxonomy_stats (id INTEGER PRIMARY KEY, category_name VARCHAR,"
+                " tag_name VARCHAR, usage_count INTEGER, traffic_score FLOAT, relevance_score FLOAT,"
+                " last_updated DATETIME, updated_at DATETIME)"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO taxonomy_stats (category_name, usage_count, traffic_score, relevance_score)"
+                " VALUES ('Política', 2, 2.0, 0.4), ('Política', 3, 3.0, 0.6), ('Deportes', 1, 1.0, 0.5)"
+            )
+        Base.metadata.create_all(bind=engine)
+        
+        assert 2 in run_migrations(engine)
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(
+                "SELECT category_name, usage_count, traffic_score FROM taxonomy_stats ORDER BY category_name"
+            ).all()
+        assert rows == [("Deportes", 1, 1.0), ("Política", 5, 5.0)]
+        indexes = {index["name"]: index for index in inspect(engine).get_indexes("taxonomy_stats")}
+        assert indexes["uq_taxonomy_stats_category_name"]["unique"]
@@ -0,0 +1,122 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from storage.database import SessionLocal
+from storage.models import PipelineLog, PipelineLogOutput
+from services.log_writer import PipelineLogWriter
+from services.output_store import OutputStore
+from services.review_manager import ReviewManager
+import services.output_store as output_store
+
+def write_log(category, output, status="pending"):
+    return PipelineLogWriter.write_batch([{
+        "user_id": 1, "input_text": "texto de prueba", "output_json": output, "status": status,
+        "execution_time": 1.0, "model_used": "gpt-4", "quality_score": 0.8, "category": category
+    }])[0]
+
+class TestOutputStore:
+    """Test suite for OutputStore"""
+    
+    @pytest.fixture(autouse=True)
+    def database(self, tmp_db):
+        return tmp_db
+    
+    def test_roundtrip_compressed(self):
+        """Test that output is stored compressed and decodes unchanged"""
+        output = {"final_text": "Texto del artículo. " * 500, "quality_score": 0.8}
+        log_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", output)
+        
+        db = SessionLocal()
+        try:
+            row = db.get(PipelineLogOutput, log_id)
+            assert row.codec == "zlib"
+            assert len(row.payload) < row.size / 10
+            assert db.query(PipelineLog.output_json).filter(PipelineLog.id == log_id).scalar() is None
+        finally:
+            db.close()
+        
+        assert OutputStore.load(log_id) == output
+    
+    def test_json_text_not_double_encoded(self):
+        """Test that JSON text from the pipeline is stored as the document it holds"""
+        log_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", json.dumps({"status": "ok"}))
+        
+        assert OutputStore.load(log_id) == {"status": "ok"}
+    
+    def test_oversized_output_replaced_by_stub(self, monkeypatch):
+        """Test that payloads above the cap are not stored"""
+        monkeypatch.setattr(output_store, "PIPELINE_OUTPUT_MAX_BYTES", 100)
+        log_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", {"final_text": "x" * 1000})
+        
+        stored = OutputStore.load(log_id)
+        assert stored["truncated"] is True
+        assert stored["original_size"] > 1000
+    
+    def test_detail_view_loads_output_lists_do_not(self):
+        """Test that only get_review_by_id returns the output blob"""
+        output = {"final_text": "Texto", "quality_score": 0.8}
+        log_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", output)
+        
+        review = ReviewManager.get_review_by_id(log_id)
+        assert review["output"] == output
+        assert review["quality_score"] == 0.8
+        
+        pending = ReviewManager.get_pending_reviews(limit=5)
+        assert pending and all("output" not in item for item in pending)
+    
+    def test_legacy_column_fallback(self):
+        """Test that rows written before the output table still load"""
+        db = SessionLocal()
+        try:
+            log = PipelineLog(user_id=1, input_text="legacy", output_json={"legacy": True},
+                              status="success", quality_score=0.5)
+            db.add(log)
+            db.commit()
+            log_id = log.id
+        finally:
+            db.close()
+        
+        assert OutputStore.load(log_id) == {"legacy": True}
+    
+    def test_prune_drops_expired_payloads_only(self):
+        """Test that retention removes old blobs and keeps log rows"""
+        old_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", {"final_text": "viejo"})
+        new_id = write_log(f"Store-{uuid.uuid4().hex[:8]}", {"final_text": "nuevo"})
+        
+        db = SessionLocal()
+        try:
+            db.query(PipelineLogOutput).filter(PipelineLogOutput.log_id == old_id).update(
+                {PipelineLogOutput.created_at: datetime.now() - timedelta(days=200)}
+            )
+            db.commit()
+        finally:
+            db.close()
+        
+        removed = OutputStore.prune(days=90)
+        
+        assert removed["rows"] >= 1 and removed["bytes"] > 0
+        assert OutputStore.load(old_id) is None
+        assert OutputStore.load(new_id) == {"final_text": "nuevo"}
+        assert ReviewManager.get_review_by_id(old_id) is not None
+    
+    def test_prune_disabled(self):
+        """Test that a retention of 0 keeps everything"""
+        assert OutputStore.prune(days=0) == {"rows": 0, "bytes": 0}
+    
+    def test_prune_clears_legacy_column(self):
+        """Test that retention also applies to the legacy inline column"""
+        db = SessionLocal()
+        try:
+            log = PipelineLog(user_id=1, input_text="legacy", output_json={"legacy": True},
+                              status="success", quality_score=0.5,
+                              created_at=datetime.now() - timedelta(days=200))
+            db.add(log)
+            db.commit()
+            log_id = log.id
+        finally:
+            db.close()
+        
+        OutputStore.prune(days=90)
+        
+        assert OutputStore.load(log_id) is None
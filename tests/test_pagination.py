@@ -0,0 +1,65 @@
+import pytest
+import uuid
+from sqlalchemy import create_engine, inspect
+from storage.database import SessionLocal, Base
+from storage.models import PipelineLog
+from storage.pagination import keyset_page
+from storage.migrations import run_migrations
+import services.metrics_collector as metrics_collector
+from services.metrics_collector import MetricsCollector
+
+class TestKeysetPagination:
+    """Test suite for keyset pagination and the log index migration"""
+    
+    @pytest.fixture(autouse=True)
+    def logs(self, monkeypatch, tmp_db):
+        """Insert seven logs inline, on a throwaway database, so they can be read back immediately"""
+        monkeypatch.setattr(metrics_collector, "PIPELINE_LOG_ASYNC", False)
+        self.category = f"Page-{uuid.uuid4().hex[:8]}"
+        # Inserted within the same second, so created_at ties are broken by id
+        self.ids = [
+            MetricsCollector.log_pipeline_execution(
+                user_id=1, input_text=f"texto {i}", output_json="{}", status="success",
+                execution_time=1.0, model_used="gpt-4", category=self.category
+            )
+            for i in range(7)
+        ]
+    
+    def test_pages_cover_all_rows_once(self):
+        """Test that following next_cursor visits every row newest-first"""
+        db = SessionLocal()
+        try:
+            query = db.query(PipelineLog).filter(PipelineLog.category == self.category)
+            seen, cursor = [], None
+            while True:
+                rows, cursor = keyset_page(query, PipelineLog, cursor, limit=3)
+                seen.extend(row.id for row in rows)
+                if not cursor:
+                    break
+        finally:
+            db.close()
+        
+        assert seen == sorted(self.ids, reverse=True)
+    
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        db = SessionLocal()
+        try:
+            with pytest.raises(ValueError):
+                keyset_page(db.query(PipelineLog), PipelineLog, "not-a-cursor", limit=3)
+        finally:
+            db.close()
+    
+    def test_migration_adds_indexes_to_existing_table(self, tmp_path):
+        """Test that an old pipeline_logs table gains the new indexes"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE pipeline_logs (id INTEGER PRIMARY KEY, status VARCHAR, created_at DATETIME)"
+            )
+        Base.metadata.create_all(bind=engine)
+        
+        assert 1 in run_migrations(engine)
+        assert run_migrations(engine) == []
+        names = {index["name"] for index in inspect(engine).get_indexes("pipeline_logs")}
+        assert {"ix_pipeline_logs_created_at", "ix_pipeline_logs_status_created_at"} <= names
@@ -1,13 +1,19 @@
 import pytest
 import json
+import threading
+import time
+import uuid
 from pipeline.run_pipeline import Pipeline
 from pipeline.schema import PipelineRunRequest
+from services.checkpoint_store import CheckpointStore
 
 class TestPipeline:
     """Test suite for Pipeline"""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_db, tmp_taxonomy_profile):
         """Setup test fixtures"""
+        # The autolearn profile goes to tmp_taxonomy_profile, not ./taxonomy_profile.json
         self.pipeline = Pipeline()
     
     def test_pipeline_initialization(self):
@@ -62,6 +68,127 @@ class TestPipeline:
             # If execution was successful, check for quality metrics
             assert "stages" in result or "final_text" in result
     
+    def test_run_many_bounded_concurrency(self):
+        """Test that run_many yields every article and caps parallel runs"""
+        active = {"now": 0, "max": 0}
+        lock = threading.Lock()
+        
+        def fake_run(title, content, user_id=None, auto_publish=False):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+            return {"status": "success", "final_text": content}
+        
+        self.pipeline.run = fake_run
+        articles = ({"id": i, "title": f"Title {i}", "content": f"Body {i}"} for i in range(10))
+        
+        results = list(self.pipeline.run_many(articles, max_concurrency=3))
+        
+        assert sorted(r["id"] for r in results) == list(range(10))
+        assert all(r["result"]["status"] == "success" for r in results)
+        assert active["max"] <= 3
+    
+    def _stub_stages(self, calls, fail=()):
+        """Replace LLM-backed stages with counters; stages in `fail` raise"""
+        outputs = {
+            "tagger": {"suggested_categories": ["Política"], "suggested_tags": ["Congreso"]},
+            "auditor": {},
+            "fact_checker": {"risk_score": 0.1, "red_flags": []},
+            "verifier": {"coherence_score": 0.9, "overall_valid": True},
+            "humanizer": "texto humanizado",
+            "seo": {"h1": "H1", "meta_description": "Meta"},
+            "taxonomy": {"categories": ["Política"], "tags": ["Congreso"]},
+            "planner": {"publication_date": "2024-01-01", "auto_publish": False},
+            "autolearn": None
+        }
+        
+        def make(name):
+            def stage(out, on_token=None):
+                calls.append((name, dict(out)))
+                if name in fail:
+                    raise RuntimeError(f"{name} failed")
+                if name == "seo":
+                    return {"h1": out["humanizer"][:20], "meta_description": "Meta"}
+                return outputs[name]
+            return stage
+        
+        for name in outputs:
+            setattr(self.pipeline, f"_run_{name}", make(name))
+    
+    def test_failed_run_resumes_from_checkpoints(self):
+        """Test that a retry only re-runs the stages that did not complete"""
+        run_id = uuid.uuid4().hex
+        content = "Contenido de prueba suficientemente largo para el pipeline."
+        calls = []
+        
+        self._stub_stages(calls, fail={"seo"})
+        failed = self.pipeline.run("Titulo", content, run_id=run_id)
+        assert failed["status"] == "error"
+        assert failed["run_id"] == run_id
+        
+        calls.clear()
+        self._stub_stages(calls)
+        result = self.pipeline.run("Titulo", content, run_id=run_id)
+        
+        assert result["status"] == "success"
+        rerun = {name for name, _ in calls}
+        assert "seo" in rerun
+        assert not rerun & {"tagger", "auditor", "fact_checker", "verifier", "humanizer"}
+        assert result["stages"]["tagger"]["resumed"] is True
+    
+    def test_checkpoints_written_once_per_run(self, monkeypatch):
+        """Test that a new run skips the checkpoint lookup and writes all stages in one transaction"""
+        writes = []
+        monkeypatch.setattr(CheckpointStore, "load", lambda *args: pytest.fail("new run loaded checkpoints"))
+        original = CheckpointStore.save_many
+        monkeypatch.setattr(CheckpointStore, "save_many",
+                            lambda *args, **kwargs: writes.append(args[2]) or original(*args, **kwargs))
+        self._stub_stages([])
+        
+        result = self.pipeline.run("Titulo", "Contenido de prueba suficientemente largo para el pipeline.")
+        
+        assert result["status"] == "success"
+        assert len(writes) == 1
+        assert {"cleaner", "tagger", "humanizer", "seo"} <= set(writes[0])
+        
+        # A caller-chosen run ID (a background job's) is a new run too
+        run_id = uuid.uuid4().hex
+        result = self.pipeline.run("Titulo", "Otro contenido de prueba para el pipeline.", run_id=run_id, resume=False)
+        assert result["run_id"] == run_id
+        assert len(writes) == 2
+    
+    def test_changed_input_invalidates_checkpoints(self):
+        """Test that checkpoints are not reused for different input"""
+        run_id = uuid.uuid4().hex
+        calls = []
+        self._stub_stages(calls)
+        
+        self.pipeline.run("Titulo", "Primera version del contenido del articulo.", run_id=run_id)
+        calls.clear()
+        self.pipeline.run("Titulo", "Segunda version del contenido del articulo.", run_id=run_id)
+        
+        assert "tagger" in {name for name, _ in calls}
+    
+    def test_rerun_single_stage_with_override(self):
+        """Test regenerating only SEO after the text was edited"""
+        run_id = uuid.uuid4().hex
+        calls = []
+        self._stub_stages(calls)
+        self.pipeline.run("Titulo", "Contenido original del articulo de prueba.", run_id=run_id)
+        
+        calls.clear()
+        result = self.pipeline.rerun_stage(run_id, "seo", overrides={"humanizer": "Texto editado"})
+        
+        assert [name for name, _ in calls] == ["seo"]
+        assert result["output"]["h1"] == "Texto editado"
+        assert result["invalidated"] == ["planner"]
+        
+        with pytest.raises(LookupError):
+            self.pipeline.rerun_stage(uuid.uuid4().hex, "seo")
+    
     def test_pipeline_run_request_validation(self):
         """Test PipelineRunRequest validation"""
         # Valid request
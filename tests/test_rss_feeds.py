@@ -0,0 +1,143 @@
+import threading
+import time
+import pytest
+import config
+import services.trend_sources.rss_feeds as rss_feeds
+from services.trend_sources.rss_feeds import RssFeedSource
+
+def rss(*titles):
+    items = "".join(
+        f"<item><title>{t}</title><guid>{t}</guid><link>https://example.com/{i}</link>"
+        f"<description>Resumen de {t}</description></item>"
+        for i, t in enumerate(titles)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>{items}</channel></rss>'.encode()
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    """Serves one RSS document per URL and honours If-None-Match"""
+    
+    def __init__(self, feeds, delay=0.0):
+        self.feeds = feeds
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+    
+    def get(self, url, headers=None, timeout=None):
+        with self.lock:
+            self.requests.append((url, dict(headers or {})))
+        time.sleep(self.delay)
+        content = self.feeds[url]
+        etag = f'"{hash(content)}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, content, {"ETag": etag, "Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"})
+
+class TestRssFeedSource:
+    """Test suite for RssFeedSource"""
+    
+    @pytest.fixture(autouse=True)
+    def session(self, monkeypatch):
+        urls = [f"https://feeds.example.com/{i}.xml" for i in range(4)]
+        session = FakeSession({url: rss(f"Noticia {i}a", f"Noticia {i}b") for i, url in enumerate(urls)}, delay=0.2)
+        monkeypatch.setattr(config, "RSS_FEED_URLS", urls)
+        monkeypatch.setattr(config, "RSS_FEEDS_ENABLED", True)
+        monkeypatch.setattr(RssFeedSource, "_session", session)
+        monkeypatch.setattr(RssFeedSource, "_feeds", {})
+        return session
+    
+    def test_feeds_fetched_concurrently(self, session):
+        """Test that feeds are downloaded in parallel and merged in order"""
+        started = time.time()
+        trends = RssFeedSource.fetch(limit=20)
+        
+        assert time.time() - started < 0.6
+        assert [t["title"] for t in trends][:3] == ["Noticia 0a", "Noticia 0b", "Noticia 1a"]
+        assert len(trends) == 8
+    
+    def test_conditional_get_skips_parsing(self, session, monkeypatch):
+        """Test that unchanged feeds come back as 304 and are not re-parsed"""
+        RssFeedSource.fetch(limit=20)
+        
+        parses = []
+        original = rss_feeds.feedparser.parse
+        monkeypatch.setattr(rss_feeds.feedparser, "parse", lambda data: parses.append(1) or original(data))
+        trends = RssFeedSource.fetch(limit=20)
+        
+        assert parses == []
+        assert len(trends) == 8
+        second_round = session.requests[4:]
+        assert all(headers.get("If-None-Match") for _, headers in second_round)
+        assert all(headers.get("If-Modified-Since") for _, headers in second_round)
+    
+    def test_only_new_entries(self, session):
+        """Test that already returned GUIDs are skipped with only_new"""
+        first = RssFeedSource.fetch(limit=20, only_new=True)
+        assert all(t["new"] for t in first)
+        
+        url = config.RSS_FEED_URLS[0]
+        session.feeds[url] = rss("Noticia 0a", "Noticia 0b", "Noticia 0c")
+        
+        assert [t["title"] for t in RssFeedSource.fetch(limit=20, only_new=True)] == ["Noticia 0c"]
+    
+    def test_plain_fetch_does_not_consume_entries(self, session):
+        """Test that only only_new callers mark entries as seen"""
+        assert all(t["new"] for t in RssFeedSource.fetch(limit=20))
+        assert all(t["new"] for t in RssFeedSource.fetch(limit=20))
+        
+        assert len(RssFeedSource.fetch(limit=20, only_new=True)) == 8
+        assert not any(t["new"] for t in RssFeedSource.fetch(limit=20))
+    
+    def test_scheduled_generation_uses_new_entries_only(self, session, monkeypatch, tmp_db):
+        """Test that the article job does not pick the same RSS story twice"""
+        import services.article_generator as article_generator
+        from services.scheduler import SchedulerService
+        from services.trend_harvester import TrendHarvester
+        from storage.database import SessionLocal
+        from storage.models import Settings
+        
+        db = SessionLocal()
+        db.add(Settings(trend_keywords="", auto_publish_enabled=False))
+        db.commit()
+        db.close()
+        
+        picked = []
+        class FakeGenerator:
+            def generate_from_trend(self, trend, auto_publish=False):
+                picked.append(trend["title"])
+                return {"status": "success"}
+        monkeypatch.setattr(article_generator, "ArticleGenerator", FakeGenerator)
+        monkeypatch.setattr(TrendHarvester, "fetch_all_trends", staticmethod(
+            lambda **kwargs: {"rss_feeds": RssFeedSource.fetch(limit=5)}
+        ))
+        
+        for _ in range(3):
+            SchedulerService.generate_articles_job()
+        
+        # Five entries offered per run, eight in the feeds: the third run has nothing new
+        assert picked == ["Noticia 0a", "Noticia 2b"]
+    
+    def test_failing_feed_isolated(self, session):
+        """Test that one broken feed does not drop the others"""
+        del session.feeds[config.RSS_FEED_URLS[1]]
+        
+        trends = RssFeedSource.fetch(limit=20)
+        
+        assert len(trends) == 6
+    
+    def test_keyword_filter_accent_insensitive(self, session):
+        """Test that keywords match without accents and the hits are reported"""
+        session.feeds[config.RSS_FEED_URLS[0]] = rss("Elección en Morelia", "Clima")
+        trends = RssFeedSource.fetch(limit=20, keywords=["eleccion", "morelia", "futbol"])
+        
+        assert [t["title"] for t in trends] == ["Elección en Morelia"]
+        assert trends[0]["keyword_hits"] == ["eleccion", "morelia"]
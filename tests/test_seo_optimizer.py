@@ -0,0 +1,90 @@
+import pytest
+from services.seo_optimizer import SEOOptimizer
+
+class FakeLLM:
+    """Records calls and replies with canned responses"""
+    
+    def __init__(self, json_response):
+        self.json_response = json_response
+        self.json_calls = 0
+        self.text_calls = 0
+    
+    def generate_json(self, prompt, system_prompt=None):
+        self.json_calls += 1
+        return self.json_response
+    
+    def generate(self, prompt, system_prompt=None, **kwargs):
+        self.text_calls += 1
+        return "Respuesta individual"
+
+TEXT = "El Congreso de Michoacán aprobó hoy la reforma electoral. La votación fue unánime."
+
+class TestSEOOptimizer:
+    """Test suite for SEOOptimizer"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.seo = SEOOptimizer()
+    
+    def test_single_request_mode(self):
+        """Test that a complete combined response needs only one call"""
+        self.seo.llm = FakeLLM({
+            "h1": "Congreso aprueba reforma electoral",
+            "h2_suggestions": ["Contexto", "Votación"],
+            "meta_description": "El Congreso de Michoacán aprobó la reforma electoral por unanimidad.",
+            "schema_markup": {"@type": "NewsArticle", "headline": "Reforma"}
+        })
+        
+        result = self.seo.optimize(TEXT)
+        
+        assert self.seo.llm.json_calls == 1
+        assert self.seo.llm.text_calls == 0
+        assert result["h1"] == "Congreso aprueba reforma electoral"
+        assert result["h2_suggestions"] == [{"suggestion": "Contexto"}, {"suggestion": "Votación"}]
+        assert result["schema_markup"]["@type"] == "NewsArticle"
+    
+    def test_missing_fields_fall_back(self):
+        """Test that only the missing artifacts are requested separately"""
+        self.seo.llm = FakeLLM({"h1": "Titular", "h2_suggestions": [], "meta_description": ""})
+        
+        result = self.seo.optimize(TEXT)
+        
+        assert result["h1"] == "Titular"
+        # h2, meta and schema fall back to their own requests
+        assert self.seo.llm.text_calls == 3
+    
+    def test_invalid_response_uses_split_mode(self):
+        """Test that an unparseable combined response falls back entirely"""
+        self.seo.llm = FakeLLM({"error": "Invalid JSON response", "raw": "..."})
+        
+        self.seo.optimize(TEXT)
+        assert self.seo.llm.text_calls == 4
+    
+    def test_invalid_fields_fall_back_one_by_one(self):
+        """Test that fields over the prompt limits or of the wrong type are requested again"""
+        self.seo.llm = FakeLLM({
+            "h1": "Congreso aprueba reforma electoral",
+            "h2_suggestions": [{"nested": "dict"}, 3],
+            "meta_description": "x" * 400,
+            "schema_markup": {"@type": "NewsArticle"}
+        })
+        
+        result = self.seo.optimize(TEXT)
+        
+        assert result["h1"] == "Congreso aprueba reforma electoral"
+        assert result["schema_markup"] == {"@type": "NewsArticle"}
+        assert result["meta_description"] == "Respuesta individual"
+        # h2 and meta fall back to their own requests
+        assert self.seo.llm.text_calls == 2
+    
+    def test_long_h1_falls_back(self):
+        """Test that an H1 over 60 characters is not accepted from the combined response"""
+        self.seo.llm = FakeLLM({
+            "h1": "Titular " * 10,
+            "h2_suggestions": ["Contexto"],
+            "meta_description": "Resumen breve.",
+            "schema_markup": {"@type": "NewsArticle"}
+        })
+        
+        assert self.seo.optimize(TEXT)["h1"] == "Respuesta individual"
+        assert self.seo.llm.text_calls == 1
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from pipeline.stage_executor import StageExecutor
+
+class TestStageExecutor:
+    """Test suite for StageExecutor"""
+    
+    def test_dependencies_receive_outputs(self):
+        """Test that dependent stages see the outputs they depend on"""
+        executor = StageExecutor()
+        executor.add_stage("a", lambda out: out["text"].upper(), ["text"])
+        executor.add_stage("b", lambda out: out["a"] + "!", ["a"])
+        
+        outputs = executor.run(initial={"text": "hola"})
+        
+        assert outputs["a"] == "HOLA"
+        assert outputs["b"] == "HOLA!"
+    
+    def test_independent_stages_run_concurrently(self):
+        """Test that independent stages overlap in time"""
+        barrier = threading.Barrier(3, timeout=2)
+        
+        def stage(out):
+            barrier.wait()
+            return True
+        
+        executor = StageExecutor(max_workers=3)
+        for name in ("x", "y", "z"):
+            executor.add_stage(name, stage)
+        
+        outputs = executor.run()
+        assert outputs["x"] and outputs["y"] and outputs["z"]
+    
+    def test_sequential_mode(self):
+        """Test that parallel=False runs stages in registration order"""
+        order = []
+        executor = StageExecutor(parallel=False)
+        executor.add_stage("first", lambda out: order.append("first"))
+        executor.add_stage("second", lambda out: order.append("second"), ["first"])
+        
+        executor.run()
+        assert order == ["first", "second"]
+    
+    def test_callback_reports_each_stage(self):
+        """Test that on_stage_complete is called once per stage"""
+        seen = {}
+        executor = StageExecutor()
+        executor.add_stage("a", lambda out: 1)
+        executor.add_stage("b", lambda out: out["a"] + 1, ["a"])
+        
+        executor.run(on_stage_complete=lambda name, output, elapsed: seen.update({name: output}))
+        assert seen == {"a": 1, "b": 2}
+    
+    def test_stage_error_propagates(self):
+        """Test that a failing stage aborts the run"""
+        def boom(out):
+            raise ValueError("stage failed")
+        
+        executor = StageExecutor()
+        executor.add_stage("ok", lambda out: time.sleep(0.01))
+        executor.add_stage("bad", boom)
+        executor.add_stage("after", lambda out: True, ["bad"])
+        
+        with pytest.raises(ValueError):
+            executor.run()
+    
+    def test_unresolvable_dependencies(self):
+        """Test that a missing dependency is reported instead of hanging"""
+        executor = StageExecutor()
+        executor.add_stage("orphan", lambda out: True, ["missing"])
+        
+        with pytest.raises(RuntimeError):
+            executor.run()
+    
+    def test_stages_inherit_caller_context(self):
+        """Test that the caller's LLM priority lane reaches stage threads"""
+        from services.rate_limiter import llm_priority, current_priority, PRIORITY_BATCH
+        
+        executor = StageExecutor()
+        executor.add_stage("lane", lambda out: current_priority())
+        
+        with llm_priority(PRIORITY_BATCH):
+            outputs = executor.run(initial={})
+        
+        assert outputs["lane"] == PRIORITY_BATCH
@@ -0,0 +1,28 @@
+import json
+import threading
+from services.taxonomy_autolearn import TaxonomyAutolearn
+
+class TestTaxonomyAutolearn:
+    """Test suite for TaxonomyAutolearn"""
+    
+    def test_concurrent_learning_keeps_every_update(self, tmp_path):
+        """Test that parallel pipeline runs neither lose counts nor tear the profile file"""
+        path = tmp_path / "profile.json"
+        autolearn = TaxonomyAutolearn(profile_file=str(path))
+        
+        def learn():
+            for _ in range(25):
+                autolearn.learn_from_article(["Política"], ["elecciones", "congreso"])
+        
+        threads = [threading.Thread(target=learn) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        saved = json.loads(path.read_text(encoding="utf-8"))
+        assert saved["statistics"]["total_articles"] == 200
+        assert saved["categories"]["política"]["count"] == 200
+        assert saved["associations"]["política"]["congreso"] == 200
+        assert list(tmp_path.iterdir()) == [path]
+        assert TaxonomyAutolearn(profile_file=str(path)).profile["tags"]["elecciones"]["count"] == 200
@@ -0,0 +1,129 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from services.trend_fusion import TrendFusion
+from services.trend_harvester import TrendHarvester
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+def trend(title, hours_ago=0, summary=""):
+    return {
+        "title": title,
+        "summary": summary,
+        "score": 100,
+        "timestamp": (NOW - timedelta(hours=hours_ago)).isoformat().replace("+00:00", "Z")
+    }
+
+class TestTrendFusion:
+    """Test suite for TrendFusion"""
+
+    def test_tokens_normalized(self):
+        """Test that accents, case, stopwords and plurals are folded"""
+        assert TrendFusion.tokens("Elecciones 2026") == TrendFusion.tokens("elección  2026!")
+        assert TrendFusion.tokens("La política de México") == {"politica", "mexico"}
+
+    def test_near_duplicates_merged_across_sources(self):
+        """Test that the same story from several sources becomes one trend"""
+        fused = TrendFusion.fuse({
+            "rss_feeds": [trend("Elecciones 2026: lo que hay que saber", summary="Guía completa")],
+            "newsapi": [trend("Sismo en Oaxaca"), trend("ELECCIONES 2026")],
+            "google_trends": [trend("elecciones 2026")],
+        }, now=NOW)
+
+        assert len(fused) == 2
+        top = fused[0]
+        assert top["title"] == "Elecciones 2026: lo que hay que saber"
+        assert top["sources"] == ["rss_feeds", "newsapi", "google_trends"]
+        assert top["related"] == 2
+
+    def test_unrelated_trends_kept_apart(self):
+        """Test that sharing a word is not enough to merge"""
+        fused = TrendFusion.fuse({
+            "newsapi": [trend("Real Madrid gana la Champions"), trend("Peso mexicano gana terreno")],
+            "google_trends": [trend("Pumas"), trend("Pumas UNAM")],
+        }, now=NOW)
+
+        assert len(fused) == 4
+
+    def test_score_fuses_rank_source_count_and_recency(self):
+        """Test cluster ranking"""
+        fused = TrendFusion.fuse({
+            "google_trends": [trend("Huracán Otis"), trend("Tipo de cambio")],
+            "newsapi": [trend("Tipo de cambio hoy"), trend("Huracán Otis toca tierra")],
+            "rss_feeds": [trend("Final de la Liga MX", hours_ago=48), trend("Tipo de cambio")],
+        }, now=NOW)
+
+        # Three sources beat two; a two-day-old top story sinks
+        assert [t["title"] for t in fused] == ["Tipo de cambio hoy", "Huracán Otis", "Final de la Liga MX"]
+
+        no_decay = TrendFusion.fuse({"a": [trend("Viejo", hours_ago=48)], "b": [trend("Nuevo")]}, half_life=0, now=NOW)
+        assert no_decay[0]["fused_score"] == no_decay[1]["fused_score"]
+
+    def test_unparseable_timestamps_not_decayed(self):
+        """Test that RSS dates are parsed and bad ones ignored"""
+        fused = TrendFusion.fuse({
+            "rss_feeds": [{"title": "Uno", "timestamp": "Sun, 01 Mar 2026 11:00:00 GMT"}],
+            "newsapi": [{"title": "Dos", "timestamp": "ayer"}],
+        }, now=NOW)
+
+        scores = {t["title"]: t["fused_score"] for t in fused}
+        assert scores["Uno"] < scores["Dos"]
+
+    def test_near_linear_on_thousands_of_items(self):
+        """Test that a large candidate set is clustered quickly"""
+        rng = random.Random(7)
+        vocab = [f"palabra{i}" for i in range(3000)] + ["mexico", "gobierno", "2026"] * 50
+        all_trends = {
+            f"source{s}": [{"title": " ".join(rng.choices(vocab, k=6))} for _ in range(2000)]
+            for s in range(3)
+        }
+        all_trends["source0"][:50] = [{"title": "Elecciones 2026 en Michoacán"}] * 50
+
+        started = time.time()
+        fused = TrendFusion.fuse(all_trends, now=NOW)
+        assert time.time() - started < 3
+        assert sum(t["related"] + 1 for t in fused) == 6000
+        assert any(t["title"] == "Elecciones 2026 en Michoacán" and t["related"] == 49 for t in fused)
+
+    def test_common_words_still_fused_at_scale(self):
+        """Test that near-duplicates made of words in full postings are merged"""
+        rng = random.Random(3)
+        common = ["mexico", "gobierno", "economia", "seguridad", "salud", "congreso", "reforma", "senado"]
+        # Each word is in about 125 titles, each pair of them in about 18
+        filler = [
+            {"title": " ".join(rng.sample(common, 2) + [f"palabra{i}", f"otra{i}"])}
+            for i in range(500)
+        ]
+        fused = TrendFusion.fuse({
+            "newsapi": filler + [{"title": "Gobierno de México: economía y seguridad"}],
+            "rss_feeds": [{"title": "México, seguridad, economía, gobierno hoy"}],
+        }, now=NOW)
+
+        merged = [t for t in fused if t["related"]]
+        assert len(fused) == 501
+        assert [t["title"] for t in merged] == ["México, seguridad, economía, gobierno hoy"]
+        assert merged[0]["sources"] == ["newsapi", "rss_feeds"]
+
+    def test_flatten_trends_uses_fusion(self):
+        """Test that flatten_trends keeps its shape and limit"""
+        flattened = TrendHarvester.flatten_trends({
+            "google_trends": [trend("Elecciones 2026"), trend("Sismo")],
+            "rss_feeds": [trend("elecciones 2026")],
+        }, limit=1)
+
+        assert len(flattened) == 1
+        assert flattened[0]["title"] == "Elecciones 2026"
+
+    def test_keyword_hits_boost_clusters(self):
+        """Test that clusters matching more keywords rank higher"""
+        fused = TrendFusion.fuse({
+            "newsapi": [
+                trend("Sismo en Oaxaca"),
+                dict(trend("Elecciones en Michoacán"), keyword_hits=["eleccion"]),
+                dict(trend("Michoacán: elecciones"), keyword_hits=["michoacan"]),
+            ],
+        }, now=NOW)
+
+        assert fused[0]["title"] == "Elecciones en Michoacán"
+        assert fused[0]["keyword_hits"] == ["eleccion", "michoacan"]
+        assert "keyword_hits" not in fused[1]
@@ -0,0 +1,136 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import services.trend_cache as trend_cache
+import services.trend_harvester as trend_harvester
+from services.trend_cache import TrendCache
+from services.trend_harvester import TrendHarvester
+
+def fake_source(name, delay=0.0, error=None):
+    class Source:
+        calls = 0
+        
+        @staticmethod
+        def fetch(limit=10, keywords=None):
+            Source.calls += 1
+            time.sleep(delay)
+            if error:
+                raise error
+            return [{"title": f"{name} {i}", "summary": "", "score": 100 - i} for i in range(limit)]
+    return Source
+
+class TestTrendHarvester:
+    """Test suite for TrendHarvester"""
+    
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch, tmp_path):
+        cache = TrendCache(db_path=str(tmp_path / "trends.db"))
+        monkeypatch.setattr(trend_cache, "_cache", cache)
+        return cache
+    
+    @pytest.fixture(autouse=True)
+    def sources(self, monkeypatch, cache):
+        sources = {
+            "GoogleTrendsSource": fake_source("google", delay=0.3),
+            "TwitterSource": fake_source("twitter", delay=0.3),
+            "NewsApiSource": fake_source("news", delay=0.3),
+            "RssFeedSource": fake_source("rss", delay=3.0),
+            "SerpApiSource": fake_source("serp", error=RuntimeError("quota")),
+        }
+        for name, source in sources.items():
+            monkeypatch.setattr(trend_harvester, name, source)
+        return sources
+    
+    def test_sources_fetched_concurrently(self):
+        """Test that total time is bounded by the slowest source, not their sum"""
+        started = time.time()
+        results = TrendHarvester.fetch_all_trends(
+            limit=3, sources=["google_trends", "twitter", "newsapi"], budget=2
+        )
+        
+        assert time.time() - started < 0.8
+        assert list(results) == ["google_trends", "twitter", "newsapi"]
+        assert all(len(trends) == 3 for trends in results.values())
+    
+    def test_slow_and_failing_sources_isolated(self):
+        """Test that the budget returns finished sources and reports the rest"""
+        started = time.time()
+        results, status = TrendHarvester.fetch_all_trends(limit=3, budget=1, with_status=True)
+        
+        assert time.time() - started < 2
+        assert set(results) == {"google_trends", "twitter", "newsapi"}
+        assert status == {"timed_out": ["rss_feeds"], "failed": ["serpapi"]}
+    
+    def test_per_source_timeout(self):
+        """Test that a source past its own deadline is dropped"""
+        results, status = TrendHarvester.fetch_all_trends(
+            limit=3, sources=["google_trends", "newsapi"], timeout=0.1, budget=5, with_status=True
+        )
+        
+        assert results == {}
+        assert sorted(status["timed_out"]) == ["google_trends", "newsapi"]
+    
+    def test_timeout_counts_from_source_start(self, monkeypatch):
+        """Test that sources queued behind a busy pool still get their full timeout"""
+        monkeypatch.setattr(trend_harvester, "_executor", ThreadPoolExecutor(max_workers=1))
+        names = ["google_trends", "twitter", "newsapi"]
+        
+        results, status = TrendHarvester.fetch_all_trends(
+            limit=3, sources=names, timeout=0.5, budget=5, with_status=True
+        )
+        assert list(results) == names
+        assert status == {"timed_out": [], "failed": []}
+        
+        # The overall budget still caps the wait: the third source starts at 0.6s
+        results, status = TrendHarvester.fetch_all_trends(
+            limit=3, sources=names, timeout=0.5, budget=0.75, force=True, with_status=True
+        )
+        assert list(results) == ["google_trends", "twitter"]
+        assert status["timed_out"] == ["newsapi"]
+    
+    def test_cached_sources_not_refetched(self, sources):
+        """Test that a second call is served from the cache"""
+        TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        
+        assert sources["GoogleTrendsSource"].calls == 1
+    
+    def age_entry(self, cache, source, seconds):
+        key = TrendHarvester._cache_key(source, [])
+        cache._db().execute(
+            "UPDATE trend_cache SET fetched_at = fetched_at - ? WHERE key = ?", (seconds, key)
+        )
+    
+    def test_stale_served_while_revalidating(self, sources, cache):
+        """Test that stale data is returned at once and refreshed once in background"""
+        TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        self.age_entry(cache, "google_trends", TrendHarvester._cache_ttl + 1)
+        
+        started = time.time()
+        results = TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        
+        assert time.time() - started < 0.2
+        assert len(results["google_trends"]) == 3
+        time.sleep(0.6)
+        assert sources["GoogleTrendsSource"].calls == 2
+        assert TrendHarvester._is_cached_valid("google_trends")
+    
+    def test_cache_shared_between_workers(self, sources, cache, tmp_path):
+        """Test that a second process-level cache on the same file sees the entry and the lease"""
+        TrendHarvester.fetch_all_trends(limit=3, sources=["google_trends"])
+        other_worker = TrendCache(db_path=cache.db_path)
+        key = TrendHarvester._cache_key("google_trends", [])
+        
+        data, _ = other_worker.get(key)
+        assert len(data) >= 3
+        assert cache.try_lock(key, lease=60)
+        assert not other_worker.try_lock(key, lease=60)
+        cache.release(key)
+        assert other_worker.try_lock(key, lease=60)
+    
+    def test_refresh_trends_once_per_ttl(self, sources):
+        """Test that the periodic refresh only fetches entries that are due"""
+        assert TrendHarvester.refresh_trends(sources=["google_trends", "twitter"]) == ["google_trends", "twitter"]
+        assert TrendHarvester.refresh_trends(sources=["google_trends", "twitter"]) == []
+        assert sources["GoogleTrendsSource"].calls == 1